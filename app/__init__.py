@@ -1,14 +1,11 @@
 from flask import Flask
 from flask_cors import CORS
-import sys
-from pathlib import Path
 
-# Add parent directory to path
-sys.path.append(str(Path(__file__).parent.parent))
 from src.utils.config import FLASK_SECRET_KEY
 
-# tạo Flask application
-def create_app():
+# tạo Flask application; startup_mode: cách load predictor ('background', 'lazy', 'eager',
+# mặc định theo SALARY_STARTUP_MODE)
+def create_app(startup_mode=None):
 
     # Tạo Flask app
     app = Flask(__name__)
@@ -21,8 +18,13 @@ def create_app():
     CORS(app)
     
     # Register blueprints
-    from app.routes import main
+    from app.routes import main, start_model_loading
     app.register_blueprint(main)
+    start_model_loading(startup_mode)
+
+    # Nén gzip các response HTML/JSON khi client hỗ trợ
+    from app.http_cache import compress_response
+    app.after_request(compress_response)
     
     # Error handlers
     @app.errorhandler(404)
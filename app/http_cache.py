@@ -0,0 +1,108 @@
+import gzip
+import hashlib
+import threading
+from datetime import datetime, timezone
+
+from flask import request, current_app, render_template
+
+from src.utils.config import GZIP_ENABLED, GZIP_MIN_SIZE, GZIP_LEVEL
+
+# Các kiểu nội dung dạng văn bản được nén gzip
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/plain', 'text/css', 'application/json', 'application/javascript', 'text/javascript'
+}
+
+
+# Nén gzip nếu có lợi (đủ lớn và nhỏ hơn sau khi nén), trả về None nếu không nén
+def gzip_body(body, level=GZIP_LEVEL, min_size=GZIP_MIN_SIZE):
+    if len(body) < min_size:
+        return None
+    compressed = gzip.compress(body, compresslevel=level, mtime=0)
+    return compressed if len(compressed) < len(body) else None
+
+
+# Client có chấp nhận gzip không (Accept-Encoding)
+def accepts_gzip():
+    return GZIP_ENABLED and 'gzip' in request.accept_encodings and request.accept_encodings['gzip'] > 0
+
+
+# after_request: nén gzip các response văn bản chưa nén khi client hỗ trợ
+def compress_response(response):
+    if (not accepts_gzip() or response.direct_passthrough or response.status_code < 200
+            or response.status_code in (204, 206, 304) or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    compressed = gzip_body(response.get_data())
+    if compressed is not None:
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+
+# Nội dung đã dựng sẵn của một response có thể cache (kèm bản gzip và ETag theo nội dung + phiên bản)
+class CachedBody:
+
+    def __init__(self, body, version, mimetype):
+        self.body = body
+        self.gzipped = gzip_body(body) if GZIP_ENABLED else None
+        self.mimetype = mimetype
+        digest = hashlib.sha1(body).hexdigest()[:16]
+        self.etag = f'{version}-{digest}' if version else digest
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+# Cache các response chỉ phụ thuộc vào key (template, phiên bản mô hình, ...): mỗi key chỉ dựng một lần,
+# request lặp lại được trả 304 theo ETag/Last-Modified hoặc trả bản đã nén sẵn
+class ResponseCache:
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # Lấy nội dung theo key, dựng bằng build() nếu chưa có (các key cũ bị xóa khi cache đầy)
+    def get(self, key, version, build, mimetype='text/html'):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        body = build()
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        entry = CachedBody(body, version, mimetype)
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = entry
+            self.misses += 1
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Tạo response từ nội dung đã cache: ETag yếu (cùng cho bản nén và không nén), Last-Modified,
+# Cache-Control và trả 304 nếu client đã có bản mới nhất
+def cached_response(entry, max_age):
+    use_gzip = entry.gzipped is not None and accepts_gzip()
+    response = current_app.response_class(entry.gzipped if use_gzip else entry.body, mimetype=entry.mimetype)
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    if entry.gzipped is not None:
+        response.vary.add('Accept-Encoding')
+    response.set_etag(entry.etag, weak=True)
+    response.last_modified = entry.last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response.make_conditional(request)
+
+
+# Response HTML của template không phụ thuộc request, cache theo (template, version)
+def cached_page(cache, template, version, max_age, render=render_template):
+    entry = cache.get(('page', template, version), version, lambda: render(template))
+    return cached_response(entry, max_age)
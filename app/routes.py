@@ -1,26 +1,163 @@
-from flask import Blueprint, render_template, request, jsonify
-import sys
-from pathlib import Path
+from flask import Blueprint, render_template, request, jsonify, Response
+import os
+import threading
+import time
 
-# Add parent directory to path
-sys.path.append(str(Path(__file__).parent.parent))
-from src.model.predictor import SalaryPredictor
+from app.http_cache import ResponseCache, cached_page, cached_response
+from src.model.batcher import MicroBatcher
+from src.model.inference_pool import InferencePool, PoolBusyError
+from src.model.registry import ModelManager
+from src.utils.config import (API_BATCH_MAX_SIZE, MICRO_BATCH_ENABLED, INFERENCE_POOL_ENABLED, ADMIN_TOKEN,
+                              MODEL_WATCH_INTERVAL, PAGE_CACHE_MAX_AGE, MODEL_INFO_CACHE_MAX_AGE, SIMILAR_JOBS_K,
+                              SIMILAR_JOBS_MAX_K, STARTUP_RETRY_AFTER_S)
+from src.utils.metrics import METRICS, STAGE_LATENCY, Gauge
+from src.utils.startup import STARTUP
 
 # Tạo blueprint
 main = Blueprint('main', __name__)
 
-# Khởi tạo predictor (global)
-try:
-    predictor = SalaryPredictor()
-    print("Predictor loaded successfully in routes")
-except Exception as e:
-    print(f"Error loading predictor: {str(e)}")
-    predictor = None
+# Quản lý predictor đang phục vụ (global), hỗ trợ thay mô hình mới mà không cần restart.
+# Predictor được load khi create_app gọi start_model_loading (theo STARTUP_MODE), không phải lúc import
+model_manager = ModelManager()
+
+# Bắt đầu load predictor: 'background' (mặc định), 'lazy' hoặc 'eager'
+def start_model_loading(mode=None):
+    model_manager.start(mode)
+
+# Bộ gom request thành batch (tùy chọn, bật bằng MICRO_BATCH_ENABLED)
+batcher = MicroBatcher() if MICRO_BATCH_ENABLED else None
+
+# Pool dự đoán có giới hạn hàng đợi (tùy chọn, bật bằng INFERENCE_POOL_ENABLED)
+inference_pool = InferencePool() if INFERENCE_POOL_ENABLED else None
+
+# Chạy một tác vụ dự đoán trong pool nếu được bật (PoolBusyError khi quá tải)
+def _run_inference(fn, *args):
+    if inference_pool is not None:
+        return inference_pool.run(fn, *args)
+    return fn(*args)
+
+# Dự đoán kèm thông tin chi tiết, qua micro-batching nếu được bật
+def _predict_with_details(predictor, input_data):
+    if batcher is not None:
+        if inference_pool is not None:
+            # Batcher tự chạy mô hình, pool chỉ giới hạn số request đang chờ
+            return inference_pool.wait(inference_pool.attach(batcher.submit, predictor, input_data))
+        return batcher.predict_with_details(predictor, input_data)
+    return _run_inference(predictor.predict_with_details, input_data)
+
+# Chỉ mục tin tuyển dụng tương tự (src/model/similar_jobs.py): load bằng memory map ở lần dùng đầu tiên,
+# None nếu chưa được xây (python -m src.model.similar_jobs)
+similar_jobs_index = None
+_similar_jobs_lock = threading.Lock()
+
+def _get_similar_jobs_index():
+    global similar_jobs_index
+    if similar_jobs_index is None:
+        with _similar_jobs_lock:
+            if similar_jobs_index is None:
+                from src.model.similar_jobs import load_similar_jobs_index
+                similar_jobs_index = load_similar_jobs_index()
+    return similar_jobs_index
+
+# Top-k tin tương tự với input (mã hóa bằng FeatureBuilder của predictor), None nếu chưa có chỉ mục
+def _find_similar_jobs(predictor, input_data, k=SIMILAR_JOBS_K):
+    index = _get_similar_jobs_index()
+    if index is None:
+        return None
+    return index.similar_jobs(predictor.encode_input(input_data), predictor.features_list, k)
+
+# Response khi pool quá tải: 429/503 kèm header Retry-After
+def _busy_response(error):
+    response = jsonify({
+        'success': False,
+        'error': str(error),
+        'retry_after': error.retry_after
+    })
+    response.status_code = error.status_code
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+# Response khi predictor chưa có: 503 kèm Retry-After khi đang load (giống /health), 500 khi load lỗi
+def _not_ready_response():
+    if model_manager.state == 'failed':
+        return jsonify({
+            'success': False,
+            'error': 'Lỗi dữ đoán không thành công'
+        }), 500
+    response = jsonify({
+        'success': False,
+        'error': 'Hệ thống đang load mô hình, vui lòng thử lại sau',
+        'retry_after': STARTUP_RETRY_AFTER_S
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(STARTUP_RETRY_AFTER_S)
+    return response
+
+# Metrics của các route: số request (theo status), số lỗi và độ trễ
+REQUESTS_TOTAL = METRICS.counter('salary_http_requests_total', 'Số request theo route và status', ['route', 'status'])
+REQUEST_ERRORS = METRICS.counter('salary_http_request_errors_total', 'Số request lỗi (status >= 400) theo route', ['route'])
+REQUEST_LATENCY = METRICS.histogram('salary_http_request_duration_seconds', 'Thời gian xử lý request theo route', ['route'])
+VALIDATION_LATENCY = STAGE_LATENCY.labels('validation')
+RENDER_LATENCY = STAGE_LATENCY.labels('render')
+
+# Ghi thời điểm bắt đầu request
+@main.before_app_request
+def _start_timer():
+    request.environ['salary.request_started'] = time.perf_counter()
+
+# Các chuỗi metrics theo (route, status), lấy sẵn để mỗi request chỉ tra một dict
+_route_metrics = {}
+
+# Ghi số request, lỗi và độ trễ theo route (dùng rule của route để số labels có giới hạn)
+@main.after_app_request
+def _record_request(response):
+    current = request._get_current_object()
+    started = current.environ.get('salary.request_started')
+    if started is not None:
+        rule = current.url_rule
+        key = (rule.rule if rule is not None else 'unmatched', response.status_code)
+        children = _route_metrics.get(key)
+        if children is None:
+            children = _route_metrics[key] = (
+                REQUEST_LATENCY.labels(key[0]),
+                REQUESTS_TOTAL.labels(*key),
+                REQUEST_ERRORS.labels(key[0]) if key[1] >= 400 else None
+            )
+        children[0].observe(time.perf_counter() - started)
+        children[1].inc()
+        if children[2] is not None:
+            children[2].inc()
+    return response
+
+# Render template và ghi thời gian render
+def _render(template, **context):
+    started = time.perf_counter()
+    html = render_template(template, **context)
+    RENDER_LATENCY.observe(time.perf_counter() - started)
+    return html
+
+# Cache response của các trang tĩnh và thông tin mô hình (ETag gắn với phiên bản mô hình)
+response_cache = ResponseCache()
+
+# Nhãn phiên bản của mô hình đang phục vụ, dùng trong ETag (đổi khi mô hình được nạp lại).
+# Chỉ lấy từ phiên bản registry và phiên bản file mô hình để mọi worker trả cùng ETag
+def _model_tag(predictor=None):
+    predictor = predictor or model_manager.predictor
+    if predictor is None:
+        return 'none'
+    version = model_manager.version
+    if version is None or version == predictor.model_version:
+        return str(predictor.model_version)
+    return f"{version}.{predictor.model_version}"
+
+# Trang tĩnh: chỉ render lần đầu cho mỗi phiên bản mô hình, sau đó trả bản cache hoặc 304
+def _static_page(template):
+    return cached_page(response_cache, template, _model_tag(), PAGE_CACHE_MAX_AGE, render=_render)
 
 # Trang chủ
 @main.route('/')
 def index():
-    return render_template('index.html')
+    return _static_page('index.html')
 
 # Trang dự đoán lương
 @main.route('/predict', methods=['GET', 'POST'])
@@ -38,29 +175,61 @@ def predict():
             }
             
             # Validate input
-            if not all([input_data['job_title'], input_data['city'], 
-                       input_data['experience'], input_data['position_level']]):
-                return render_template('predict.html', 
-                                     error="Vui lòng điền đầy đủ thông tin bắt buộc!")
+            started = time.perf_counter()
+            valid = all([input_data['job_title'], input_data['city'],
+                         input_data['experience'], input_data['position_level']])
+            VALIDATION_LATENCY.observe(time.perf_counter() - started)
+            if not valid:
+                return _render('predict.html', 
+                             error="Vui lòng điền đầy đủ thông tin bắt buộc!")
             
             # Dự đoán
+            predictor = model_manager.get()
             if predictor is None:
-                return render_template('predict.html',
-                                     error="Hệ thống chưa sẵn sàng. Vui lòng thử lại sau!")
+                return _render('predict.html',
+                             error="Hệ thống chưa sẵn sàng. Vui lòng thử lại sau!")
             
-            result = predictor.predict_with_details(input_data)
+            result = _predict_with_details(predictor, input_data)
+            
+            # Các tin tuyển dụng tương tự (không làm hỏng trang kết quả nếu tìm lỗi)
+            try:
+                similar_jobs = _find_similar_jobs(predictor, input_data)
+            except Exception as e:
+                print(f"Error finding similar jobs: {str(e)}")
+                similar_jobs = None
             
             # Render kết quả
-            return render_template('results.html',
-                                 result=result,
-                                 input_data=input_data)
+            return _render('results.html',
+                         result=result,
+                         input_data=input_data,
+                         similar_jobs=similar_jobs)
+        
+        except PoolBusyError as e:
+            return _render('predict.html', error=str(e)), e.status_code, {'Retry-After': str(e.retry_after)}
         
         except Exception as e:
-            return render_template('predict.html',
-                                 error=f"Lỗi khi dự đoán: {str(e)}")
+            return _render('predict.html',
+                         error=f"Lỗi khi dự đoán: {str(e)}")
     
     # GET request - hiển thị form
-    return render_template('predict.html')
+    return _render('predict.html')
+
+# Các trường bắt buộc của API dự đoán
+API_REQUIRED_FIELDS = ['job_title', 'city', 'experience', 'position_level']
+
+# Kiểm tra dữ liệu JSON của một input, trả về thông báo lỗi hoặc None nếu hợp lệ
+def _validate_api_input(data):
+    if not data:
+        return 'Không có dữ liệu'
+    
+    if not isinstance(data, dict):
+        return 'Dữ liệu phải là một JSON object'
+    
+    missing_fields = [field for field in API_REQUIRED_FIELDS if field not in data]
+    if missing_fields:
+        return f'Thiếu dữ liệu bắc buộc: {", ".join(missing_fields)}'
+    
+    return None
 
 # API endpoint để dự đoán lương (JSON)
 @main.route('/api/predict', methods=['POST'])
@@ -69,31 +238,73 @@ def api_predict():
         # Lấy data từ request
         data = request.get_json()
         
-        if not data:
+        # Validate required fields
+        started = time.perf_counter()
+        error = _validate_api_input(data)
+        VALIDATION_LATENCY.observe(time.perf_counter() - started)
+        if error:
             return jsonify({
-                'error': 'Không có dữ liệu'
+                'error': error
             }), 400
         
-        # Validate required fields
-        required_fields = ['job_title', 'city', 'experience', 'position_level']
-        missing_fields = [field for field in required_fields if field not in data]
+        # Dự đoán
+        predictor = model_manager.get()
+        if predictor is None:
+            return _not_ready_response()
         
-        if missing_fields:
+        result = _predict_with_details(predictor, data)
+        
+        return jsonify({
+            'success': True,
+            'data': result
+        }), 200
+    
+    except PoolBusyError as e:
+        return _busy_response(e)
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# API tìm các tin tuyển dụng tương tự với input (cùng dạng JSON với /api/predict, thêm "k" tùy chọn)
+@main.route('/api/similar-jobs', methods=['POST'])
+def api_similar_jobs():
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not data:
             return jsonify({
-                'error': f'Thiếu dữ liệu bắc buộc: {", ".join(missing_fields)}'
+                'success': False,
+                'error': 'Dữ liệu phải là một JSON object'
             }), 400
         
-        # Dự đoán
-        if predictor is None:
+        k = data.get('k', SIMILAR_JOBS_K)
+        if isinstance(k, bool) or not isinstance(k, int) or not 1 <= k <= SIMILAR_JOBS_MAX_K:
             return jsonify({
-                'error': 'Lỗi dữ đoán không thành công'
-            }), 500
+                'success': False,
+                'error': f'k phải là số nguyên từ 1 đến {SIMILAR_JOBS_MAX_K}'
+            }), 400
         
-        result = predictor.predict_with_details(data)
+        predictor = model_manager.get()
+        if predictor is None:
+            return _not_ready_response()
+        
+        started = time.perf_counter()
+        jobs = _find_similar_jobs(predictor, data, k)
+        if jobs is None:
+            return jsonify({
+                'success': False,
+                'error': 'Chưa có chỉ mục tin tuyển dụng tương tự'
+            }), 503
         
         return jsonify({
             'success': True,
-            'data': result
+            'data': {
+                'k': k,
+                'jobs': jobs,
+                'took_ms': round((time.perf_counter() - started) * 1000, 3)
+            }
         }), 200
     
     except Exception as e:
@@ -102,21 +313,113 @@ def api_predict():
             'error': str(e)
         }), 500
 
-# API endpoint để lấy thông tin về mô hình
-@main.route('/api/model-info', methods=['GET'])
-def api_model_info():
+# Dự đoán các input hợp lệ của một batch, ghi kết quả vào results theo đúng vị trí
+def _predict_valid_items(predictor, items, valid_indices, results):
+    valid_items = [items[i] for i in valid_indices]
+    try:
+        details = predictor.predict_with_details_batch(valid_items)
+        for i, result in zip(valid_indices, details):
+            results[i] = {'index': i, 'success': True, 'data': result}
+    except Exception:
+        # Có input lỗi khi mã hóa: dự đoán lại từng input để xác định lỗi
+        for i in valid_indices:
+            try:
+                result = predictor.predict_with_details(items[i])
+                results[i] = {'index': i, 'success': True, 'data': result}
+            except Exception as e:
+                results[i] = {'index': i, 'success': False, 'error': str(e)}
 
+# API endpoint để dự đoán lương cho nhiều công việc cùng lúc (JSON)
+@main.route('/api/predict/batch', methods=['POST'])
+def api_predict_batch():
     try:
+        data = request.get_json()
+        
+        # Chấp nhận danh sách trực tiếp hoặc {"items": [...]}
+        items = data.get('items') if isinstance(data, dict) else data
+        
+        if not isinstance(items, list) or not items:
+            return jsonify({
+                'error': 'Cần một danh sách công việc không rỗng'
+            }), 400
+        
+        if len(items) > API_BATCH_MAX_SIZE:
+            return jsonify({
+                'error': f'Tối đa {API_BATCH_MAX_SIZE} công việc mỗi lần gọi'
+            }), 400
+        
+        predictor = model_manager.get()
         if predictor is None:
+            return _not_ready_response()
+        
+        # Validate từng input, chỉ dự đoán các input hợp lệ
+        started = time.perf_counter()
+        results = [None] * len(items)
+        valid_indices = []
+        for i, item in enumerate(items):
+            error = _validate_api_input(item)
+            if error:
+                results[i] = {'index': i, 'success': False, 'error': error}
+            else:
+                valid_indices.append(i)
+        VALIDATION_LATENCY.observe(time.perf_counter() - started)
+        
+        _run_inference(_predict_valid_items, predictor, items, valid_indices, results)
+        
+        n_success = sum(1 for r in results if r['success'])
+        
+        return jsonify({
+            'success': True,
+            'data': results,
+            'summary': {
+                'total': len(items),
+                'succeeded': n_success,
+                'failed': len(items) - n_success
+            }
+        }), 200
+    
+    except PoolBusyError as e:
+        return _busy_response(e)
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# Endpoint quản trị: load phiên bản mô hình mới (hoặc phiên bản chỉ định) và thay thế atomic
+@main.route('/admin/reload-model', methods=['POST'])
+def admin_reload_model():
+    if not ADMIN_TOKEN or request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+        return jsonify({
+            'error': 'Forbidden'
+        }), 403
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        version = data.get('version')
+        if version and version not in model_manager.registry.list_versions():
             return jsonify({
-                'error': 'Lỗi dữ đoán không thành công'
-            }), 500
+                'success': False,
+                'error': f'Không tìm thấy phiên bản mô hình: {version}'
+            }), 404
+        
+        # Load và warm up phiên bản mới trước; chỉ ghi ACTIVE khi thành công để watcher,
+        # worker mới và lần khởi động sau không bị trỏ tới một phiên bản load lỗi
+        status = model_manager.reload(version)
+        if version:
+            model_manager.registry.activate(version)
+            status = model_manager.status()
         
-        info = predictor.get_model_info()
+        # Reload chỉ áp dụng cho worker nhận request; các worker khác đổi theo ACTIVE qua watcher
+        status['reloaded_pid'] = os.getpid()
+        if MODEL_WATCH_INTERVAL <= 0:
+            status['note'] = ('Chỉ worker này được reload; đặt SALARY_MODEL_WATCH_INTERVAL > 0 để các worker '
+                              'khác tự đổi theo ACTIVE, hoặc restart server')
         
         return jsonify({
             'success': True,
-            'data': info
+            'data': status
         }), 200
     
     except Exception as e:
@@ -125,22 +428,128 @@ def api_model_info():
             'error': str(e)
         }), 500
 
+# API endpoint để lấy thông tin về mô hình
+@main.route('/api/model-info', methods=['GET'])
+def api_model_info():
+
+    try:
+        predictor = model_manager.get()
+        if predictor is None:
+            return _not_ready_response()
+        
+        # Số liệu runtime (cache, bộ nhớ, batching, pool) thay đổi liên tục nên chỉ trả khi ?stats=1, không cache
+        if request.args.get('stats') == '1':
+            info = predictor.get_model_info()
+            info['active_version'] = model_manager.version
+            info['memory'] = predictor.get_memory_report()
+            if batcher is not None:
+                info['micro_batching'] = batcher.stats()
+            if inference_pool is not None:
+                info['inference_pool'] = inference_pool.stats()
+            return jsonify({
+                'success': True,
+                'data': info
+            }), 200
+
+        # Thông tin tĩnh của mô hình chỉ đổi khi nạp phiên bản mới: dựng một lần, trả kèm ETag
+        tag = _model_tag(predictor)
+
+        def build():
+            info = predictor.get_model_info()
+            # Số liệu của riêng process (cache, thời gian load) chỉ có ở ?stats=1 để mọi worker cho cùng ETag
+            info.pop('cache', None)
+            info.pop('load_seconds', None)
+            info['active_version'] = model_manager.version
+            return jsonify({'success': True, 'data': info}).get_data()
+
+        entry = response_cache.get(('model-info', tag), tag, build, mimetype='application/json')
+        return cached_response(entry, MODEL_INFO_CACHE_MAX_AGE)
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 #  Trang giới thiệu
 @main.route('/about')
 def about():
-    return render_template('about.html')
+    return _static_page('about.html')
 
 # Trang tài liệu
 @main.route('/documentation')
 def documentation():
-    return render_template('documentation.html')
+    return _static_page('documentation.html')
 
 
-#  Health check cho deployment
+#  Health check cho deployment: 200 khi predictor sẵn sàng, 503 khi đang load, 500 khi load lỗi
 @main.route('/health')
 def health():
+    predictor = model_manager.predictor
     status = 'healthy' if predictor is not None else 'unhealthy'
-    return jsonify({
+    body = {
         'status': status,
-        'predictor_loaded': predictor is not None
-    }), 200 if predictor else 500
\ No newline at end of file
+        'state': model_manager.state,
+        'predictor_loaded': predictor is not None,
+        'model_version': model_manager.version
+    }
+    if inference_pool is not None:
+        body['queue_depth'] = inference_pool.queue_depth
+    if predictor is not None:
+        return jsonify(body), 200
+    if model_manager.state == 'failed':
+        return jsonify(body), 500
+    response = jsonify(body)
+    response.status_code = 503
+    response.headers['Retry-After'] = str(STARTUP_RETRY_AFTER_S)
+    return response
+
+# Liveness: process còn phục vụ request (không phụ thuộc predictor, không bao giờ load mô hình)
+@main.route('/health/live')
+def health_live():
+    return jsonify({'status': 'alive', 'uptime_s': STARTUP.to_dict()['uptime_s']}), 200
+
+# Readiness: chỉ nhận traffic khi predictor đã load xong; kèm báo cáo thời gian khởi động.
+# Ở chế độ lazy chưa load thì vẫn ready (request dự đoán đầu tiên sẽ load)
+@main.route('/health/ready')
+def health_ready():
+    state = model_manager.state
+    ready = state == 'ready' or (model_manager.lazy and state == 'idle')
+    body = {
+        'ready': ready,
+        'state': state,
+        'model_version': model_manager.version,
+        'startup': STARTUP.to_dict()
+    }
+    if model_manager.error:
+        body['error'] = model_manager.error
+    return jsonify(body), 200 if ready else 503
+
+# Số liệu được đọc lúc scrape: cache dự đoán, pool dự đoán và micro-batching
+def _collect_serving_metrics():
+    metrics = []
+    predictor = model_manager.predictor
+    stats = predictor.get_cache_stats() if predictor is not None else {'enabled': False}
+    if stats['enabled']:
+        for key in ['hits', 'misses', 'evictions', 'invalidations', 'size']:
+            gauge = Gauge(f'salary_prediction_cache_{key}', f'Cache dự đoán: {key}')
+            gauge.set(stats[key])
+            metrics.append(gauge)
+    if inference_pool is not None:
+        for key, value in inference_pool.stats().items():
+            gauge = Gauge(f'salary_inference_pool_{key}', f'Pool dự đoán: {key}')
+            gauge.set(value)
+            metrics.append(gauge)
+    if batcher is not None:
+        for key in ['batches', 'items', 'queue_depth']:
+            gauge = Gauge(f'salary_micro_batch_{key}', f'Micro-batching: {key}')
+            gauge.set(batcher.stats()[key])
+            metrics.append(gauge)
+    return metrics
+
+METRICS.register_collector(_collect_serving_metrics)
+
+# Metrics theo định dạng text của Prometheus
+@main.route('/metrics')
+def metrics():
+    return Response(METRICS.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
@@ -1,20 +1,34 @@
+import argparse
+
 from app import create_app
-from src.utils.config import FLASK_HOST, FLASK_PORT, FLASK_DEBUG
+from src.utils.config import FLASK_HOST, FLASK_PORT, FLASK_DEBUG, SERVER_THREADS
 
 # Tạo Flask app
 app = create_app()
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Chạy web app dự đoán lương')
+    parser.add_argument('--server', choices=['flask', 'waitress'], default='flask',
+                        help='flask: server phát triển; waitress: WSGI production nhiều luồng')
+    parser.add_argument('--threads', type=int, default=SERVER_THREADS,
+                        help='Số luồng nhận request của waitress')
+    args = parser.parse_args()
+
     print("="*70)
     print("STARTING SALARY PREDICTION WEB APPLICATION")
     print("="*70)
     print(f"Server running at: http://{FLASK_HOST}:{FLASK_PORT}")
-    print(f"Debug mode: {FLASK_DEBUG}")
+    print(f"Server: {args.server}")
+    print(f"Debug mode: {FLASK_DEBUG and args.server == 'flask'}")
     print("="*70)
     print("\nNhấn CTRL+C để dừng server\n")
-    
-    app.run(
-        host=FLASK_HOST,
-        port=FLASK_PORT,
-        debug=FLASK_DEBUG
-    )
\ No newline at end of file
+
+    if args.server == 'waitress':
+        from waitress import serve
+        serve(app, host=FLASK_HOST, port=FLASK_PORT, threads=args.threads)
+    else:
+        app.run(
+            host=FLASK_HOST,
+            port=FLASK_PORT,
+            debug=FLASK_DEBUG
+        )
@@ -0,0 +1,293 @@
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.ensemble import RandomForestRegressor
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+from src.utils.config import (
+    NUMERICAL_FEATURES, EXPERIENCE_MAPPING, POSITION_ORDER,
+    BENCHMARK_BASELINE_FILE, BENCHMARK_RESULTS_FILE, BENCHMARK_REGRESSION_THRESHOLD, BENCHMARK_DATA_SIZES
+)
+
+SKILLS = ['python', 'sql', 'excel', 'java', 'giao tiếp', 'tiếng anh', 'kế toán', 'bán hàng', 'marketing', 'photoshop']
+FIELDS = ['it', 'kinh doanh', 'kế toán/kiểm toán', 'marketing', 'nhân sự', 'xây dựng', 'giáo dục', 'ngân hàng']
+CITIES = ['Hồ Chí Minh', 'Hà Nội', 'Đà Nẵng', 'Bình Dương', 'Đồng Nai', 'Hải Phòng', 'Long An', 'Bắc Ninh']
+BATCH_SIZE = 100
+
+
+# Danh sách features của mô hình thay thế (cùng dạng tên cột với features thật)
+def synthetic_features():
+    return (
+        list(NUMERICAL_FEATURES)
+        + [f'has_skill_{s.replace(" ", "_")}' for s in SKILLS]
+        + [f'field_{f.replace(" ", "_").replace("/", "_")}' for f in FIELDS]
+        + [f'city_{c.lower().replace(" ", "_")}' for c in CITIES]
+    )
+
+
+# Sinh bảng features + lương tổng hợp (cố định theo seed)
+def synthetic_featured_frame(n, seed=42):
+    rng = np.random.default_rng(seed)
+    features = synthetic_features()
+    df = pd.DataFrame(0.0, index=range(n), columns=features)
+    df['experience_years'] = rng.choice(list(EXPERIENCE_MAPPING.values()), size=n)
+    df['position_level_encoded'] = rng.integers(0, len(POSITION_ORDER), size=n)
+    for col in features[len(NUMERICAL_FEATURES):]:
+        df[col] = (rng.random(n) < 0.2).astype(int)
+    df['skills_count'] = df[[c for c in features if c.startswith('has_skill_')]].sum(axis=1)
+    df['fields_count'] = df[[c for c in features if c.startswith('field_')]].sum(axis=1)
+    df['exp_position_interaction'] = df['experience_years'] * df['position_level_encoded']
+    df['skills_exp_interaction'] = df['skills_count'] * df['experience_years']
+    df['salary_avg_vnd'] = (
+        6 + 1.5 * df['experience_years'] + 2.0 * df['position_level_encoded']
+        + 0.8 * df['skills_count'] + rng.normal(0, 1.5, size=n)
+    )
+    return df
+
+
+# Sinh input giống dữ liệu người dùng gửi lên API
+def synthetic_inputs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    experiences = list(EXPERIENCE_MAPPING)
+    return [{
+        'job_title': 'Data Analyst',
+        'city': str(rng.choice(CITIES)),
+        'experience': str(rng.choice(experiences)),
+        'position_level': str(rng.choice(POSITION_ORDER)),
+        'skills': ', '.join(s.title() for s in rng.choice(SKILLS, size=rng.integers(0, 5), replace=False)),
+        'job_fields': ', '.join(rng.choice(FIELDS, size=rng.integers(0, 3), replace=False)),
+    } for _ in range(n)]
+
+
+# Train mô hình nhỏ thay thế và lưu artifacts vào thư mục tạm, trả về SalaryPredictor (tắt cache)
+def build_predictor(workdir):
+    from src.model.predictor import SalaryPredictor
+
+    df = synthetic_featured_frame(2000)
+    features = synthetic_features()
+    model = RandomForestRegressor(n_estimators=50, max_depth=12, random_state=42, n_jobs=1)
+    model.fit(df[features], df['salary_avg_vnd'])
+
+    joblib.dump(model, workdir / 'best_model.pkl')
+    with open(workdir / 'features_list.json', 'w') as f:
+        json.dump(features, f)
+    with open(workdir / 'model_info.json', 'w') as f:
+        json.dump({'model_type': 'RandomForestRegressor', 'test_mae': 1.2, 'test_r2': 0.9}, f)
+    return SalaryPredictor.from_directory(workdir, cache_size=0)
+
+
+# Đo thời gian mỗi lần gọi fn: tăng số lần gọi đến khi một lượt đo đủ min_time, lấy trung vị các lượt
+def measure(fn, repeat=5, min_time=0.1):
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    per_call = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        per_call.append((time.perf_counter() - start) / number)
+    return {
+        'median_us': round(statistics.median(per_call) * 1e6, 3),
+        'min_us': round(min(per_call) * 1e6, 3),
+        'number': number,
+        'repeat': repeat
+    }
+
+
+# Các benchmark của SalaryPredictor
+def predictor_benchmarks(predictor, repeat, min_time):
+    single = synthetic_inputs(1, seed=1)[0]
+    batch = synthetic_inputs(BATCH_SIZE, seed=2)
+    return {
+        'predictor.preprocess_input': measure(lambda: predictor.preprocess_input(single), repeat, min_time),
+        'predictor.predict': measure(lambda: predictor.predict(single), repeat, min_time),
+        f'predictor.predict_batch[{BATCH_SIZE}]': measure(lambda: predictor.predict_batch(batch), repeat, min_time),
+        'predictor.predict_with_details': measure(lambda: predictor.predict_with_details(single), repeat, min_time),
+    }
+
+
+# Các benchmark của API qua Flask test client
+def api_benchmarks(predictor, repeat, min_time):
+    import app.routes as routes
+    from app import create_app
+    from src.model.registry import ModelManager
+
+    routes.model_manager = ModelManager(predictor=predictor, version='benchmark')
+    flask_app = create_app()
+    flask_app.config['TESTING'] = True
+    client = flask_app.test_client()
+    single = synthetic_inputs(1, seed=3)[0]
+
+    # Kiểm tra request thành công trước khi đo
+    for response in [client.post('/api/predict', json=single), client.post('/predict', data=single)]:
+        if response.status_code != 200:
+            raise RuntimeError(f"Request lỗi {response.status_code}: {response.get_data(as_text=True)[:200]}")
+
+    return {
+        'api./api/predict': measure(lambda: client.post('/api/predict', json=single), repeat, min_time),
+        'api./predict': measure(lambda: client.post('/predict', data=single), repeat, min_time),
+    }
+
+
+# Các benchmark của DataLoader: load bảng features với nhiều kích thước, không cache và có cache
+def data_loader_benchmarks(workdir, sizes, repeat, min_time):
+    from src.data.data_loader import DataLoader
+
+    results = {}
+    for n in sizes:
+        path = workdir / f'featured_{n}.csv'
+        synthetic_featured_frame(n, seed=n).to_csv(path, index=False)
+        for use_cache in [False, True]:
+            loader = DataLoader(optimize_dtypes=True, use_cache=use_cache)
+            name = f'data_loader.load_featured_data[{n}{",cached" if use_cache else ""}]'
+            # DataLoader in thông tin mỗi lần load, bỏ qua khi đo
+            with redirect_stdout(io.StringIO()):
+                loader.load_featured_data(path)  # tạo cache trước khi đo
+                results[name] = measure(lambda: loader.load_featured_data(path), repeat, min_time)
+    return results
+
+
+# Chạy toàn bộ benchmark (quick: ít lượt đo hơn, chỉ kích thước dữ liệu nhỏ nhất)
+def run_benchmarks(quick=False, sizes=None):
+    repeat, min_time = (3, 0.02) if quick else (5, 0.1)
+    sizes = sizes or (BENCHMARK_DATA_SIZES[:1] if quick else BENCHMARK_DATA_SIZES)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        predictor = build_predictor(workdir)
+        results.update(predictor_benchmarks(predictor, repeat, min_time))
+        results.update(api_benchmarks(predictor, repeat, min_time))
+        results.update(data_loader_benchmarks(workdir, sizes, repeat, min_time))
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'sklearn': sklearn.__version__,
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'quick': quick
+        },
+        'results': results
+    }
+
+
+# So sánh với baseline, trả về các benchmark chậm hơn baseline quá threshold (tỷ lệ, 0.25 = 25%)
+def find_regressions(report, baseline, threshold=BENCHMARK_REGRESSION_THRESHOLD):
+    regressions = []
+    for name, result in report['results'].items():
+        reference = baseline.get('results', {}).get(name)
+        if reference is None:
+            continue
+        ratio = result['median_us'] / reference['median_us']
+        if ratio > 1 + threshold:
+            regressions.append({
+                'name': name,
+                'baseline_us': reference['median_us'],
+                'current_us': result['median_us'],
+                'ratio': round(ratio, 3)
+            })
+    return regressions
+
+
+# Ghi JSON (tạo thư mục nếu chưa có)
+def save_report(report, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+# Đọc baseline (None nếu chưa có)
+def load_baseline(path):
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# In bảng kết quả, kèm tỷ lệ so với baseline nếu có
+def print_report(report, baseline=None):
+    rows = []
+    for name, result in report['results'].items():
+        reference = (baseline or {}).get('results', {}).get(name)
+        rows.append({
+            'benchmark': name,
+            'median_us': result['median_us'],
+            'min_us': result['min_us'],
+            'vs_baseline': f"{result['median_us'] / reference['median_us']:.2f}x" if reference else '-'
+        })
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark hiệu năng predictor, API và DataLoader')
+    parser.add_argument('--output', default=str(BENCHMARK_RESULTS_FILE), help='File JSON lưu kết quả')
+    parser.add_argument('--baseline', default=str(BENCHMARK_BASELINE_FILE), help='File JSON baseline để so sánh')
+    parser.add_argument('--threshold', type=float, default=BENCHMARK_REGRESSION_THRESHOLD,
+                        help='Tỷ lệ chậm hơn baseline tối đa cho phép (0.25 = 25%%)')
+    parser.add_argument('--update-baseline', action='store_true', help='Ghi kết quả lần chạy này làm baseline')
+    parser.add_argument('--quick', action='store_true', help='Chạy nhanh (ít lượt đo, dữ liệu nhỏ)')
+    args = parser.parse_args()
+
+    print("="*70)
+    print("PERFORMANCE BENCHMARKS")
+    print("="*70)
+
+    report = run_benchmarks(quick=args.quick)
+    baseline = load_baseline(args.baseline)
+    save_report(report, args.output)
+
+    print()
+    print_report(report, baseline)
+    print(f"\nResults saved to: {args.output}")
+
+    if args.update_baseline:
+        save_report(report, args.baseline)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print(f"No baseline at {args.baseline} (chạy với --update-baseline để tạo)")
+        return 0
+
+    regressions = find_regressions(report, baseline, args.threshold)
+    if regressions:
+        print(f"\n✗ {len(regressions)} benchmark chậm hơn baseline quá {args.threshold:.0%}:")
+        for item in regressions:
+            print(f"   {item['name']}: {item['baseline_us']:.1f}us -> {item['current_us']:.1f}us ({item['ratio']:.2f}x)")
+        return 1
+
+    print(f"\n✓ Không có benchmark nào chậm hơn baseline quá {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
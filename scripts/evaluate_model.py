@@ -0,0 +1,364 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.model_selection import KFold, train_test_split
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+from src.utils.config import (
+    BEST_MODEL_PATH, FEATURES_LIST_PATH, FEATURED_DATA_FILE, TEST_SIZE, RANDOM_STATE, TRAIN_N_JOBS,
+    EVALUATION_CV_FOLDS, EVALUATION_LEARNING_CURVE_POINTS, EVALUATION_LEARNING_CURVE_FOLDS,
+    EVALUATION_SALARY_BINS, EVALUATION_SALARY_LABELS, EVALUATION_TOP_CITIES, EVALUATION_ERROR_THRESHOLDS,
+    EVALUATION_CACHE_DIR, EVALUATION_RESULTS_PATH, TEST_PREDICTIONS_FILE
+)
+from src.data.data_cache import file_sha256
+from src.data.data_loader import load_cached_csv, load_feature_matrix
+from scripts.train_model import TARGET, StageTimer, allocate_cores
+
+SEGMENT_COLUMNS = ['position_level', 'city']
+METRIC_COLUMNS = ['count', 'mae', 'rmse', 'r2', 'mape', 'mae_pct']
+
+
+# Các metrics (count, MAE, RMSE, R², MAPE, MAE % lương trung bình) của mọi nhóm trong mọi chiều phân tích
+# chỉ bằng một lần groupby: segments là {tên chiều: nhãn nhóm của từng hàng}, nhãn None/NaN bị bỏ qua.
+# Chỉ cộng các tổng rồi suy ra metrics, R² dùng y đã trừ trung bình để tổng bình phương không mất chính xác
+def segment_metrics(y_true, y_pred, segments):
+    y_true = np.asarray(y_true, dtype=np.float64)
+    error = np.asarray(y_pred, dtype=np.float64) - y_true
+    centered = y_true - y_true.mean()
+    abs_error = np.abs(error)
+    sums = pd.DataFrame({
+        'count': np.ones(len(y_true)),
+        'y': y_true,
+        'centered': centered,
+        'centered_sq': centered ** 2,
+        'abs_error': abs_error,
+        'sq_error': error ** 2,
+        'pct_error': abs_error / np.maximum(np.abs(y_true), np.finfo(np.float64).eps) * 100
+    })
+    stacked = pd.concat([
+        sums.assign(dimension=name, segment=np.asarray(labels, dtype=object))
+        for name, labels in segments.items()
+    ], ignore_index=True)
+    sums = stacked.groupby(['dimension', 'segment'], sort=False).sum()
+
+    count = sums['count']
+    ss_total = sums['centered_sq'] - sums['centered'] ** 2 / count
+    with np.errstate(divide='ignore', invalid='ignore'):
+        metrics = pd.DataFrame({
+            'count': count.astype(int),
+            'mae': sums['abs_error'] / count,
+            'rmse': np.sqrt(sums['sq_error'] / count),
+            'r2': (1 - sums['sq_error'] / ss_total).where(ss_total > 0),
+            'mape': sums['pct_error'] / count,
+            'mae_pct': sums['abs_error'] / sums['y'] * 100
+        })
+    return {name: metrics.xs(name, level='dimension') for name in segments if name in metrics.index.levels[0]}
+
+
+# Metrics trên toàn bộ tập
+def overall_metrics(y_true, y_pred):
+    row = segment_metrics(y_true, y_pred, {'all': np.zeros(len(y_true))})['all'].iloc[0]
+    return {name: (int(row[name]) if name == 'count' else float(row[name])) for name in METRIC_COLUMNS}
+
+
+# Số dự đoán có sai số phần trăm dưới từng ngưỡng và thống kê sai số như notebook 06
+def error_analysis(y_true, y_pred, thresholds=EVALUATION_ERROR_THRESHOLDS):
+    y_true = np.asarray(y_true, dtype=np.float64)
+    errors = y_true - np.asarray(y_pred, dtype=np.float64)
+    pct_errors = np.abs(errors) / np.maximum(np.abs(y_true), np.finfo(np.float64).eps) * 100
+    analysis = {
+        'mean_error': float(errors.mean()),
+        'median_error': float(np.median(errors)),
+        'max_abs_error': float(np.abs(errors).max())
+    }
+    for threshold in thresholds:
+        analysis[f'samples_under_{threshold}pct_error'] = int((pct_errors < threshold).sum())
+    return analysis
+
+
+# Nhãn nhóm của các hàng: khoảng lương theo y, cấp bậc và top thành phố từ các cột gốc (nếu file có)
+def segment_labels(data_path, rows, y, top_cities=EVALUATION_TOP_CITIES):
+    segments = {
+        'salary_range': pd.cut(y, EVALUATION_SALARY_BINS, right=False, labels=EVALUATION_SALARY_LABELS).astype(object)
+    }
+    columns = pd.read_csv(data_path, nrows=0, encoding='utf-8-sig').columns
+    present = [col for col in SEGMENT_COLUMNS if col in columns]
+    if not present:
+        return segments
+
+    df = load_cached_csv(data_path, columns=present)
+    if 'position_level' in df:
+        segments['position_level'] = df['position_level'].to_numpy(dtype=object)[rows]
+    if 'city' in df:
+        # Chỉ giữ top thành phố nhiều tin nhất trên toàn bộ dữ liệu, các thành phố khác không tính
+        top = df['city'].value_counts().head(top_cities).index
+        city = df['city'].where(df['city'].isin(top)).to_numpy(dtype=object)
+        segments['city'] = city[rows]
+    return segments
+
+
+# Khóa cache dự đoán: đổi dữ liệu, features, tham số mô hình hoặc cách chia thì fit lại
+def cache_key(data_path, features, estimator, test_size, random_state):
+    params = {k: v for k, v in estimator.get_params().items() if k not in ('n_jobs', 'verbose')}
+    payload = json.dumps([file_sha256(data_path), features, TARGET, type(estimator).__name__, params,
+                          test_size, random_state], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+# Các lần fit cần cho CV (k fold) và learning curve (kích thước x fold, lấy phần đầu tập train của fold
+# như sklearn.model_selection.learning_curve). Mỗi lần fit là (tên, hàng fit, [các tập hàng cần dự đoán])
+def fit_tasks(train_rows, cv, curve_points=0, curve_folds=EVALUATION_LEARNING_CURVE_FOLDS):
+    tasks = []
+    for i, (fit, val) in enumerate(KFold(n_splits=cv).split(train_rows)):
+        tasks.append((f'cv{cv}-{i}', train_rows[fit], [train_rows[val]]))
+
+    if curve_points:
+        splits = list(KFold(n_splits=curve_folds).split(train_rows))
+        n_max = min(len(fit) for fit, _ in splits)
+        sizes = np.unique((np.linspace(0.1, 1.0, curve_points) * n_max).astype(int))
+        for size in sizes[sizes > 0]:
+            for i, (fit, val) in enumerate(splits):
+                fit_rows = train_rows[fit[:size]]
+                tasks.append((f'curve{curve_folds}-{size}-{i}', fit_rows, [fit_rows, train_rows[val]]))
+    return tasks
+
+
+# Fit một bản sao của mô hình trên các hàng của ma trận memory map và dự đoán các tập hàng khác
+def _fit_predict(estimator, X, y, fit_rows, predict_rows):
+    model = clone(estimator).fit(X[fit_rows], y[fit_rows])
+    return [model.predict(X[rows]) for rows in predict_rows]
+
+
+def _save_predictions(path, predictions):
+    tmp = path.with_name(f'.{path.name}.tmp-{os.getpid()}')
+    with open(tmp, 'wb') as f:
+        np.savez(f, *predictions)
+    os.replace(tmp, path)
+
+
+# Chạy các lần fit chưa có trong cache song song (mỗi worker đọc chung X qua memory map), lưu dự đoán
+# của từng lần fit thành file riêng để lần chạy sau, hoặc khi thêm metrics mới, không cần fit lại
+def run_fits(estimator, X, y, tasks, cache_dir, n_jobs=TRAIN_N_JOBS):
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    missing = [task for task in tasks if not (cache_dir / f'{task[0]}.npz').exists()]
+    search_jobs, forest_jobs = allocate_cores(len(missing), n_jobs)
+
+    if missing:
+        print(f"   {len(missing)} fits ({len(tasks) - len(missing)} cached), "
+              f"{search_jobs} parallel fits x {forest_jobs} cores per forest")
+        if 'n_jobs' in estimator.get_params():
+            estimator = clone(estimator).set_params(n_jobs=forest_jobs)
+        results = Parallel(n_jobs=search_jobs)(
+            delayed(_fit_predict)(estimator, X, y, fit_rows, predict_rows)
+            for _, fit_rows, predict_rows in missing
+        )
+        for (name, _, _), predictions in zip(missing, results):
+            _save_predictions(cache_dir / f'{name}.npz', predictions)
+    else:
+        print(f"   All {len(tasks)} fits cached")
+
+    predictions = {}
+    for name, _, _ in tasks:
+        with np.load(cache_dir / f'{name}.npz') as data:
+            predictions[name] = [data[f'arr_{i}'] for i in range(len(data.files))]
+    fit_info = {'total': len(tasks), 'cached': len(tasks) - len(missing),
+                'n_jobs': search_jobs, 'forest_n_jobs': forest_jobs}
+    return predictions, fit_info
+
+
+# Metrics CV từ dự đoán out-of-fold: metrics của từng fold tính trong một lần groupby theo fold
+def cross_validation_metrics(y, tasks, predictions, cv):
+    rows, preds, folds = [], [], []
+    for i in range(cv):
+        name, _, (val_rows,) = tasks[i]
+        rows.append(val_rows)
+        preds.append(predictions[name][0])
+        folds.append(np.full(len(val_rows), i))
+    rows, preds, folds = np.concatenate(rows), np.concatenate(preds), np.concatenate(folds)
+
+    per_fold = segment_metrics(y[rows], preds, {'fold': folds})['fold']
+    return {
+        'folds': cv,
+        'mean_mae': float(per_fold['mae'].mean()),
+        'std_mae': float(np.std(per_fold['mae'])),
+        'mean_r2': float(per_fold['r2'].mean()),
+        'std_r2': float(np.std(per_fold['r2'])),
+        'per_fold': _records(per_fold.rename_axis('fold')),
+        'out_of_fold': overall_metrics(y[rows], preds)
+    }
+
+
+# Learning curve (MAE train và validation trung bình qua các fold) từ dự đoán đã cache
+def learning_curve_metrics(y, tasks, predictions):
+    records = []
+    for name, fit_rows, predict_rows in tasks:
+        if not name.startswith('curve'):
+            continue
+        val_rows = predict_rows[1]
+        train_pred, val_pred = predictions[name]
+        records.append({
+            'train_size': len(fit_rows),
+            'train_mae': float(np.mean(np.abs(y[fit_rows] - train_pred))),
+            'val_mae': float(np.mean(np.abs(y[val_rows] - val_pred)))
+        })
+    if not records:
+        return []
+    curve = pd.DataFrame(records).groupby('train_size').agg(
+        train_mae=('train_mae', 'mean'), train_mae_std=('train_mae', lambda s: np.std(s)),
+        val_mae=('val_mae', 'mean'), val_mae_std=('val_mae', lambda s: np.std(s))
+    )
+    return curve.reset_index().to_dict('records')
+
+
+# Khoảng lương theo thứ tự khoảng, các chiều khác theo số lượng giảm dần
+def _order_segments(name, frame):
+    if name == 'salary_range':
+        return frame.reindex([label for label in EVALUATION_SALARY_LABELS if label in frame.index])
+    return frame.sort_values('count', ascending=False, kind='stable')
+
+
+def _records(frame):
+    frame = frame.reset_index().astype({'count': int})
+    return json.loads(frame.to_json(orient='records', force_ascii=False, double_precision=15))
+
+
+# Đánh giá mô hình đã train: metrics trên tập test, metrics theo nhóm (khoảng lương, cấp bậc, thành phố),
+# cross-validation k fold và learning curve từ cùng một bộ fit, lưu evaluation_results.json
+def evaluate_model(model_path=None, features_path=None, data_path=None, output_path=None,
+                   predictions_path=None, cv=EVALUATION_CV_FOLDS, curve_points=EVALUATION_LEARNING_CURVE_POINTS,
+                   n_jobs=TRAIN_N_JOBS, cache_dir=None, test_size=TEST_SIZE, random_state=RANDOM_STATE):
+    data_path = Path(data_path or FEATURED_DATA_FILE)
+    output_path = Path(output_path or EVALUATION_RESULTS_PATH)
+    cache_root = Path(cache_dir or EVALUATION_CACHE_DIR)
+    timer = StageTimer()
+
+    with timer.stage('load_data'):
+        model = joblib.load(model_path or BEST_MODEL_PATH)
+        with open(features_path or FEATURES_LIST_PATH, 'r') as f:
+            features = json.load(f)
+        # X là memory map, các worker fit song song đọc chung file thay vì nhận bản copy
+        X, y = load_feature_matrix(features, data_path, TARGET)
+        rows = np.flatnonzero(~(np.isnan(X).any(axis=1) | np.isnan(y)))
+        train_rows, test_rows = train_test_split(rows, test_size=test_size, random_state=random_state)
+        print(f"   Train set: {len(train_rows):,} samples, test set: {len(test_rows):,} samples, "
+              f"{len(features)} features")
+
+    with timer.stage('test'):
+        y_test = y[test_rows]
+        X_test = X[test_rows]
+        if hasattr(model, 'feature_names_in_'):
+            X_test = pd.DataFrame(X_test, columns=features)
+        y_pred = model.predict(X_test)
+        segments = segment_labels(data_path, test_rows, y_test)
+        results = {
+            'model_type': type(model).__name__,
+            'n_features': len(features),
+            'n_train_samples': int(len(train_rows)),
+            'n_test_samples': int(len(test_rows)),
+            'test_metrics': overall_metrics(y_test, y_pred),
+            'segments': {name: _records(_order_segments(name, frame))
+                         for name, frame in segment_metrics(y_test, y_pred, segments).items()},
+            'error_analysis': error_analysis(y_test, y_pred)
+        }
+
+    with timer.stage('fits'):
+        key = cache_key(data_path, features, model, test_size, random_state)
+        # Chỉ giữ cache của mô hình và dữ liệu hiện tại
+        if cache_root.exists():
+            for old in cache_root.iterdir():
+                if old.is_dir() and old.name != key:
+                    shutil.rmtree(old, ignore_errors=True)
+        tasks = fit_tasks(train_rows, cv, curve_points)
+        predictions, results['fits'] = run_fits(model, X, y, tasks, cache_root / key, n_jobs)
+
+    with timer.stage('cross_validation'):
+        results['cross_validation'] = cross_validation_metrics(y, tasks, predictions, cv)
+        results['learning_curve'] = learning_curve_metrics(y, tasks, predictions)
+
+    results['timings'] = timer.timings
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\nSaved evaluation results to: {output_path}")
+
+    if predictions_path is not False:
+        errors = y_test - y_pred
+        pd.DataFrame({
+            'actual': y_test,
+            'predicted': y_pred,
+            'error': errors,
+            'abs_error': np.abs(errors),
+            'pct_error': np.abs(errors) / y_test * 100
+        }, index=pd.Index(test_rows, name='row')).to_csv(predictions_path or TEST_PREDICTIONS_FILE)
+    return results
+
+
+# In các bảng kết quả
+def print_results(results):
+    test = results['test_metrics']
+    print(f"\nTest set: MAE {test['mae']:,.0f} | RMSE {test['rmse']:,.0f} | R² {test['r2']:.4f} | "
+          f"MAPE {test['mape']:.2f}%")
+
+    cv = results['cross_validation']
+    print(f"Cross-validation (k={cv['folds']}): MAE {cv['mean_mae']:,.0f} (±{cv['std_mae']:,.0f}) | "
+          f"R² {cv['mean_r2']:.4f} (±{cv['std_r2']:.4f})")
+
+    for name, records in results['segments'].items():
+        print(f"\nMAE by {name}:")
+        print(pd.DataFrame(records).to_string(index=False, float_format=lambda v: f'{v:,.4g}'))
+
+    print("\nError analysis:")
+    n_test = results['n_test_samples']
+    for key, value in results['error_analysis'].items():
+        share = f" ({value / n_test:.1%})" if key.startswith('samples_') else ''
+        print(f"   {key:28s} {value:,.0f}{share}")
+
+    if results['learning_curve']:
+        print("\nLearning curve:")
+        print(pd.DataFrame(results['learning_curve']).to_string(index=False, float_format=lambda v: f'{v:,.4g}'))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Đánh giá mô hình dự đoán lương (thay cho notebook 06)')
+    parser.add_argument('--model', default=str(BEST_MODEL_PATH), help='File mô hình (joblib)')
+    parser.add_argument('--features', default=str(FEATURES_LIST_PATH), help='File features_list.json')
+    parser.add_argument('--data', default=str(FEATURED_DATA_FILE), help='File featured_data.csv')
+    parser.add_argument('--output', default=str(EVALUATION_RESULTS_PATH))
+    parser.add_argument('--predictions', default=str(TEST_PREDICTIONS_FILE), help='File CSV dự đoán trên tập test')
+    parser.add_argument('--cv', type=int, default=EVALUATION_CV_FOLDS)
+    parser.add_argument('--learning-curve', type=int, default=EVALUATION_LEARNING_CURVE_POINTS,
+                        help='Số điểm learning curve (0: bỏ qua)')
+    parser.add_argument('--n-jobs', type=int, default=TRAIN_N_JOBS)
+    parser.add_argument('--cache-dir', default=str(EVALUATION_CACHE_DIR))
+    parser.add_argument('--no-cache', action='store_true', help='Xóa cache dự đoán và fit lại')
+    args = parser.parse_args()
+
+    print("="*70)
+    print("Evaluating salary model")
+    print("="*70)
+
+    if args.no_cache:
+        shutil.rmtree(args.cache_dir, ignore_errors=True)
+
+    results = evaluate_model(args.model, args.features, args.data, args.output, args.predictions, args.cv,
+                             args.learning_curve, args.n_jobs, args.cache_dir)
+    print_results(results)
+
+    print("\nTimings:")
+    for stage, seconds in results['timings'].items():
+        print(f"   {stage:18s} {seconds:8.2f}s")
+
+    print("\n" + "="*70)
+    print("Evaluation completed!")
+    print("="*70)
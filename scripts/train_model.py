@@ -0,0 +1,310 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import (
+    GridSearchCV, HalvingGridSearchCV, HalvingRandomSearchCV, KFold, ParameterGrid,
+    RandomizedSearchCV
+)
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+from src.utils.config import (
+    FEATURED_DATA_FILE, MODELS_DIR, TRAIN_CACHE_DIR, NUMERICAL_FEATURES, TEST_SIZE, VALIDATION_SIZE,
+    RANDOM_STATE, RF_PARAM_GRID, SEARCH_CV_FOLDS, HALVING_FACTOR, TRAIN_N_JOBS, PREDICTION_INTERVAL_ALPHA
+)
+from src.data.data_cache import file_sha256
+from src.data.data_loader import load_feature_matrix
+from src.features.feature_builder import FeatureBuilder
+from src.model.intervals import TreeQuantileInterval
+from src.model.model_bundle import export_model_bundle
+from src.model.regression import compact_forest, save_compact_model, split_rows
+from src.model.tree_engine import FlatTreeEnsemble
+
+TARGET = 'salary_avg_vnd'
+SEARCH_METHODS = ['halving', 'random', 'grid']
+
+
+# Ghi lại thời gian chạy của từng bước
+class StageTimer:
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name):
+        print(f"\n{name}...")
+        start = time.perf_counter()
+        yield
+        self.timings[name] = round(time.perf_counter() - start, 3)
+        print(f"   Done in {self.timings[name]:.2f}s")
+
+
+# Danh sách features theo thứ tự notebook 05: features số, skills, fields, cities
+def model_features(data_path):
+    columns = pd.read_csv(data_path, nrows=0, encoding='utf-8-sig').columns.tolist()
+    features = [col for col in NUMERICAL_FEATURES if col in columns]
+    for prefix in ('has_skill_', 'field_', 'city_'):
+        features += [col for col in columns if col.startswith(prefix)]
+    return features
+
+
+# Chia train/validation/test (bỏ dòng thiếu giá trị như notebook) và các fold CV của tập train, lưu thành
+# file .npy trong cache. Validation dùng để hiệu chỉnh khoảng dự đoán và thu gọn forest. Lần sau dùng lại nếu file dữ liệu và tham số chia không đổi; các mảng được load bằng memory map
+# nên worker của search đọc chung dữ liệu từ file thay vì nhận bản copy qua pickle
+def prepare_split(data_path, features, cv=SEARCH_CV_FOLDS, test_size=TEST_SIZE, validation_size=VALIDATION_SIZE,
+                  random_state=RANDOM_STATE, cache_dir=None):
+    cache_dir = Path(cache_dir or TRAIN_CACHE_DIR)
+    payload = json.dumps([file_sha256(data_path), features, TARGET, cv, test_size, validation_size, random_state])
+    key = hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+    split_dir = cache_dir / key
+    cached = (split_dir / 'folds.npy').exists()
+
+    if not cached:
+        X, y = load_feature_matrix(features, data_path, TARGET)
+        rows = np.flatnonzero(~(np.isnan(X).any(axis=1) | np.isnan(y)))
+        if len(rows) < len(y):
+            print(f"   Dropped {len(y) - len(rows):,} rows with missing values")
+        train_rows, val_rows, test_rows = split_rows(rows, test_size, validation_size, random_state)
+
+        # Fold của mỗi dòng train (KFold không xáo trộn, giống cv=3 của GridSearchCV)
+        folds = np.empty(len(train_rows), dtype=np.int8)
+        for i, (_, fold_rows) in enumerate(KFold(n_splits=cv).split(train_rows)):
+            folds[fold_rows] = i
+
+        tmp_dir = cache_dir / f'.{key}.tmp-{os.getpid()}'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+        np.save(tmp_dir / 'X_train.npy', np.ascontiguousarray(X[train_rows]))
+        np.save(tmp_dir / 'y_train.npy', y[train_rows])
+        np.save(tmp_dir / 'X_val.npy', np.ascontiguousarray(X[val_rows]))
+        np.save(tmp_dir / 'y_val.npy', y[val_rows])
+        np.save(tmp_dir / 'X_test.npy', np.ascontiguousarray(X[test_rows]))
+        np.save(tmp_dir / 'y_test.npy', y[test_rows])
+        np.save(tmp_dir / 'folds.npy', folds)
+        shutil.rmtree(split_dir, ignore_errors=True)
+        os.replace(tmp_dir, split_dir)
+
+        # Chỉ giữ cache của lần chia mới nhất
+        for old in cache_dir.iterdir():
+            if old.is_dir() and old.name != key and not old.name.startswith('.'):
+                shutil.rmtree(old, ignore_errors=True)
+
+    split = {name: np.load(split_dir / f'{name}.npy', mmap_mode='r')
+             for name in ('X_train', 'y_train', 'X_val', 'y_val', 'X_test', 'y_test')}
+    folds = np.load(split_dir / 'folds.npy')
+    split['cv'] = [(np.flatnonzero(folds != i), np.flatnonzero(folds == i)) for i in range(cv)]
+    split['cached'] = cached
+    return split
+
+
+# Chia số core giữa search và RandomForest: ưu tiên chạy song song các lần fit (ứng viên x fold)
+# vì chúng độc lập, số core còn dư mới chia cho n_jobs của mỗi forest (tránh lồng n_jobs=-1)
+def allocate_cores(n_tasks, n_jobs=TRAIN_N_JOBS):
+    n_cores = joblib.cpu_count() if n_jobs is None or n_jobs < 0 else n_jobs
+    search_jobs = max(1, min(n_cores, n_tasks))
+    return search_jobs, max(1, n_cores // search_jobs)
+
+
+# Tạo đối tượng search: 'halving' (successive halving theo số mẫu), 'random' (budget ứng viên ngẫu nhiên)
+# hoặc 'grid' (toàn bộ lưới như notebook). Trả về search và số lần fit ở vòng đầu tiên
+def build_search(method, param_grid, cv, budget=None, factor=HALVING_FACTOR, random_state=RANDOM_STATE):
+    if method not in SEARCH_METHODS:
+        raise ValueError(f"Invalid search method: {method}")
+
+    estimator = RandomForestRegressor(random_state=random_state)
+    n_combinations = len(ParameterGrid(param_grid))
+    n_candidates = n_combinations if budget is None else min(budget, n_combinations)
+    common = {'cv': cv, 'scoring': 'neg_mean_absolute_error', 'refit': False}
+
+    if method == 'grid':
+        search = GridSearchCV(estimator, param_grid, **common)
+    elif method == 'random':
+        search = RandomizedSearchCV(estimator, param_grid, n_iter=n_candidates, random_state=random_state, **common)
+    elif n_candidates == n_combinations:
+        search = HalvingGridSearchCV(estimator, param_grid, factor=factor, random_state=random_state, **common)
+    else:
+        search = HalvingRandomSearchCV(estimator, param_grid, n_candidates=n_candidates, factor=factor,
+                                       random_state=random_state, **common)
+    return search, n_candidates * len(cv)
+
+
+# Hiệu chỉnh conformal cho khoảng dự đoán theo phân vị các cây: hiệu chỉnh trên tập validation,
+# đo tỉ lệ phủ trên tập test (mô hình không thấy cả hai tập lúc train)
+def calibrate_interval(model, X_val, y_val, X_test, y_test, alpha=PREDICTION_INTERVAL_ALPHA):
+    engine = FlatTreeEnsemble.from_model(model)
+    y_val = np.asarray(y_val, dtype=np.float64)
+    y_test = np.asarray(y_test, dtype=np.float64)
+    test_values = engine.tree_predictions(X_test)
+
+    interval = TreeQuantileInterval.calibrate(engine.tree_predictions(X_val), y_val, alpha)
+    return {
+        **interval.to_dict(),
+        'n_calibration': int(len(y_val)),
+        'holdout': interval.evaluate(test_values, y_test),
+        'holdout_uncalibrated': TreeQuantileInterval(alpha).evaluate(test_values, y_test)
+    }
+
+
+# Ghi file qua file tạm rồi đổi tên (server đang theo dõi thư mục không đọc phải file ghi dở)
+def _atomic_write(path, write):
+    tmp = path.with_name(f'.{path.name}.tmp-{os.getpid()}')
+    write(tmp)
+    os.replace(tmp, path)
+
+
+# Huấn luyện RandomForest với search có giới hạn và lưu artifacts (best_model.pkl, features_list.json,
+# model_info.json, feature_encoder.pkl và bundle) vào output_dir
+def train_model(data_path=None, output_dir=None, search='halving', budget=None, factor=HALVING_FACTOR,
+                cv=SEARCH_CV_FOLDS, n_jobs=TRAIN_N_JOBS, param_grid=None, cache_dir=None, export_bundle=True,
+                compact=False):
+    data_path = Path(data_path or FEATURED_DATA_FILE)
+    output_dir = Path(output_dir or MODELS_DIR)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    param_grid = param_grid or RF_PARAM_GRID
+    timer = StageTimer()
+
+    with timer.stage('load_data'):
+        features = model_features(data_path)
+        split = prepare_split(data_path, features, cv, cache_dir=cache_dir)
+        X_train, y_train = split['X_train'], split['y_train']
+        print(f"   Train set: {X_train.shape[0]:,} samples, validation set: {split['X_val'].shape[0]:,} samples, "
+              f"test set: {split['X_test'].shape[0]:,} samples, "
+              f"{len(features)} features ({'cached split' if split['cached'] else 'new split'})")
+
+    with timer.stage('search'):
+        searcher, n_tasks = build_search(search, param_grid, split['cv'], budget, factor)
+        search_jobs, forest_jobs = allocate_cores(n_tasks, n_jobs)
+        searcher.set_params(n_jobs=search_jobs, estimator__n_jobs=forest_jobs)
+        print(f"   {type(searcher).__name__}: {n_tasks} fits in the first round, "
+              f"{search_jobs} parallel fits x {forest_jobs} cores per forest")
+        searcher.fit(X_train, y_train)
+        best_params = searcher.best_params_
+        print(f"   Best parameters: {best_params}")
+        print(f"   Best CV MAE: {-searcher.best_score_:,.2f}tr VND")
+
+    with timer.stage('refit'):
+        # Lần fit cuối chỉ có một mô hình nên dùng toàn bộ core cho forest
+        n_cores = search_jobs * forest_jobs
+        model = RandomForestRegressor(random_state=RANDOM_STATE, n_jobs=n_cores, **best_params)
+        model.fit(X_train, y_train)
+        model.set_params(n_jobs=-1)
+
+    with timer.stage('evaluate'):
+        y_test = split['y_test']
+        y_pred = model.predict(split['X_test'])
+        test_mae = mean_absolute_error(y_test, y_pred)
+        test_rmse = np.sqrt(mean_squared_error(y_test, y_pred))
+        test_r2 = r2_score(y_test, y_pred)
+        print(f"   Test MAE:  {test_mae:,.2f}tr VND")
+        print(f"   Test RMSE: {test_rmse:,.2f}tr VND")
+        print(f"   Test R²:   {test_r2:.4f}")
+        interval = calibrate_interval(model, split['X_val'], split['y_val'], split['X_test'], y_test)
+        print(f"   Interval {1 - interval['alpha']:.0%}: coverage {interval['holdout']['coverage']:.1%} "
+              f"(uncalibrated {interval['holdout_uncalibrated']['coverage']:.1%}), "
+              f"conformal correction {interval['correction']:,.2f}tr VND")
+
+    with timer.stage('save'):
+        model_path = output_dir / 'best_model.pkl'
+        _atomic_write(model_path, lambda path: joblib.dump(model, path))
+        _atomic_write(output_dir / 'feature_encoder.pkl',
+                      lambda path: joblib.dump(FeatureBuilder.from_feature_names(features), path))
+
+        def write_json(data):
+            def write(path):
+                with open(path, 'w') as f:
+                    json.dump(data, f, indent=2)
+            return write
+
+        _atomic_write(output_dir / 'features_list.json', write_json(features))
+        if export_bundle:
+            export_model_bundle(model_path, output_dir / 'best_model_bundle', features)
+
+    # Thu gọn forest thành bundle riêng (compact_model_bundle) theo tập validation, mô hình đầy đủ vẫn
+    # được giữ nguyên; MAE của forest thu gọn trên tập test chỉ để báo cáo
+    compaction = None
+    if compact:
+        with timer.stage('compact'):
+            engine, report = compact_forest(model, split['X_val'], split['y_val'], split['X_train'])
+            save_compact_model(engine, report, model_path, output_dir / 'compact_model_bundle', features)
+            compaction = {k: report[k] for k in ('mae_budget', 'original', 'chosen')}
+            compaction['test_mae'] = float(np.abs(engine.predict(split['X_test']) - y_test).mean())
+            print(f"   Compact test MAE: {compaction['test_mae']:,.2f}tr VND (full forest {test_mae:,.2f}tr VND)")
+
+    model_info = {
+        'model_type': 'RandomForestRegressor',
+        'best_params': best_params,
+        'test_mae': float(test_mae),
+        'test_rmse': float(test_rmse),
+        'test_r2': float(test_r2),
+        'prediction_interval': interval,
+        'n_features': len(features),
+        'n_train_samples': int(X_train.shape[0]),
+        'n_validation_samples': int(split['X_val'].shape[0]),
+        'n_test_samples': int(split['X_test'].shape[0]),
+        'search': {
+            'method': search,
+            'class': type(searcher).__name__,
+            'n_candidates': int(len(searcher.cv_results_['params'])),
+            'n_iterations': int(getattr(searcher, 'n_iterations_', 1)),
+            'best_cv_mae': float(-searcher.best_score_),
+            'cv_folds': cv,
+            'search_n_jobs': search_jobs,
+            'forest_n_jobs': forest_jobs,
+            'split_cached': split['cached']
+        },
+        'timings': timer.timings
+    }
+    if compaction is not None:
+        model_info['compaction'] = compaction
+    _atomic_write(output_dir / 'model_info.json', write_json(model_info))
+    print(f"\nSaved model artifacts to: {output_dir}")
+    return model_info
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Huấn luyện mô hình dự đoán lương')
+    parser.add_argument('--data', default=str(FEATURED_DATA_FILE), help='File featured_data.csv')
+    parser.add_argument('--output-dir', default=str(MODELS_DIR))
+    parser.add_argument('--search', choices=SEARCH_METHODS, default='halving')
+    parser.add_argument('--budget', type=int, help='Số ứng viên tối đa (mặc định: toàn bộ lưới)')
+    parser.add_argument('--factor', type=int, default=HALVING_FACTOR)
+    parser.add_argument('--cv', type=int, default=SEARCH_CV_FOLDS)
+    parser.add_argument('--n-jobs', type=int, default=TRAIN_N_JOBS)
+    parser.add_argument('--cache-dir', default=str(TRAIN_CACHE_DIR))
+    parser.add_argument('--no-bundle', action='store_true', help='Không xuất bundle memory map')
+    parser.add_argument('--compact', action='store_true', help='Thu gọn forest thành compact_model_bundle')
+    parser.add_argument('--publish', action='store_true', help='Đưa mô hình mới vào registry và kích hoạt')
+    args = parser.parse_args()
+
+    print("="*70)
+    print("Training salary model")
+    print("="*70)
+
+    info = train_model(args.data, args.output_dir, args.search, args.budget, args.factor, args.cv,
+                       args.n_jobs, cache_dir=args.cache_dir, export_bundle=not args.no_bundle,
+                       compact=args.compact)
+
+    print("\nTimings:")
+    for stage, seconds in info['timings'].items():
+        print(f"   {stage:10s} {seconds:8.2f}s")
+
+    if args.publish:
+        from src.model.registry import ModelRegistry
+        ModelRegistry().publish(args.output_dir)
+
+    print("\n" + "="*70)
+    print("Training completed!")
+    print("="*70)
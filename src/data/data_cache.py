@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CACHE_FORMAT_VERSION = 1
+
+
+# Thư mục cache nằm cạnh file CSV: featured_data.csv -> featured_data.csv.cache/
+def cache_dir_for(csv_path):
+    csv_path = Path(csv_path)
+    return csv_path.with_name(f'{csv_path.name}.cache')
+
+
+# SHA-256 của nội dung file (đọc theo từng block)
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Thông tin nhận diện file nguồn: kích thước, thời gian sửa và hash nội dung
+def source_fingerprint(path, with_hash=True):
+    stat = os.stat(path)
+    fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if with_hash:
+        fingerprint['sha256'] = file_sha256(path)
+    return fingerprint
+
+
+# Đọc meta.json của cache (None nếu chưa có hoặc khác phiên bản format)
+def _read_meta(cache_dir):
+    try:
+        with open(cache_dir / 'meta.json', 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if meta.get('format_version') != CACHE_FORMAT_VERSION:
+        return None
+    return meta
+
+
+# Ghi meta.json (ghi file tạm rồi đổi tên)
+def _write_meta(cache_dir, meta):
+    tmp = cache_dir / f'.meta.json.tmp-{os.getpid()}'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, cache_dir / 'meta.json')
+
+
+# Kiểm tra cache còn khớp với file CSV: cùng kích thước và mtime thì dùng luôn,
+# mtime khác (copy, touch) thì so sánh hash nội dung trước khi coi là cũ
+def _is_fresh(meta, csv_path, cache_dir, schema=None):
+    if schema is not None and meta.get('schema') != schema:
+        return False
+
+    source = meta['source']
+    stat = os.stat(csv_path)
+    if stat.st_size != source['size']:
+        return False
+    if stat.st_mtime_ns == source['mtime_ns']:
+        return True
+    if file_sha256(csv_path) != source['sha256']:
+        return False
+
+    meta['source']['mtime_ns'] = stat.st_mtime_ns
+    _write_meta(cache_dir, meta)
+    return True
+
+
+# Ghi DataFrame thành cache dạng cột: cột số -> .npy (memory map được), cột khác -> pickle
+def write_cache(csv_path, df, schema=None):
+    csv_path = Path(csv_path)
+    cache_dir = cache_dir_for(csv_path)
+    fingerprint = source_fingerprint(csv_path)
+
+    tmp_dir = cache_dir.with_name(f'{cache_dir.name}.tmp-{os.getpid()}')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    columns = []
+    for i, col in enumerate(df.columns):
+        values = df[col]
+        if isinstance(values.dtype, np.dtype) and values.dtype.kind in 'biuf':
+            filename = f'{i:04d}.npy'
+            np.save(tmp_dir / filename, values.to_numpy())
+        else:
+            filename = f'{i:04d}.pkl'
+            values.to_pickle(tmp_dir / filename)
+        columns.append({'name': col, 'file': filename})
+
+    _write_meta(tmp_dir, {
+        'format_version': CACHE_FORMAT_VERSION,
+        'source': {'path': str(csv_path), **fingerprint},
+        'schema': schema,
+        'n_rows': len(df),
+        'columns': columns
+    })
+
+    old_dir = cache_dir.with_name(f'{cache_dir.name}.old-{os.getpid()}')
+    if cache_dir.exists():
+        os.replace(cache_dir, old_dir)
+    os.replace(tmp_dir, cache_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return cache_dir
+
+
+# Đọc DataFrame từ cache (chỉ đọc file của các cột cần thiết); None nếu chưa có cache hoặc cache đã cũ
+def read_cache(csv_path, columns=None, schema=None):
+    cache_dir = cache_dir_for(csv_path)
+    meta = _read_meta(cache_dir)
+    if meta is None or not _is_fresh(meta, csv_path, cache_dir, schema):
+        return None
+
+    files = {entry['name']: entry['file'] for entry in meta['columns']}
+    if columns is None:
+        columns = list(files)
+    missing = [col for col in columns if col not in files]
+    if missing:
+        raise ValueError(f"Không tìm thấy các cột: {', '.join(missing)}")
+
+    data = {}
+    for col in columns:
+        path = cache_dir / files[col]
+        if path.suffix == '.npy':
+            data[col] = np.load(path)
+        else:
+            data[col] = pd.read_pickle(path)
+    return pd.DataFrame(data, index=pd.RangeIndex(meta['n_rows']))
+
+
+# Ma trận features float32 (n, k) lưu trong cache và trả về dạng memory map (không copy)
+def cached_matrix(csv_path, features, build_frame, mmap_mode='r'):
+    cache_dir = cache_dir_for(csv_path)
+    key = hashlib.sha1(json.dumps(list(features), ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+    path = cache_dir / f'matrix-{key}.npy'
+
+    if not path.exists():
+        matrix = np.ascontiguousarray(build_frame(list(features)).to_numpy(dtype=np.float32))
+        tmp = cache_dir / f'.matrix-{key}.tmp-{os.getpid()}.npy'
+        np.save(tmp, matrix)
+        os.replace(tmp, path)
+
+    return np.load(path, mmap_mode=mmap_mode)
+
+
+# Xóa cache của một file CSV
+def clear_cache(csv_path):
+    shutil.rmtree(cache_dir_for(csv_path), ignore_errors=True)
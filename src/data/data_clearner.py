@@ -0,0 +1,209 @@
+import re
+import time
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.utils.config import (
+    RAW_DATA_FILE, CLEANED_DATA_FILE, PROCESSED_DATA_DIR, IQR_FACTOR, CATEGORICAL_COLUMNS,
+    CLEANING_TEXT_COLUMNS, CLEANING_FILL_VALUES, ESSENTIAL_COLUMNS, VALID_SALARY_UNITS,
+    EXPERIENCE_CLEANING_MAPPING, POSITION_CLEANING_MAPPING, CITY_CLEANING_MAPPING
+)
+from src.data.data_loader import DataLoader
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# Bước chuẩn hóa riêng của từng cột, áp dụng sau khi đã bỏ khoảng trắng thừa (giống notebook 02)
+COLUMN_NORMALIZERS = {
+    'city': lambda value: CITY_CLEANING_MAPPING.get(value.title(), value.title()),
+    'unit': str.upper,
+    'experience': lambda value: EXPERIENCE_CLEANING_MAPPING.get(value.lower(), value.lower()),
+    'position_level': lambda value: POSITION_CLEANING_MAPPING.get(value.lower(), value.lower()),
+    'skills': lambda value: value.lstrip(', ').strip(),
+    'job_fields': lambda value: value.lstrip(', ').strip()
+}
+
+
+# Hàm chuẩn hóa đầy đủ cho một giá trị của cột: điền giá trị thiếu, bỏ khoảng trắng thừa, mapping
+def column_transform(column):
+    fill_value = CLEANING_FILL_VALUES.get(column)
+    normalizer = COLUMN_NORMALIZERS.get(column)
+
+    def transform(value):
+        if fill_value is not None and pd.isna(value):
+            value = fill_value
+        value = WHITESPACE_PATTERN.sub(' ', str(value).strip())
+        return normalizer(value) if normalizer is not None else value
+
+    return transform
+
+
+# Áp dụng transform cho từng giá trị unique của cột rồi ánh xạ lại theo mã (mỗi giá trị chỉ xử lý một lần)
+def remap_unique(values, transform, categorical=False):
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    transformed = np.array([transform(value) for value in np.asarray(uniques, dtype=object)], dtype=object)
+    if categorical:
+        new_codes, categories = pd.factorize(transformed)
+        return pd.Categorical.from_codes(new_codes[codes], categories)
+    return transformed[codes]
+
+
+# Chuyển mảng giá trị sang kiểu category (categories theo thứ tự xuất hiện, giống remap_unique)
+def to_categorical(values):
+    codes, categories = pd.factorize(values)
+    return pd.Categorical.from_codes(codes, categories)
+
+
+# Pipeline làm sạch dữ liệu (notebook 02): các bước lọc dòng chỉ cập nhật một mask chung,
+# dữ liệu chỉ được copy một lần ở cuối cho các dòng được giữ lại
+class DataCleaner:
+
+    def __init__(self, iqr_factor=IQR_FACTOR, verbose=True):
+        self.iqr_factor = iqr_factor
+        self.verbose = verbose
+        self.report = []
+        self.summary = {}
+
+    # Cập nhật mask và ghi lại số dòng bị loại ở mỗi bước
+    def _apply_filter(self, stage, mask, keep):
+        rows_before = int(mask.sum())
+        mask &= keep
+        rows_after = int(mask.sum())
+        self.report.append({
+            'stage': stage,
+            'rows_before': rows_before,
+            'rows_after': rows_after,
+            'rows_dropped': rows_before - rows_after
+        })
+        if self.verbose:
+            print(f"   {stage}: dropped {rows_before - rows_after:,} rows ({rows_after:,} remaining)")
+
+    # Điều kiện giữ dòng theo IQR, tính trên các dòng còn lại sau các bước trước
+    def _iqr_keep(self, column, values, mask):
+        kept = pd.Series(values[mask])
+        q1 = kept.quantile(0.25)
+        q3 = kept.quantile(0.75)
+        iqr = q3 - q1
+        lower_bound = q1 - self.iqr_factor * iqr
+        upper_bound = q3 + self.iqr_factor * iqr
+        if self.verbose:
+            print(f"   {column}: Q1={q1:,.0f}, Q3={q3:,.0f}, bounds=[{lower_bound:,.0f}, {upper_bound:,.0f}]")
+        return (values >= lower_bound) & (values <= upper_bound)
+
+    # Các điều kiện lọc chỉ phụ thuộc vào từng dòng (unit đã chuẩn hóa, salary_min/max gốc)
+    def row_checks(self, df, unit, salary_min, salary_max):
+        return {
+            'missing_essential': df[ESSENTIAL_COLUMNS].notna().all(axis=1).to_numpy(),
+            'invalid_unit': np.isin(unit, VALID_SALARY_UNITS),
+            # Điều kiện lương > 0 không đổi khi hoán đổi min/max nên có thể lọc trước khi hoán đổi
+            'non_positive_salary': (salary_min > 0) & (salary_max > 0)
+        }
+
+    # Mask các dòng được giữ lại: áp dụng các điều kiện theo dòng và lọc IQR theo đúng thứ tự notebook
+    def filter_mask(self, checks, salary_min, salary_max):
+        self.report = []
+        mask = np.ones(len(salary_min), dtype=bool)
+        self._apply_filter('missing_essential', mask, checks['missing_essential'])
+        self._apply_filter('invalid_unit', mask, checks['invalid_unit'])
+        self._apply_filter('salary_min_outliers', mask, self._iqr_keep('salary_min', salary_min, mask))
+        self._apply_filter('salary_max_outliers', mask, self._iqr_keep('salary_max', salary_max, mask))
+        self._apply_filter('non_positive_salary', mask, checks['non_positive_salary'])
+        return mask
+
+    # Làm sạch DataFrame dữ liệu gốc, trả về DataFrame mới (không sửa df đầu vào)
+    def clean(self, df):
+        start = time.perf_counter()
+        salary_min = df['salary_min'].to_numpy(dtype=np.float64)
+        salary_max = df['salary_max'].to_numpy(dtype=np.float64)
+
+        # Lọc dòng
+        unit = remap_unique(df['unit'], column_transform('unit'))
+        mask = self.filter_mask(self.row_checks(df, unit, salary_min, salary_max), salary_min, salary_max)
+
+        # Hoán đổi salary_min > salary_max
+        salary_min, salary_max = salary_min[mask], salary_max[mask]
+        swap = salary_min > salary_max
+        salary_min[swap], salary_max[swap] = salary_max[swap], salary_min[swap]
+
+        # Chuẩn hóa các cột văn bản trên các dòng được giữ lại
+        cleaned = {}
+        for col in df.columns:
+            if col == 'salary_min':
+                cleaned[col] = salary_min
+            elif col == 'salary_max':
+                cleaned[col] = salary_max
+            elif col in CLEANING_TEXT_COLUMNS:
+                cleaned[col] = remap_unique(df[col].to_numpy()[mask], column_transform(col),
+                                            categorical=col in CATEGORICAL_COLUMNS)
+            else:
+                cleaned[col] = df[col].to_numpy()[mask]
+
+        result = pd.DataFrame(cleaned)
+        self.summary = {
+            'rows_original': len(df),
+            'rows_cleaned': len(result),
+            'rows_dropped': len(df) - len(result),
+            'salary_swapped': int(swap.sum()),
+            'missing_before': int(df.isnull().sum().sum()),
+            'missing_after': int(result.isnull().sum().sum()),
+            'elapsed_seconds': time.perf_counter() - start
+        }
+        if self.verbose:
+            print(f"Cleaned data: {len(df):,} -> {len(result):,} rows in {self.summary['elapsed_seconds']:.2f}s")
+        return result
+
+    # Báo cáo số dòng bị loại ở từng bước
+    def get_report(self):
+        return pd.DataFrame(self.report, columns=['stage', 'rows_before', 'rows_after', 'rows_dropped'])
+
+    # Lưu báo cáo làm sạch (cùng định dạng 'Chỉ số', 'Giá trị' với notebook 02, thêm số dòng loại theo từng bước)
+    def save_report(self, filepath):
+        summary = self.summary
+        items = {
+            'Số dòng ban đầu': summary['rows_original'],
+            'Số dòng sau làm sạch': summary['rows_cleaned'],
+            'Số dòng đã xóa': summary['rows_dropped'],
+            'Phần trăm giữ lại': f"{summary['rows_cleaned'] / summary['rows_original'] * 100:.2f}%",
+            'Số giá trị thiếu ban đầu': summary['missing_before'],
+            'Số giá trị thiếu sau xử lý': summary['missing_after'],
+        }
+        for stage in self.report:
+            items[f"Số dòng đã xóa ({stage['stage']})"] = stage['rows_dropped']
+
+        report_df = pd.DataFrame(list(items.items()), columns=['Chỉ số', 'Giá trị'])
+        report_df.to_csv(filepath, index=False, encoding='utf-8-sig')
+
+
+# Hàm tiện ích: load dữ liệu gốc, làm sạch và lưu cleaned_data.csv
+def clean_data(input_path=None, output_path=None, report_path=None):
+    loader = DataLoader()
+    df = loader.load_raw_data(input_path)
+    if df is None:
+        return None
+
+    cleaner = DataCleaner()
+    cleaned = cleaner.clean(df)
+    loader.save_data(cleaned, output_path or CLEANED_DATA_FILE)
+    cleaner.save_report(report_path or PROCESSED_DATA_DIR / 'cleaning_report.csv')
+    return cleaned
+
+
+if __name__ == '__main__':
+    # Làm sạch dữ liệu gốc
+    print("="*70)
+    print("Cleaning raw data")
+    print("="*70)
+
+    cleaned = clean_data(RAW_DATA_FILE, CLEANED_DATA_FILE)
+
+    if cleaned is not None:
+        print("\nCategorical columns:")
+        for col in ['city', 'position_level', 'experience', 'unit']:
+            print(f"   {col}: {cleaned[col].nunique()} unique values")
+
+    print("\n" + "="*70)
+    print("Data cleaning completed!")
+    print("="*70)
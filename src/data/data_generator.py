@@ -0,0 +1,299 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.utils.config import (
+    SYNTHETIC_DATA_FILE, SYNTHETIC_CHUNK_SIZE, SYNTHETIC_DIRTY_RATE, SYNTHETIC_DUPLICATE_RATE,
+    EXCHANGE_RATE, EXPERIENCE_MAPPING, POSITION_ORDER,
+    EXPERIENCE_CLEANING_MAPPING, POSITION_CLEANING_MAPPING, CITY_CLEANING_MAPPING
+)
+
+RAW_COLUMNS = ['job_title', 'job_type', 'position_level', 'city', 'experience', 'skills',
+               'job_fields', 'salary', 'salary_min', 'salary_max', 'unit']
+
+# Phân phối các giá trị theo dữ liệu thật (notebook 01), phần còn lại chia đều cho các biến thể trong config
+JOB_TYPE_WEIGHTS = {
+    'full-time': 43.5, 'nhân viên chính thức': 33.8, 'toàn thời gian cố định': 16.6,
+    'toàn thời gian': 1.8, 'part-time': 1.3, 'full-time , part-time': 1.1, 'thực tập': 0.6,
+    'khác': 0.3, 'bán thời gian': 0.2, 'toàn thời gian tạm thời': 0.2, 'remote': 0.6
+}
+POSITION_WEIGHTS = {
+    'nhân viên, chuyên viên': 40.2, 'nhân viên': 28.6, 'chuyên viên, nhân viên': 15.2,
+    'trưởng nhóm, trưởng phòng': 4.2, 'trưởng nhóm , giám sát': 3.3, 'quản lý': 3.0,
+    'quản lý nhóm, giám sát': 1.1, 'sinh viên, thực tập sinh': 0.8, 'thực tập sinh': 0.7,
+    'quản lý cấp trung': 0.6
+}
+EXPERIENCE_WEIGHTS = {
+    'không yêu cầu': 42.2, '1 - 2 năm': 8.4, 'trên 1 năm': 8.2, 'trên 2 năm': 4.9,
+    '1 - 3 năm': 3.7, '2 - 3 năm': 3.5, '3 - 5 năm': 3.4, '2 - 5 năm': 3.4,
+    'dưới 1 năm': 3.4, '1 - 5 năm': 2.6
+}
+CITY_WEIGHTS = {
+    'hà nội': 30.7, 'hồ chí minh': 30.4, 'bình dương': 4.4, 'đồng nai': 2.7, 'hải phòng': 2.0,
+    'long an': 1.9, 'đà nẵng': 1.6, 'hưng yên': 1.3, 'bắc ninh': 1.2, 'tây ninh': 0.8,
+    'cần thơ': 0.7, 'bắc giang': 0.6, 'hải dương': 0.6, 'vĩnh phúc': 0.6, 'khánh hòa': 0.5,
+    'bà rịa vũng tàu': 0.5, 'quảng ninh': 0.5, 'thanh hóa': 0.4, 'nghệ an': 0.4, 'toàn quốc': 0.8
+}
+CITY_SALARY_FACTORS = {'hà nội': 1.1, 'hồ chí minh': 1.15}
+
+# Nhóm nghề: tên công việc, kỹ năng, lĩnh vực và hệ số lương cùng nhóm đi cùng nhau
+JOB_PROFILES = [
+    {'weight': 30, 'salary': 1.05,
+     'titles': ['nhân viên kinh doanh', 'chuyên viên kinh doanh', 'nhân viên kinh doanh thị trường',
+                'trưởng phòng kinh doanh', 'nhân viên tư vấn bán hàng', 'sales executive', 'nhân viên telesale'],
+     'skills': ['tư vấn bán hàng', 'chăm sóc khách hàng', 'đàm phán', 'giao tiếp', 'telesales',
+                'b2b sales', 'crm', 'tiếng anh', 'thuyết trình'],
+     'fields': ['kinh doanh', 'bán hàng', 'bán sỉ', 'bán lẻ', 'tư vấn', 'chăm sóc khách hàng']},
+    {'weight': 14, 'salary': 0.95,
+     'titles': ['kế toán tổng hợp', 'nhân viên kế toán', 'kế toán nội bộ', 'kế toán trưởng',
+                'kế toán thuế', 'general accountant', 'kế toán công nợ'],
+     'skills': ['kế toán', 'excel', 'misa', 'báo cáo thuế', 'kiểm toán', 'general accountant', 'sap'],
+     'fields': ['kế toán', 'kiểm toán', 'tài chính', 'thuế']},
+    {'weight': 12, 'salary': 1.45,
+     'titles': ['lập trình viên java', 'backend developer', 'frontend developer', 'data analyst',
+                'business analyst', 'tester', 'devops engineer', 'it helpdesk'],
+     'skills': ['python', 'java', 'sql', 'javascript', 'react', 'docker', 'aws', 'git', 'power bi', 'tiếng anh'],
+     'fields': ['it - phần mềm', 'công nghệ thông tin', 'phân tích dữ liệu', 'viễn thông']},
+    {'weight': 9, 'salary': 1.1,
+     'titles': ['nhân viên marketing', 'chuyên viên digital marketing', 'content creator',
+                'marketing executive', 'nhân viên seo', 'trưởng nhóm marketing'],
+     'skills': ['digital marketing', 'facebook ads', 'google ads', 'seo', 'content marketing',
+                'photoshop', 'tiếp thị trực tuyến'],
+     'fields': ['marketing', 'quảng cáo', 'truyền thông', 'tiếp thị trực tuyến']},
+    {'weight': 12, 'salary': 0.9,
+     'titles': ['công nhân sản xuất', 'nhân viên qc', 'kỹ sư cơ khí', 'nhân viên kho', 'kỹ thuật viên điện',
+                'nhân viên bảo trì', 'quản đốc xưởng'],
+     'skills': ['autocad', 'iso', 'qc', 'quản lý kho', 'bảo trì', 'vận hành máy', 'an toàn lao động'],
+     'fields': ['sản xuất', 'cơ khí', 'điện, điện tử, điện lạnh', 'kho vận', 'quản lý chất lượng (qa/qc)']},
+    {'weight': 8, 'salary': 0.85,
+     'titles': ['chuyên viên tư vấn giáo dục', 'giáo viên tiếng anh', 'trợ giảng', 'tư vấn tuyển sinh',
+                'giáo viên mầm non'],
+     'skills': ['tiếng anh', 'giảng dạy', 'tư vấn đào tạo', 'ielts', 'giao tiếp'],
+     'fields': ['giáo dục', 'đào tạo', 'tư vấn']},
+    {'weight': 8, 'salary': 0.95,
+     'titles': ['nhân viên hành chính nhân sự', 'chuyên viên tuyển dụng', 'trưởng phòng nhân sự',
+                'nhân viên chăm sóc khách hàng', 'lễ tân', 'thư ký'],
+     'skills': ['tuyển dụng', 'c&b', 'hành chính', 'tin học văn phòng', 'giao tiếp', 'tiếng anh'],
+     'fields': ['nhân sự', 'hành chính', 'văn phòng', 'chăm sóc khách hàng']},
+    {'weight': 7, 'salary': 1.15,
+     'titles': ['kỹ sư xây dựng', 'giám sát công trình', 'kiến trúc sư', 'nhân viên dự toán',
+                'trưởng phòng đấu thầu', 'bim modeller'],
+     'skills': ['autocad', 'revit', 'dự toán', 'giám sát thi công', 'đấu thầu', 'sketchup'],
+     'fields': ['xây dựng', 'kiến trúc', 'nội ngoại thất', 'bất động sản']}
+]
+TITLE_SUFFIXES = ['', '', '', '', ' thu nhập từ {n} triệu', ' tại {city}', ' - lương cứng {n} triệu',
+                  ' (không yêu cầu kinh nghiệm)', ' khu vực {city}', ' đi làm ngay']
+COMBINATION_POOL_SIZE = 512  # Số tổ hợp skills/fields được sinh cho mỗi nhóm nghề trong một chunk
+
+
+# Bảng giá trị và xác suất: các giá trị có trọng số cố định + biến thể "bẩn" của mapping chia phần còn lại
+def weighted_vocabulary(weights, variants, variant_share):
+    values = list(weights)
+    probs = np.array(list(weights.values()), dtype=np.float64)
+    probs = probs / probs.sum() * (1 - variant_share)
+    extra = [value for value in dict.fromkeys(variants) if value and value not in weights]
+    if extra:
+        values += extra
+        probs = np.concatenate([probs, np.full(len(extra), variant_share / len(extra))])
+    return np.array(values, dtype=object), probs / probs.sum()
+
+
+# Sinh file jobs.csv tổng hợp theo từng chunk (bộ nhớ không phụ thuộc số dòng), cùng schema và
+# cùng các biến thể bẩn mà DataCleaner xử lý: chữ hoa/thường, khoảng trắng thừa, giá trị thiếu,
+# lương 0/bất thường/đảo min-max, đơn vị usd và dòng trùng lặp
+class JobsGenerator:
+
+    def __init__(self, seed=42, dirty_rate=SYNTHETIC_DIRTY_RATE, duplicate_rate=SYNTHETIC_DUPLICATE_RATE):
+        self.rng = np.random.default_rng(seed)
+        self.dirty_rate = dirty_rate
+        self.duplicate_rate = duplicate_rate
+
+        self.job_types, self.job_type_probs = weighted_vocabulary(JOB_TYPE_WEIGHTS, [], 0)
+        self.positions, self.position_probs = weighted_vocabulary(POSITION_WEIGHTS, POSITION_CLEANING_MAPPING, 0.02)
+        self.experiences, self.experience_probs = weighted_vocabulary(
+            EXPERIENCE_WEIGHTS, EXPERIENCE_CLEANING_MAPPING, 0.15)
+        self.cities, self.city_probs = weighted_vocabulary(
+            CITY_WEIGHTS, [city.lower() for city in CITY_CLEANING_MAPPING], 0.12)
+        self.profile_probs = np.array([profile['weight'] for profile in JOB_PROFILES], dtype=np.float64)
+        self.profile_probs /= self.profile_probs.sum()
+
+        # Hệ số lương theo từng giá trị (tính một lần trên bảng giá trị, không tính theo dòng)
+        self.experience_years = np.array([
+            EXPERIENCE_MAPPING.get(EXPERIENCE_CLEANING_MAPPING.get(value, value), 1.0) for value in self.experiences
+        ])
+        position_index = {position.lower(): i for i, position in enumerate(POSITION_ORDER)}
+        self.position_factors = np.array([
+            1.18 ** (position_index.get(POSITION_CLEANING_MAPPING.get(value, value).lower(), 3) - 3)
+            for value in self.positions
+        ])
+        self.city_factors = np.array([CITY_SALARY_FACTORS.get(city, 1.0) for city in self.cities])
+
+        self.rows_written = 0
+
+    # Tổ hợp ngẫu nhiên k phần tử (1 <= k <= max_items) của vocabulary, nối bằng ', '
+    def _combinations(self, vocabulary, max_items):
+        sizes = self.rng.integers(1, max_items + 1, size=COMBINATION_POOL_SIZE)
+        return np.array([
+            ', '.join(self.rng.choice(vocabulary, size=min(size, len(vocabulary)), replace=False))
+            for size in sizes
+        ], dtype=object)
+
+    # Tên công việc, skills và job_fields theo nhóm nghề của từng dòng
+    def _profile_columns(self, profile, n):
+        titles = np.empty(n, dtype=object)
+        skills = np.empty(n, dtype=object)
+        fields = np.empty(n, dtype=object)
+        salary_factor = np.empty(n)
+        for p, spec in enumerate(JOB_PROFILES):
+            rows = np.flatnonzero(profile == p)
+            if len(rows) == 0:
+                continue
+            titles[rows] = self.rng.choice(np.array(spec['titles'], dtype=object), size=len(rows))
+            skills[rows] = self.rng.choice(self._combinations(spec['skills'], 5), size=len(rows))
+            fields[rows] = self.rng.choice(self._combinations(spec['fields'], 4), size=len(rows))
+            salary_factor[rows] = spec['salary']
+        return titles, skills, fields, salary_factor
+
+    # Thêm hậu tố vào một phần tên công việc (tăng số giá trị unique như dữ liệu thật)
+    def _title_suffixes(self, titles, cities):
+        suffix = self.rng.choice(TITLE_SUFFIXES, size=len(titles))
+        amount = self.rng.integers(7, 40, size=len(titles))
+        return np.array([
+            title + template.format(n=n, city=city) if template else title
+            for title, template, n, city in zip(titles, suffix, amount, cities)
+        ], dtype=object)
+
+    # Lương (triệu VND) theo kinh nghiệm, cấp bậc, thành phố và nhóm nghề, kèm các giá trị bất thường
+    def _salaries(self, experience, position, city, salary_factor):
+        n = len(experience)
+        years = self.experience_years[experience]
+        base = (7.5 * (1 + 0.12 * years) * self.position_factors[position] * self.city_factors[city]
+                * salary_factor * self.rng.lognormal(0, 0.3, size=n))
+        salary_min = np.round(base * 2) / 2
+        salary_max = np.round(salary_min * self.rng.uniform(1.2, 2.2, size=n) * 2) / 2
+
+        negotiable = self.rng.random(n) < 0.04
+        salary_min[negotiable] = 0
+        salary_max[negotiable] = 0
+        outlier = self.rng.random(n) < 0.005
+        salary_min[outlier] *= self.rng.integers(10, 60, size=int(outlier.sum()))
+        swapped = self.rng.random(n) < 0.01
+        salary_min[swapped], salary_max[swapped] = salary_max[swapped], salary_min[swapped]
+        return salary_min, salary_max, negotiable
+
+    # Chuỗi lương hiển thị như trong tin tuyển dụng ('10 - 15 triệu vnđ', '15 tr - 50 tr vnd', '800 - 1,500 usd')
+    def _salary_text(self, salary_min, salary_max, usd, negotiable):
+        style = self.rng.random(len(salary_min)) < 0.5
+        texts = []
+        for low, high, is_usd, is_negotiable, short in zip(salary_min, salary_max, usd, negotiable, style):
+            if is_negotiable:
+                texts.append('thỏa thuận')
+            elif is_usd:
+                texts.append(f'{low * 1000 / EXCHANGE_RATE:,.0f} - {high * 1000 / EXCHANGE_RATE:,.0f} usd')
+            elif short:
+                texts.append(f'{low:g} tr - {high:g} tr vnd')
+            else:
+                texts.append(f'{low:g} - {high:g} triệu vnđ')
+        return texts
+
+    # Làm "bẩn" một phần giá trị: chữ hoa, khoảng trắng thừa hai đầu hoặc tab giữa các từ
+    def _dirty(self, values):
+        values = np.asarray(values, dtype=object).copy()
+        kind = self.rng.integers(0, 3, size=len(values))
+        dirty = (self.rng.random(len(values)) < self.dirty_rate) & pd.notna(values)
+        for k, transform in enumerate([str.upper, lambda v: f'  {v}   ', lambda v: v.replace(' ', '  \t')]):
+            rows = np.flatnonzero(dirty & (kind == k))
+            values[rows] = [transform(value) for value in values[rows]]
+        return values
+
+    # Đặt giá trị thiếu (NaN) cho một tỷ lệ dòng
+    def _missing(self, values, rate):
+        values = np.asarray(values, dtype=object)
+        values[self.rng.random(len(values)) < rate] = np.nan
+        return values
+
+    # Sinh một chunk n dòng dữ liệu gốc
+    def generate_chunk(self, n):
+        rng = self.rng
+        profile = rng.choice(len(JOB_PROFILES), size=n, p=self.profile_probs)
+        position = rng.choice(len(self.positions), size=n, p=self.position_probs)
+        experience = rng.choice(len(self.experiences), size=n, p=self.experience_probs)
+        city = rng.choice(len(self.cities), size=n, p=self.city_probs)
+        titles, skills, fields, salary_factor = self._profile_columns(profile, n)
+
+        salary_min, salary_max, negotiable = self._salaries(experience, position, city, salary_factor)
+        usd = rng.random(n) < 0.0085
+
+        df = pd.DataFrame({
+            'job_title': self._dirty(self._missing(self._title_suffixes(titles, self.cities[city]), 0.0001)),
+            'job_type': self._dirty(rng.choice(self.job_types, size=n, p=self.job_type_probs)),
+            'position_level': self._dirty(self.positions[position]),
+            'city': self._dirty(self._missing(self.cities[city].copy(), 0.0004)),
+            'experience': self._dirty(self.experiences[experience]),
+            'skills': self._dirty(self._missing(skills, 0.13)),
+            'job_fields': self._dirty(self._missing(fields, 0.09)),
+            'salary': self._salary_text(salary_min, salary_max, usd, negotiable),
+            'salary_min': salary_min,
+            'salary_max': salary_max,
+            'unit': self._dirty(np.where(usd, 'usd', 'vnd').astype(object))
+        }, columns=RAW_COLUMNS)
+
+        # Tin tuyển dụng đăng lại nhiều lần: một phần dòng là bản sao của dòng khác trong chunk
+        duplicate = rng.random(n) < self.duplicate_rate
+        originals = np.flatnonzero(~duplicate)
+        if len(originals) == 0:
+            return df
+        source = np.arange(n)
+        source[duplicate] = rng.choice(originals, size=int(duplicate.sum()))
+        return df.iloc[source].reset_index(drop=True)
+
+    # Ghi n_rows dòng ra CSV theo từng chunk, trả về số dòng đã ghi
+    def write_csv(self, path, n_rows, chunk_size=SYNTHETIC_CHUNK_SIZE, verbose=True):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+        self.rows_written = 0
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(','.join(RAW_COLUMNS) + '\n')
+            while self.rows_written < n_rows:
+                n = min(chunk_size, n_rows - self.rows_written)
+                self.generate_chunk(n).to_csv(f, header=False, index=False)
+                self.rows_written += n
+                if verbose:
+                    elapsed = time.perf_counter() - start
+                    print(f"   {self.rows_written:,}/{n_rows:,} rows ({self.rows_written / elapsed:,.0f} rows/s)")
+        return self.rows_written
+
+
+# Hàm tiện ích: sinh file jobs.csv tổng hợp
+def generate_jobs_csv(output_path=None, n_rows=100000, seed=42, chunk_size=SYNTHETIC_CHUNK_SIZE, verbose=True):
+    output_path = output_path or SYNTHETIC_DATA_FILE
+    generator = JobsGenerator(seed=seed)
+    generator.write_csv(output_path, n_rows, chunk_size=chunk_size, verbose=verbose)
+    if verbose:
+        print(f"Saved synthetic data to: {output_path}")
+    return output_path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Sinh file jobs.csv tổng hợp để kiểm tra pipeline với dữ liệu lớn')
+    parser.add_argument('--rows', type=int, default=1000000, help='Số dòng cần sinh')
+    parser.add_argument('--output', default=str(SYNTHETIC_DATA_FILE), help='File CSV đầu ra')
+    parser.add_argument('--seed', type=int, default=42, help='Seed ngẫu nhiên (cùng seed và chunk-size cho cùng file)')
+    parser.add_argument('--chunk-size', type=int, default=SYNTHETIC_CHUNK_SIZE, help='Số dòng sinh mỗi lần ghi')
+    args = parser.parse_args()
+
+    print("="*70)
+    print(f"Generating {args.rows:,} synthetic job postings")
+    print("="*70)
+
+    start = time.perf_counter()
+    generate_jobs_csv(args.output, args.rows, seed=args.seed, chunk_size=args.chunk_size)
+    size_mb = Path(args.output).stat().st_size / 1024 ** 2
+    print(f"\nDone in {time.perf_counter() - start:.1f}s ({size_mb:,.1f} MB)")
+    print("="*70)
@@ -1,29 +1,142 @@
 import pandas as pd
 import numpy as np
-from pathlib import Path
 import sys
+from pathlib import Path
 
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent.parent))
-from src.utils.config import RAW_DATA_FILE, CLEANED_DATA_FILE, FEATURED_DATA_FILE
+from src.utils.config import (
+    RAW_DATA_FILE, CLEANED_DATA_FILE, FEATURED_DATA_FILE,
+    CATEGORICAL_COLUMNS, BINARY_FEATURE_PREFIXES, FLOAT32_COLUMNS, DATA_CHUNK_SIZE, DATA_CACHE_ENABLED
+)
+from src.data.data_cache import read_cache, write_cache, cached_matrix
+
+
+# Kiểu dữ liệu tối ưu cho các cột theo schema trong config (các cột khác để pandas tự xác định)
+def build_dtypes(columns):
+    dtypes = {}
+    for col in columns:
+        if col in CATEGORICAL_COLUMNS:
+            dtypes[col] = 'category'
+        elif col.startswith(BINARY_FEATURE_PREFIXES):
+            dtypes[col] = 'uint8'
+        elif col in FLOAT32_COLUMNS:
+            dtypes[col] = 'float32'
+    return dtypes
+
+
+# Các tham số cho pd.read_csv: chỉ đọc các cột cần thiết (usecols) với dtype theo schema
+def _read_csv_kwargs(filepath, columns=None, optimize_dtypes=True):
+    header = pd.read_csv(filepath, nrows=0).columns.tolist()
+    if columns is not None:
+        missing = [col for col in columns if col not in header]
+        if missing:
+            raise ValueError(f"Không tìm thấy các cột: {', '.join(missing)}")
+        header = list(columns)
+
+    kwargs = {'usecols': header}
+    if optimize_dtypes:
+        kwargs['dtype'] = build_dtypes(header)
+    return kwargs, header
+
+
+# Đọc CSV theo từng chunk (generator), mỗi chunk là một DataFrame đã áp dụng schema
+def iter_csv(filepath, chunksize=None, columns=None, optimize_dtypes=True):
+    kwargs, header = _read_csv_kwargs(filepath, columns, optimize_dtypes)
+    with pd.read_csv(filepath, chunksize=chunksize or DATA_CHUNK_SIZE, **kwargs) as reader:
+        for chunk in reader:
+            yield chunk[header]
+
+
+# Ghép các chunk; các cột category được gộp categories để giữ kiểu category sau khi ghép
+def concat_chunks(chunks):
+    chunks = list(chunks)
+    if not chunks:
+        return pd.DataFrame()
+
+    for col in chunks[0].columns:
+        if isinstance(chunks[0][col].dtype, pd.CategoricalDtype):
+            categories = pd.api.types.union_categoricals([chunk[col] for chunk in chunks]).categories
+            for chunk in chunks:
+                chunk[col] = chunk[col].cat.set_categories(categories)
+
+    return pd.concat(chunks, ignore_index=True)
+
+
+# Đọc toàn bộ CSV theo schema; nếu có chunksize thì đọc từng chunk rồi ghép lại
+def load_csv(filepath, columns=None, optimize_dtypes=True, chunksize=None):
+    if chunksize:
+        return concat_chunks(iter_csv(filepath, chunksize, columns, optimize_dtypes))
+
+    kwargs, header = _read_csv_kwargs(filepath, columns, optimize_dtypes)
+    return pd.read_csv(filepath, **kwargs)[header]
+
 
-# Class để load và quản lý dữ liệu
+# Load CSV qua cache nhị phân cạnh file: lần đầu đọc CSV rồi ghi cache, các lần sau đọc từ cache.
+# Cache tự build lại khi file CSV (kích thước, mtime, hash) hoặc schema trong config thay đổi
+def load_cached_csv(filepath, columns=None, chunksize=None):
+    schema = build_dtypes(pd.read_csv(filepath, nrows=0).columns)
+    df = read_cache(filepath, columns, schema)
+    if df is None:
+        print(f"Building data cache for: {filepath}")
+        write_cache(filepath, load_csv(filepath, chunksize=chunksize), schema)
+        df = read_cache(filepath, columns, schema)
+    return df
+
+
+# Ma trận features float32 từ cache, trả về dạng memory map để train mà không copy dữ liệu
+def load_feature_matrix(features, filepath=None, target=None):
+    filepath = filepath or FEATURED_DATA_FILE
+    load_cached_csv(filepath, columns=[])  # Đảm bảo cache khớp với file CSV hiện tại
+    X = cached_matrix(filepath, features, lambda columns: read_cache(filepath, columns))
+    if target is None:
+        return X
+    return X, read_cache(filepath, [target])[target].to_numpy()
+
+
+# Dung lượng bộ nhớ của DataFrame (MB)
+def memory_usage_mb(df):
+    return df.memory_usage(deep=True).sum() / 1024**2
+
+
+# Đường dẫn mặc định theo loại dữ liệu
+DATA_FILES = {
+    'raw': RAW_DATA_FILE,
+    'cleaned': CLEANED_DATA_FILE,
+    'featured': FEATURED_DATA_FILE
+}
+
+
+# Class để load và quản lý dữ liệu.
+# Mặc định đọc như pd.read_csv (dtype do pandas xác định, không ghi cache) để notebooks giữ nguyên kết quả;
+# schema dtype (category, uint8, float32) và cache nhị phân là tùy chọn (use_cache=True thì mặc định dùng schema)
 class DataLoader:
     
-    def __init__(self):
+    def __init__(self, optimize_dtypes=None, chunksize=None, use_cache=None):
         self.raw_data = None
         self.cleaned_data = None
         self.featured_data = None
+        self.use_cache = DATA_CACHE_ENABLED if use_cache is None else use_cache
+        self.optimize_dtypes = self.use_cache if optimize_dtypes is None else optimize_dtypes
+        self.chunksize = chunksize
+    
+    # Đọc file theo schema và cấu hình của loader (qua cache nhị phân nếu được bật)
+    def _read(self, filepath, columns=None, chunksize=None):
+        if self.use_cache and self.optimize_dtypes:
+            return load_cached_csv(filepath, columns, chunksize or self.chunksize)
+        return load_csv(filepath, columns=columns, optimize_dtypes=self.optimize_dtypes,
+                        chunksize=chunksize or self.chunksize)
     
     # Load dữ liệu gốc từ CSV
-    def load_raw_data(self, filepath=None):
+    def load_raw_data(self, filepath=None, columns=None, chunksize=None):
         
         if filepath is None:
             filepath = RAW_DATA_FILE
         
         try:
-            self.raw_data = pd.read_csv(filepath)
-            print(f"Loaded raw data: {self.raw_data.shape[0]:,} rows, {self.raw_data.shape[1]} columns")
+            self.raw_data = self._read(filepath, columns, chunksize)
+            print(f"Loaded raw data: {self.raw_data.shape[0]:,} rows, {self.raw_data.shape[1]} columns "
+                  f"({memory_usage_mb(self.raw_data):.1f} MB)")
             return self.raw_data
         except FileNotFoundError:
             print(f"File not found: {filepath}")
@@ -33,33 +146,44 @@ class DataLoader:
             return None
     
     # Load dữ liệu đã làm sạch
-    def load_cleaned_data(self, filepath=None):
+    def load_cleaned_data(self, filepath=None, columns=None, chunksize=None):
 
         if filepath is None:
             filepath = CLEANED_DATA_FILE
         
         try:
-            self.cleaned_data = pd.read_csv(filepath)
-            print(f"Loaded cleaned data: {self.cleaned_data.shape[0]:,} rows")
+            self.cleaned_data = self._read(filepath, columns, chunksize)
+            print(f"Loaded cleaned data: {self.cleaned_data.shape[0]:,} rows "
+                  f"({memory_usage_mb(self.cleaned_data):.1f} MB)")
             return self.cleaned_data
         except FileNotFoundError:
             print(f"File not found: {filepath}")
             return None
     
     # Load dữ liệu đã có features
-    def load_featured_data(self, filepath=None):
+    def load_featured_data(self, filepath=None, columns=None, chunksize=None):
 
         if filepath is None:
             filepath = FEATURED_DATA_FILE
         
         try:
-            self.featured_data = pd.read_csv(filepath)
-            print(f"Loaded featured data: {self.featured_data.shape[0]:,} rows, {self.featured_data.shape[1]} columns")
+            self.featured_data = self._read(filepath, columns, chunksize)
+            print(f"Loaded featured data: {self.featured_data.shape[0]:,} rows, {self.featured_data.shape[1]} columns "
+                  f"({memory_usage_mb(self.featured_data):.1f} MB)")
             return self.featured_data
         except FileNotFoundError:
             print(f"File not found: {filepath}")
             return None
     
+    # Đọc dữ liệu theo từng chunk để xử lý dataset lớn mà không load toàn bộ vào bộ nhớ
+    def iter_data(self, data_type='featured', filepath=None, columns=None, chunksize=None):
+        if filepath is None:
+            if data_type not in DATA_FILES:
+                raise ValueError(f"Invalid data_type: {data_type}")
+            filepath = DATA_FILES[data_type]
+        
+        return iter_csv(filepath, chunksize or self.chunksize, columns, self.optimize_dtypes)
+    
     # Lấy thông tin cơ bản về dataset
     def get_basic_info(self, df=None):
 
@@ -77,7 +201,7 @@ class DataLoader:
             'missing_values': df.isnull().sum().to_dict(),
             'missing_percentage': (df.isnull().sum() / len(df) * 100).to_dict(),
             'duplicates': df.duplicated().sum(),
-            'memory_usage_mb': df.memory_usage(deep=True).sum() / 1024**2
+            'memory_usage_mb': memory_usage_mb(df)
         }
         
         return info
@@ -144,16 +268,16 @@ class DataLoader:
 
 
 # Hàm tiện ích để load nhanh dữ liệu
-def quick_load(data_type='featured'):
+def quick_load(data_type='featured', columns=None):
 
     loader = DataLoader()
     
     if data_type == 'raw':
-        return loader.load_raw_data()
+        return loader.load_raw_data(columns=columns)
     elif data_type == 'cleaned':
-        return loader.load_cleaned_data()
+        return loader.load_cleaned_data(columns=columns)
     elif data_type == 'featured':
-        return loader.load_featured_data()
+        return loader.load_featured_data(columns=columns)
     else:
         print(f"Invalid data_type: {data_type}")
         return None
@@ -185,7 +309,18 @@ if __name__ == '__main__':
         if 'salary_min' in df_raw.columns:
             stats = loader.get_column_stats('salary_min', df_raw)
             print(stats)
-    
+
+        print("\n5. Memory: default dtypes vs schema...")
+        df_default = load_csv(RAW_DATA_FILE, optimize_dtypes=False)
+        print(f"   Default: {memory_usage_mb(df_default):.2f} MB")
+        print(f"   Schema:  {memory_usage_mb(df_raw):.2f} MB")
+
+        print("\n6. Streaming chunks...")
+        n_rows = 0
+        for i, chunk in enumerate(loader.iter_data('raw', columns=['city', 'salary_min', 'salary_max'])):
+            n_rows += len(chunk)
+        print(f"   Read {n_rows:,} rows in {i + 1} chunks")
+
     print("\n" + "="*70)
     print("DataLoader test completed!")
     print("="*70)
\ No newline at end of file
@@ -0,0 +1,378 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from scipy import sparse
+import sys
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.utils.config import (
+    RAW_DATA_FILE, CLEANED_DATA_FILE, FEATURED_DATA_FILE, INCREMENTAL_STATE_DIR, IQR_FACTOR,
+    CATEGORICAL_COLUMNS, CLEANING_TEXT_COLUMNS, CLEANING_FILL_VALUES, ESSENTIAL_COLUMNS, VALID_SALARY_UNITS,
+    EXPERIENCE_CLEANING_MAPPING, POSITION_CLEANING_MAPPING, CITY_CLEANING_MAPPING,
+    EXPERIENCE_MAPPING, POSITION_ORDER, SALARY_CATEGORIES, NUMERICAL_FEATURES,
+    N_TOP_SKILLS, N_TOP_FIELDS, N_TOP_CITIES
+)
+from src.data.data_clearner import DataCleaner, column_transform, remap_unique, to_categorical
+from src.features.feature_builder import FeatureBuilder, top_columns
+
+STATE_FORMAT_VERSION = 1
+SALARY_COLUMNS = ['salary_min', 'salary_max']
+CHECK_STAGES = ['missing_essential', 'invalid_unit', 'non_positive_salary']
+TOKEN_COLUMNS = ['skills', 'job_fields', 'city']  # Theo thứ tự FeatureBuilder.encoders()
+
+
+# Dấu hiệu của các quy tắc làm sạch/mã hóa theo từng dòng trong config: khác với lần chạy trước
+# thì trạng thái cũ không dùng được nữa (đổi code chuẩn hóa thì chạy lại với full=True)
+def rules_signature():
+    rules = [
+        STATE_FORMAT_VERSION, CLEANING_TEXT_COLUMNS, CLEANING_FILL_VALUES, ESSENTIAL_COLUMNS,
+        VALID_SALARY_UNITS, EXPERIENCE_CLEANING_MAPPING, POSITION_CLEANING_MAPPING,
+        CITY_CLEANING_MAPPING, EXPERIENCE_MAPPING, POSITION_ORDER, NUMERICAL_FEATURES
+    ]
+    payload = json.dumps(rules, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+# Kiểu dữ liệu khi đọc jobs.csv: cột lương float64, các cột khác giữ chuỗi gốc, để đọc cả file
+# hay chỉ phần mới thêm vào cuối file đều cho cùng giá trị (và cùng fingerprint)
+def raw_dtypes(columns):
+    return {col: np.float64 if col in SALARY_COLUMNS else object for col in columns}
+
+
+# Fingerprint (uint64) nội dung của từng dòng dữ liệu gốc
+def row_fingerprints(df):
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+# Hash SHA-256 của size byte đầu tiên của file (trả về object hashlib để cập nhật tiếp)
+def prefix_sha256(path, size, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        remaining = size
+        while remaining > 0:
+            block = f.read(min(block_size, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest
+
+
+# Tạo bảng dữ liệu có features từ dữ liệu đã làm sạch (notebook 03): salary_avg_vnd, salary_category
+# theo quantile, job_type_encoded và các features của FeatureBuilder (X tính sẵn thì dùng luôn)
+def build_featured_frame(cleaned, builder, X=None):
+    if X is None:
+        X = builder.transform(cleaned)
+
+    featured = {col: cleaned[col] for col in cleaned.columns}
+    salary_avg = (cleaned['salary_min'] + cleaned['salary_max']) / 2
+    featured['salary_avg_vnd'] = salary_avg
+
+    labels = list(SALARY_CATEGORIES)
+    quantiles = salary_avg.quantile([0.25, 0.5, 0.75]).to_numpy()
+    featured['salary_category'] = pd.Categorical.from_codes(
+        np.searchsorted(quantiles, salary_avg.to_numpy(), side='right'), labels
+    )
+    if 'job_type' in cleaned:
+        featured['job_type_encoded'] = np.unique(cleaned['job_type'].astype(str), return_inverse=True)[1]
+
+    dense = X.toarray()
+    for i, name in enumerate(builder.feature_names):
+        featured[name] = dense[:, i] if name in NUMERICAL_FEATURES else dense[:, i].astype(np.uint8)
+
+    return pd.DataFrame(featured, index=cleaned.index)
+
+
+# Pipeline làm sạch + tạo features tăng dần cho jobs.csv: mỗi dòng gốc được nhận diện bằng fingerprint,
+# chỉ các dòng mới/thay đổi được làm sạch và tách token. Các bước phụ thuộc toàn bộ dữ liệu (ngưỡng IQR,
+# top skills/fields/cities, quantile lương) được tính lại mỗi lần từ các mảng đã lưu trong thư mục trạng thái
+class IncrementalPipeline:
+
+    def __init__(self, state_dir=None, iqr_factor=IQR_FACTOR, n_skills=N_TOP_SKILLS,
+                 n_fields=N_TOP_FIELDS, n_cities=N_TOP_CITIES, verbose=True):
+        self.state_dir = Path(state_dir or INCREMENTAL_STATE_DIR)
+        self.top_n = {'skills': n_skills, 'job_fields': n_fields, 'city': n_cities}
+        self.verbose = verbose
+        self.cleaner = DataCleaner(iqr_factor, verbose=verbose)
+        self.feature_builder = None
+        self.report = {}
+        self._reset()
+
+    # Xóa trạng thái trong bộ nhớ (lần chạy sau xử lý lại toàn bộ dữ liệu)
+    def _reset(self):
+        self.meta = {}
+        self.order = np.empty(0, dtype=np.uint64)
+        self.rows = pd.DataFrame({'fingerprint': np.empty(0, dtype=np.uint64)})
+        self.numeric = np.empty((0, len(NUMERICAL_FEATURES)), dtype=np.float64)
+        # Encoder với từ điển đầy đủ (mọi token đã gặp); các cột top-N được chọn từ ma trận token này
+        builder = FeatureBuilder()
+        self.encoders = dict(zip(TOKEN_COLUMNS, builder.encoders()))
+        self.tokens = {col: sparse.csr_matrix((0, 0)) for col in TOKEN_COLUMNS}
+
+    # Load trạng thái đã lưu; False nếu chưa có hoặc được tạo bởi quy tắc làm sạch khác
+    def _load_state(self):
+        try:
+            with open(self.state_dir / 'meta.json', 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+        if meta.get('format_version') != STATE_FORMAT_VERSION or meta.get('signature') != rules_signature():
+            print("Incremental state was built with different cleaning rules, rebuilding")
+            return False
+
+        self.meta = meta
+        self.order = np.load(self.state_dir / 'order.npy')
+        self.rows = pd.read_pickle(self.state_dir / 'rows.pkl')
+        self.numeric = np.load(self.state_dir / 'numeric.npy')
+        for col in TOKEN_COLUMNS:
+            self.encoders[col].set_vocabulary(meta['token_vocabulary'][col])
+            self.tokens[col] = sparse.load_npz(self.state_dir / f'tokens_{col}.npz').tocsr()
+        return True
+
+    # Ghi trạng thái vào thư mục tạm rồi đổi tên (không để lại trạng thái ghi dở)
+    def _save_state(self):
+        tmp_dir = self.state_dir.with_name(f'{self.state_dir.name}.tmp-{os.getpid()}')
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        np.save(tmp_dir / 'order.npy', self.order)
+        self.rows.to_pickle(tmp_dir / 'rows.pkl')
+        np.save(tmp_dir / 'numeric.npy', self.numeric)
+        for col in TOKEN_COLUMNS:
+            sparse.save_npz(tmp_dir / f'tokens_{col}.npz', self.tokens[col], compressed=False)
+        self.meta['token_vocabulary'] = {col: self.encoders[col].vocabulary for col in TOKEN_COLUMNS}
+        with open(tmp_dir / 'meta.json', 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, ensure_ascii=False, indent=2)
+
+        old_dir = self.state_dir.with_name(f'{self.state_dir.name}.old-{os.getpid()}')
+        if self.state_dir.exists():
+            os.replace(self.state_dir, old_dir)
+        os.replace(tmp_dir, self.state_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    # Đọc dữ liệu gốc. Nếu phần đầu file trùng với file lần trước (chỉ thêm dòng vào cuối)
+    # thì chỉ parse phần mới; ngược lại đọc lại cả file để tìm dòng mới, dòng bị sửa hoặc xóa
+    def _read_raw(self, raw_path):
+        size = os.path.getsize(raw_path)
+        source = self.meta.get('source')
+
+        digest = None
+        if source and source['ends_with_newline'] and size >= source['size']:
+            digest = prefix_sha256(raw_path, source['size'])
+            if digest.hexdigest() != source['sha256']:
+                digest = None
+
+        if digest is not None:
+            columns = self.meta['columns']
+            with open(raw_path, 'rb') as f:
+                f.seek(source['size'])
+                tail = f.read()
+            digest.update(tail)
+            if tail.strip():
+                df = pd.read_csv(io.BytesIO(tail), header=None, names=columns,
+                                 dtype=raw_dtypes(columns), encoding='utf-8-sig')
+            else:
+                df = pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in raw_dtypes(columns).items()})
+            fingerprints = row_fingerprints(df)
+            order = np.concatenate([self.order, fingerprints])
+            mode = 'append' if len(df) else 'unchanged'
+        else:
+            columns = pd.read_csv(raw_path, nrows=0, encoding='utf-8-sig').columns.tolist()
+            df = pd.read_csv(raw_path, dtype=raw_dtypes(columns), encoding='utf-8-sig')
+            digest = prefix_sha256(raw_path, size)
+            fingerprints = order = row_fingerprints(df)
+            mode = 'rescan' if source else 'full'
+
+        with open(raw_path, 'rb') as f:
+            f.seek(max(size - 1, 0))
+            ends_with_newline = f.read(1) == b'\n'
+
+        self.meta['columns'] = columns
+        self.meta['source'] = {'size': size, 'sha256': digest.hexdigest(), 'ends_with_newline': ends_with_newline}
+        return df, fingerprints, order, mode
+
+    # Làm sạch và mã hóa các dòng mới: chuẩn hóa văn bản, các điều kiện lọc theo dòng,
+    # features số và ma trận token (theo từ điển đầy đủ, được mở rộng với token mới)
+    def _process_rows(self, df, fingerprints):
+        salary_min = df['salary_min'].to_numpy(dtype=np.float64)
+        salary_max = df['salary_max'].to_numpy(dtype=np.float64)
+
+        rows = {'fingerprint': fingerprints}
+        for col in df.columns:
+            if col in CLEANING_TEXT_COLUMNS:
+                rows[col] = remap_unique(df[col].to_numpy(), column_transform(col))
+            else:
+                rows[col] = df[col].to_numpy()
+        checks = self.cleaner.row_checks(df, rows['unit'], salary_min, salary_max)
+        rows.update({f'check_{stage}': checks[stage] for stage in CHECK_STAGES})
+        rows = pd.DataFrame(rows)
+
+        # Features tính trên giá trị đã hoán đổi salary_min > salary_max (giống dữ liệu sau làm sạch)
+        swap = salary_min > salary_max
+        cleaned = rows[[col for col in df.columns if col not in SALARY_COLUMNS]].assign(
+            salary_min=np.where(swap, salary_max, salary_min),
+            salary_max=np.where(swap, salary_min, salary_max)
+        )
+        for col in TOKEN_COLUMNS:
+            if col in cleaned:
+                self.encoders[col].extend(cleaned[col])
+        builder = FeatureBuilder(*(self.encoders[col] for col in TOKEN_COLUMNS))
+        X = builder.transform(cleaned)
+
+        n_numerical = len(NUMERICAL_FEATURES)
+        numeric = X[:, :n_numerical].toarray()
+        tokens, offset = {}, n_numerical
+        for col in TOKEN_COLUMNS:
+            width = len(self.encoders[col].vocabulary)
+            tokens[col] = X[:, offset:offset + width].tocsr()
+            offset += width
+        return rows, numeric, tokens
+
+    # Gộp các dòng mới vào trạng thái và bỏ các dòng không còn trong file gốc; trả về số dòng mới, số dòng bị bỏ
+    def _merge(self, df, fingerprints, order):
+        index = pd.Index(fingerprints)
+        is_new = ~index.duplicated() & ~index.isin(self.rows['fingerprint'])
+        n_new = int(is_new.sum())
+
+        if n_new:
+            rows, numeric, tokens = self._process_rows(df[is_new].reset_index(drop=True), fingerprints[is_new])
+            self.rows = pd.concat([self.rows, rows], ignore_index=True) if len(self.rows) else rows
+            self.numeric = np.vstack([self.numeric, numeric])
+            for col in TOKEN_COLUMNS:
+                old = self.tokens[col]
+                old.resize((old.shape[0], tokens[col].shape[1]))
+                self.tokens[col] = sparse.vstack([old, tokens[col]], format='csr')
+
+        keep = np.isin(self.rows['fingerprint'].to_numpy(), order)
+        n_removed = int((~keep).sum())
+        if n_removed:
+            self.rows = self.rows[keep].reset_index(drop=True)
+            self.numeric = self.numeric[keep]
+            self.tokens = {col: matrix[keep] for col, matrix in self.tokens.items()}
+
+        self.order = order
+        return n_new, n_removed
+
+    # Tạo dữ liệu đã làm sạch và dữ liệu có features cho toàn bộ file gốc từ trạng thái
+    def _assemble(self):
+        positions = pd.Index(self.rows['fingerprint']).get_indexer(self.order)
+        checks = {stage: self.rows[f'check_{stage}'].to_numpy()[positions] for stage in CHECK_STAGES}
+        salary_min = self.rows['salary_min'].to_numpy(dtype=np.float64)[positions]
+        salary_max = self.rows['salary_max'].to_numpy(dtype=np.float64)[positions]
+        mask = self.cleaner.filter_mask(checks, salary_min, salary_max)
+
+        kept = positions[mask]
+        salary_min, salary_max = salary_min[mask], salary_max[mask]
+        swap = salary_min > salary_max
+        salary_min[swap], salary_max[swap] = salary_max[swap], salary_min[swap]
+
+        cleaned = {}
+        for col in self.meta['columns']:
+            if col == 'salary_min':
+                cleaned[col] = salary_min
+            elif col == 'salary_max':
+                cleaned[col] = salary_max
+            elif col in CLEANING_TEXT_COLUMNS and col in CATEGORICAL_COLUMNS:
+                cleaned[col] = to_categorical(self.rows[col].to_numpy()[kept])
+            else:
+                cleaned[col] = self.rows[col].to_numpy()[kept]
+        cleaned = pd.DataFrame(cleaned)
+
+        # Chọn top-N từ số dòng chứa mỗi token (giống FeatureBuilder.fit trên dữ liệu đã làm sạch)
+        builder = FeatureBuilder()
+        blocks = [sparse.csr_matrix(self.numeric[kept])]
+        for col, encoder in zip(TOKEN_COLUMNS, builder.encoders()):
+            matrix = self.tokens[col][kept]
+            full = self.encoders[col]
+            counts = np.asarray(matrix.sum(axis=0)).ravel()
+            encoder.set_vocabulary(top_columns(dict(zip(full.vocabulary, counts)), self.top_n[col]))
+            blocks.append(matrix[:, [full.index[name] for name in encoder.vocabulary]])
+        X = sparse.hstack(blocks, format='csr')
+
+        vocabulary = {col: encoder.vocabulary for col, encoder in zip(TOKEN_COLUMNS, builder.encoders())}
+        self.report['vocabulary_changed'] = vocabulary != self.meta.get('vocabulary')
+        self.meta['vocabulary'] = vocabulary
+        self.feature_builder = builder
+        return cleaned, build_featured_frame(cleaned, builder, X)
+
+    # Chạy pipeline: cập nhật trạng thái với các dòng mới/thay đổi rồi ghi cleaned_data.csv và
+    # featured_data.csv (full=True bỏ trạng thái cũ và xử lý lại toàn bộ)
+    def run(self, raw_path=None, cleaned_path=None, featured_path=None, full=False):
+        start = time.perf_counter()
+        raw_path = Path(raw_path or RAW_DATA_FILE)
+        self.report = {}
+        if full or not self._load_state():
+            self._reset()
+
+        previous = {'vocabulary': self.meta.get('vocabulary'), 'params': self.meta.get('params')}
+        df, fingerprints, order, mode = self._read_raw(raw_path)
+        rows_new, rows_removed = self._merge(df, fingerprints, order)
+        cleaned, featured = self._assemble()
+
+        self.meta.update({
+            'format_version': STATE_FORMAT_VERSION,
+            'signature': rules_signature(),
+            'params': {'iqr_factor': self.cleaner.iqr_factor, 'top_n': self.top_n}
+        })
+        self._save_state()
+
+        # Ghi file kết quả (bỏ qua nếu dữ liệu gốc và tham số không đổi so với lần chạy trước)
+        outputs = [(cleaned, Path(cleaned_path or CLEANED_DATA_FILE)), (featured, Path(featured_path or FEATURED_DATA_FILE))]
+        unchanged = mode == 'unchanged' and previous['params'] == self.meta['params']
+        for data, path in outputs:
+            if not (unchanged and path.exists()):
+                data.to_csv(path, index=False, encoding='utf-8-sig')
+                if self.verbose:
+                    print(f"Saved data to: {path}")
+
+        self.report.update({
+            'mode': mode,
+            'rows_raw': len(order),
+            'rows_new': rows_new,
+            'rows_removed': rows_removed,
+            'rows_cleaned': len(cleaned),
+            'elapsed_seconds': time.perf_counter() - start
+        })
+        if self.verbose:
+            print(f"Incremental pipeline ({mode}): {rows_new:,} new rows processed, {rows_removed:,} removed, "
+                  f"{len(cleaned):,} cleaned rows in {self.report['elapsed_seconds']:.2f}s")
+            if self.report['vocabulary_changed'] and previous['vocabulary'] is not None:
+                print("   Top skills/fields/cities changed: feature columns differ from the previous run")
+        return cleaned, featured
+
+
+# Hàm tiện ích: cập nhật dữ liệu đã làm sạch và dữ liệu có features từ jobs.csv
+def transform_data(raw_path=None, cleaned_path=None, featured_path=None, full=False):
+    pipeline = IncrementalPipeline()
+    pipeline.run(raw_path, cleaned_path, featured_path, full=full)
+    return pipeline.report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Làm sạch và tạo features tăng dần từ dữ liệu gốc')
+    parser.add_argument('--full', action='store_true', help='Bỏ qua trạng thái đã lưu, xử lý lại toàn bộ')
+    args = parser.parse_args()
+
+    # Chạy pipeline tăng dần trên dữ liệu gốc
+    print("="*70)
+    print("Incremental cleaning and feature building")
+    print("="*70)
+
+    if RAW_DATA_FILE.exists():
+        report = transform_data(full=args.full)
+        for key, value in report.items():
+            print(f"   {key}: {value}")
+    else:
+        print(f"File not found: {RAW_DATA_FILE}")
+
+    print("\n" + "="*70)
+    print("Pipeline completed!")
+    print("="*70)
@@ -0,0 +1,317 @@
+from collections import Counter
+from pathlib import Path
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.utils.config import (
+    CLEANED_DATA_FILE, FEATURE_ENCODER_PATH, EXPERIENCE_MAPPING, POSITION_ORDER, NUMERICAL_FEATURES,
+    N_TOP_SKILLS, N_TOP_FIELDS, N_TOP_CITIES
+)
+from src.features.vocabulary_index import VocabularyIndex
+
+POSITION_CODES = {pos: i for i, pos in enumerate(POSITION_ORDER)}
+NUMERICAL_INDEX = {name: i for i, name in enumerate(NUMERICAL_FEATURES)}
+
+
+# Kiểm tra giá trị thiếu (None hoặc NaN)
+def is_missing(value):
+    return value is None or (isinstance(value, float) and np.isnan(value))
+
+
+# Số năm kinh nghiệm: chuỗi theo EXPERIENCE_MAPPING (không có thì 0), số thì giữ nguyên
+def experience_years(value):
+    if is_missing(value):
+        return 0.0
+    if isinstance(value, str):
+        return float(EXPERIENCE_MAPPING.get(value, 0))
+    return float(value)
+
+
+# Mã của position_level theo POSITION_ORDER (không có thì 0)
+def position_code(value):
+    if isinstance(value, str):
+        return POSITION_CODES.get(value, 0)
+    return 0
+
+
+# Tách chuỗi phân cách bởi dấu phẩy thành các token (chữ thường, bỏ khoảng trắng và token rỗng)
+def split_tokens(value):
+    if is_missing(value):
+        return []
+    tokens = (token.strip().lower() for token in str(value).split(','))
+    return [token for token in tokens if token]
+
+
+# Các tên cột có số dòng lớn nhất; cùng số dòng thì xếp theo tên để kết quả không phụ thuộc thứ tự dữ liệu
+def top_columns(counts, max_features=None):
+    ranked = sorted((name for name, count in counts.items() if count > 0), key=lambda name: (-counts[name], name))
+    return ranked[:max_features]
+
+
+# Encoder multi-hot cho một cột văn bản (skills, job_fields) hoặc one-hot (city).
+# Từ điển lưu theo tên cột feature (prefix + token, thay các ký tự trong replace_chars bằng '_'),
+# nên token được so khớp theo đúng quy tắc đặt tên cột trong features_list.
+# Với fuzzy=True, token không khớp tên cột nào được tra trong VocabularyIndex (sai chính tả, có/không dấu)
+class MultiHotEncoder:
+
+    fuzzy = False
+    _matcher = None
+
+    def __init__(self, prefix, replace_chars=(' ',), multi_value=True, vocabulary=None, fuzzy=False):
+        self.prefix = prefix
+        self.replace_chars = tuple(replace_chars)
+        self.multi_value = multi_value
+        self.fuzzy = fuzzy
+        self.vocabulary = []
+        self.set_vocabulary(vocabulary or [])
+
+    # Không lưu chỉ mục so khớp gần đúng khi pickle (tạo lại khi cần)
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_matcher', None)
+        return state
+
+    # Đặt từ điển (danh sách tên cột feature)
+    def set_vocabulary(self, vocabulary):
+        self.vocabulary = list(vocabulary)
+        self.index = {name: i for i, name in enumerate(self.vocabulary)}
+        self._matcher = None
+        return self
+
+    # Chỉ mục so khớp gần đúng của từ điển hiện tại (tạo lần đầu khi cần)
+    @property
+    def matcher(self):
+        if self._matcher is None:
+            self._matcher = VocabularyIndex.from_encoder(self)
+        return self._matcher
+
+    # Tên cột feature của một token
+    def column_name(self, token):
+        for char in self.replace_chars:
+            token = token.replace(char, '_')
+        return f'{self.prefix}{token}'
+
+    # Các token của một giá trị (city là một token duy nhất, chỉ chuyển chữ thường)
+    def tokens(self, value):
+        if self.multi_value:
+            return split_tokens(value)
+        if is_missing(value):
+            return []
+        return [str(value).lower()]
+
+    # Chỉ số các cột trong từ điển và số token của một giá trị (token không khớp cột nào được thêm vào unmatched)
+    def encode(self, value, unmatched=None):
+        tokens = self.tokens(value)
+        index = self.index
+        columns = set()
+        for token in tokens:
+            column = index.get(self.column_name(token))
+            if column is None and self.fuzzy:
+                column = self.matcher.lookup(token)
+            if column is not None:
+                columns.add(column)
+            elif unmatched is not None:
+                unmatched.append(token)
+        return sorted(columns), len(tokens)
+
+    # Chọn max_features tên cột có ở nhiều dòng nhất (mỗi giá trị unique chỉ tách token một lần)
+    def fit(self, values, max_features=None):
+        counts = Counter()
+        for value, n in pd.Series(values).value_counts(dropna=True).items():
+            for name in set(map(self.column_name, self.tokens(value))):
+                counts[name] += n
+        return self.set_vocabulary(top_columns(counts, max_features))
+
+    # Thêm vào cuối từ điển các tên cột mới xuất hiện trong values (chỉ số các cột cũ không đổi)
+    def extend(self, values):
+        names = []
+        for value in pd.unique(pd.Series(values).dropna()):
+            names.extend(name for name in map(self.column_name, self.tokens(value)) if name not in self.index)
+        return self.set_vocabulary(self.vocabulary + list(dict.fromkeys(names)))
+
+    # Ma trận CSR (n, len(vocabulary)) và số token của mỗi dòng
+    def transform(self, values):
+        codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=False)
+        indptr, indices, counts = [0], [], np.zeros(len(uniques), dtype=np.float64)
+        for i, value in enumerate(np.asarray(uniques, dtype=object)):
+            columns, counts[i] = self.encode(value)
+            indices.extend(columns)
+            indptr.append(len(indices))
+
+        unique_matrix = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.float64), indices, indptr),
+            shape=(len(uniques), len(self.vocabulary))
+        )
+        return unique_matrix[codes], counts[codes]
+
+
+# Tạo toàn bộ features của mô hình từ dữ liệu công việc, dùng chung cho train (DataFrame -> CSR)
+# và phục vụ (một input -> hàng thưa), để hai bên luôn mã hóa giống nhau
+class FeatureBuilder:
+
+    def __init__(self, skills=None, fields=None, cities=None):
+        self.skills = skills or MultiHotEncoder('has_skill_')
+        self.fields = fields or MultiHotEncoder('field_', replace_chars=(' ', '/'))
+        self.cities = cities or MultiHotEncoder('city_', multi_value=False)
+
+    # Tạo builder từ danh sách features của một mô hình đã train (từ điển suy ra từ tên cột)
+    @classmethod
+    def from_feature_names(cls, feature_names):
+        builder = cls()
+        for encoder in builder.encoders():
+            encoder.set_vocabulary(name for name in feature_names if name.startswith(encoder.prefix))
+        return builder
+
+    # Các encoder theo thứ tự cột: skills, job_fields, city
+    def encoders(self):
+        return [self.skills, self.fields, self.cities]
+
+    # Bật/tắt so khớp gần đúng cho các token (dùng khi phục vụ input người dùng nhập tự do)
+    def set_fuzzy(self, enabled=True):
+        for encoder in self.encoders():
+            encoder.fuzzy = enabled
+        return self
+
+    # Các token của input không khớp với cột feature nào, theo từng cột skills, job_fields, city
+    def unmatched_tokens(self, input_data):
+        unmatched = {}
+        for encoder, column in zip(self.encoders(), ['skills', 'job_fields', 'city']):
+            if column in input_data:
+                tokens = []
+                encoder.encode(input_data[column], tokens)
+                if tokens:
+                    unmatched[column] = tokens
+        return unmatched
+
+    # Fit từ điển top skills, fields và cities
+    def fit(self, df, n_skills=N_TOP_SKILLS, n_fields=N_TOP_FIELDS, n_cities=N_TOP_CITIES):
+        self.skills.fit(df['skills'], n_skills)
+        self.fields.fit(df['job_fields'], n_fields)
+        self.cities.fit(df['city'], n_cities)
+        return self
+
+    # Tên các features theo thứ tự cột
+    @property
+    def feature_names(self):
+        return list(NUMERICAL_FEATURES) + [name for encoder in self.encoders() for name in encoder.vocabulary]
+
+    # Áp dụng hàm cho từng giá trị unique của cột rồi ánh xạ lại cho mọi dòng
+    @staticmethod
+    def _map_unique(values, func):
+        codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=False)
+        return np.array([func(value) for value in np.asarray(uniques, dtype=object)], dtype=np.float64)[codes]
+
+    # Mã hóa DataFrame thành ma trận CSR (n, n_features)
+    def transform(self, df):
+        n = len(df)
+        zeros = np.zeros(n, dtype=np.float64)
+        exp = self._map_unique(df['experience'], experience_years) if 'experience' in df else zeros
+        pos = self._map_unique(df['position_level'], position_code) if 'position_level' in df else zeros
+
+        blocks, counts = [], {}
+        for encoder, column in zip(self.encoders(), ['skills', 'job_fields', 'city']):
+            if column in df:
+                matrix, counts[column] = encoder.transform(df[column])
+            else:
+                matrix, counts[column] = sparse.csr_matrix((n, len(encoder.vocabulary))), zeros
+            blocks.append(matrix)
+
+        numerical = {
+            'experience_years': exp,
+            'skills_count': counts['skills'],
+            'fields_count': counts['job_fields'],
+            'position_level_encoded': pos,
+            'exp_position_interaction': exp * pos,
+            'skills_exp_interaction': counts['skills'] * exp,
+            'salary_range': zeros,
+            'salary_range_ratio': zeros
+        }
+        if 'salary_min' in df and 'salary_max' in df:
+            # Dòng không có lương (NaN) giữ 0 như khi mã hóa một input không có salary_min/salary_max
+            salary_min = pd.to_numeric(df['salary_min']).to_numpy(dtype=np.float64)
+            salary_max = pd.to_numeric(df['salary_max']).to_numpy(dtype=np.float64)
+            salary_range = salary_max - salary_min
+            has_salary = ~np.isnan(salary_range)
+            numerical['salary_range'] = np.where(has_salary, salary_range, 0.0)
+            numerical['salary_range_ratio'] = np.where(has_salary, salary_range / (salary_min + 1), 0.0)
+
+        dense = np.column_stack([numerical[name] for name in NUMERICAL_FEATURES])
+        return sparse.hstack([sparse.csr_matrix(dense)] + blocks, format='csr')
+
+    # Mã hóa một input (dict) thành hàng thưa: (danh sách chỉ số cột, danh sách giá trị) theo thứ tự feature_names
+    def encode_one(self, input_data):
+        exp = experience_years(input_data['experience']) if 'experience' in input_data else 0.0
+        pos = position_code(input_data.get('position_level'))
+        skills_count = 0
+        indices = [NUMERICAL_INDEX['experience_years'], NUMERICAL_INDEX['position_level_encoded'],
+                   NUMERICAL_INDEX['exp_position_interaction']]
+        values = [exp, pos, exp * pos]
+
+        offset = len(NUMERICAL_FEATURES)
+        for encoder, column, count_name in ((self.skills, 'skills', 'skills_count'),
+                                            (self.fields, 'job_fields', 'fields_count'),
+                                            (self.cities, 'city', None)):
+            if column in input_data:
+                columns, count = encoder.encode(input_data[column])
+                indices.extend(offset + c for c in columns)
+                values.extend([1.0] * len(columns))
+                if count_name is not None:
+                    indices.append(NUMERICAL_INDEX[count_name])
+                    values.append(count)
+                    if column == 'skills':
+                        skills_count = count
+            offset += len(encoder.vocabulary)
+
+        indices.append(NUMERICAL_INDEX['skills_exp_interaction'])
+        values.append(skills_count * exp)
+
+        if 'salary_min' in input_data and 'salary_max' in input_data:
+            salary_min = float(input_data['salary_min'])
+            salary_max = float(input_data['salary_max'])
+            indices += [NUMERICAL_INDEX['salary_range'], NUMERICAL_INDEX['salary_range_ratio']]
+            values += [salary_max - salary_min, (salary_max - salary_min) / (salary_min + 1)]
+
+        return indices, values
+
+    # Lưu builder (cạnh mô hình)
+    def save(self, path=None):
+        path = Path(path or FEATURE_ENCODER_PATH)
+        joblib.dump(self, path)
+        print(f"Saved feature encoder to: {path}")
+
+    # Load builder đã lưu
+    @classmethod
+    def load(cls, path=None):
+        return joblib.load(path or FEATURE_ENCODER_PATH)
+
+
+if __name__ == '__main__':
+    # Fit FeatureBuilder trên dữ liệu đã làm sạch
+    from src.data.data_loader import DataLoader
+
+    print("="*70)
+    print("Building features")
+    print("="*70)
+
+    df = DataLoader().load_cleaned_data(CLEANED_DATA_FILE)
+
+    if df is not None:
+        builder = FeatureBuilder().fit(df)
+        X = builder.transform(df)
+        dense_mb = X.shape[0] * X.shape[1] * 8 / 1024**2
+        sparse_mb = (X.data.nbytes + X.indices.nbytes + X.indptr.nbytes) / 1024**2
+        print(f"   Features: {X.shape[1]} ({len(builder.skills.vocabulary)} skills, "
+              f"{len(builder.fields.vocabulary)} fields, {len(builder.cities.vocabulary)} cities)")
+        print(f"   Matrix: {X.shape[0]:,} rows, {X.nnz:,} non-zeros")
+        print(f"   Memory: sparse {sparse_mb:.1f} MB vs dense {dense_mb:.1f} MB")
+        builder.save()
+
+    print("\n" + "="*70)
+    print("Feature building completed!")
+    print("="*70)
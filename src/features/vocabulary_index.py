@@ -0,0 +1,97 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+from src.utils.config import FUZZY_MATCH_THRESHOLD, FUZZY_MATCH_CACHE_SIZE
+
+NON_ALNUM_PATTERN = re.compile(r'[^0-9a-z]+')
+
+
+# Chuẩn hóa văn bản để so khớp: chữ thường, bỏ dấu tiếng Việt (đ -> d), chỉ giữ chữ và số
+@lru_cache(maxsize=FUZZY_MATCH_CACHE_SIZE)
+def normalize_text(text):
+    text = unicodedata.normalize('NFKD', text.lower().replace('đ', 'd'))
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return NON_ALNUM_PATTERN.sub(' ', text).strip()
+
+
+# Tập trigram của chuỗi đã chuẩn hóa (thêm khoảng trắng hai đầu để đầu/cuối chuỗi có trọng số cao hơn)
+def trigrams(text):
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# Khoảng cách sửa (Levenshtein có tính hoán đổi hai ký tự liền nhau); dừng sớm khi chắc chắn vượt limit
+def edit_distance(a, b, limit):
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+# Chỉ mục từ điển features để so khớp token người dùng nhập (sai chính tả, có/không dấu) với cột đã biết:
+# khớp chính xác sau chuẩn hóa, nếu không có thì chọn cột có hệ số Dice trên trigram cao nhất (>= threshold);
+# từ ngắn gõ nhầm/đảo ký tự ít trigram chung nên được so thêm khoảng cách sửa với các cột có trigram chung
+class VocabularyIndex:
+
+    def __init__(self, texts, threshold=FUZZY_MATCH_THRESHOLD, cache_size=FUZZY_MATCH_CACHE_SIZE):
+        self.threshold = threshold
+        self.exact = {}
+        self.keys = []
+        self.sizes = []
+        self.postings = {}
+        for column, text in enumerate(texts):
+            key = normalize_text(text)
+            self.exact.setdefault(key, column)
+            self.keys.append(key)
+            grams = trigrams(key)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(column)
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+
+    # Tạo chỉ mục từ encoder: văn bản của mỗi cột là tên cột bỏ prefix, '_' thay bằng khoảng trắng
+    @classmethod
+    def from_encoder(cls, encoder, **kwargs):
+        prefix_length = len(encoder.prefix)
+        return cls((name[prefix_length:].replace('_', ' ') for name in encoder.vocabulary), **kwargs)
+
+    # Chỉ số cột khớp với token (None nếu không có cột nào đủ gần)
+    def _lookup(self, token):
+        key = normalize_text(token)
+        column = self.exact.get(key)
+        if column is not None or not key:
+            return column
+
+        grams = trigrams(key)
+        common = {}
+        for gram in grams:
+            for candidate in self.postings.get(gram, ()):
+                common[candidate] = common.get(candidate, 0) + 1
+
+        best_column, best_score = None, self.threshold
+        for candidate, count in common.items():
+            score = 2 * count / (len(grams) + self.sizes[candidate])
+            # Cùng điểm thì giữ cột đứng trước trong từ điển (xuất hiện nhiều hơn lúc train)
+            if score > best_score or (score == best_score and (best_column is None or candidate < best_column)):
+                best_column, best_score = candidate, score
+        if best_column is not None or len(key) < 4:
+            return best_column
+
+        limit = 1 if len(key) < 8 else 2
+        best_distance = limit + 1
+        for candidate in sorted(common):
+            distance = edit_distance(key, self.keys[candidate], limit)
+            if distance < best_distance:
+                best_column, best_distance = candidate, distance
+        return best_column
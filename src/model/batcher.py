@@ -0,0 +1,110 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from src.utils.config import MICRO_BATCH_MAX_WAIT_MS, MICRO_BATCH_MAX_SIZE
+
+
+# Gom các request dự đoán đồng thời thành một batch để gọi mô hình một lần
+class MicroBatcher:
+
+    def __init__(self, max_wait_ms=None, max_batch_size=None):
+        self.max_wait = (MICRO_BATCH_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000
+        self.max_batch_size = max_batch_size or MICRO_BATCH_MAX_SIZE
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+        self.n_batches = 0
+        self.n_items = 0
+        self.largest_batch = 0
+
+    # Khởi động thread xử lý batch (chỉ một lần)
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='prediction-batcher', daemon=True
+                )
+                self._thread.start()
+
+    # Dừng thread xử lý batch sau khi xử lý hết các request đang chờ
+    def stop(self, timeout=None):
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    # Gửi một input vào hàng đợi, trả về Future chứa kết quả predict_with_details
+    def submit(self, predictor, input_data):
+        if self._thread is None:
+            self.start()
+        future = Future()
+        self._queue.put((predictor, input_data, future))
+        return future
+
+    # Dự đoán kèm thông tin chi tiết qua batch, chờ đến khi có kết quả
+    def predict_with_details(self, predictor, input_data, timeout=None):
+        return self.submit(predictor, input_data).result(timeout)
+
+    # Vòng lặp của thread: lấy request đầu tiên rồi gom thêm đến khi hết thời gian hoặc đủ batch
+    def _run(self):
+        running = True
+        while running:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+
+            self._process(batch)
+
+    # Dự đoán một batch, nhóm theo predictor để request đang chạy dùng đúng mô hình đã nhận
+    def _process(self, batch):
+        groups = {}
+        for predictor, input_data, future in batch:
+            groups.setdefault(id(predictor), (predictor, []))[1].append((input_data, future))
+
+        for predictor, items in groups.values():
+            try:
+                results = predictor.predict_with_details_batch([input_data for input_data, _ in items])
+                for (_, future), result in zip(items, results):
+                    future.set_result(result)
+            except Exception:
+                # Batch lỗi: dự đoán lại từng input để lỗi chỉ trả về cho đúng request
+                for input_data, future in items:
+                    try:
+                        future.set_result(predictor.predict_with_details(input_data))
+                    except Exception as e:
+                        future.set_exception(e)
+
+        self.n_batches += 1
+        self.n_items += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+    # Trả về thống kê về các batch đã xử lý
+    def stats(self):
+        return {
+            'max_wait_ms': self.max_wait * 1000,
+            'max_batch_size': self.max_batch_size,
+            'batches': self.n_batches,
+            'items': self.n_items,
+            'largest_batch': self.largest_batch,
+            'avg_batch_size': self.n_items / self.n_batches if self.n_batches else 0.0,
+            'queue_depth': self._queue.qsize()
+        }
@@ -0,0 +1,307 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.utils.config import (
+    FEATURED_DATA_FILE, FEATURES_LIST_PATH, MARKET_SEGMENTS_DIR, POSITION_ORDER, RANDOM_STATE, BINARY_FEATURE_PREFIXES,
+    CLUSTER_N_CLUSTERS, CLUSTER_BATCH_SIZE, CLUSTER_N_EPOCHS, CLUSTER_NUMERIC_FEATURES, CLUSTER_SPARSE_WEIGHT,
+    CLUSTER_TOP_TOKENS
+)
+from src.model.model_bundle import artifact_version
+
+SEGMENTS_FORMAT_VERSION = 1
+TARGET = 'salary_avg_vnd'  # Lúc phục vụ dùng lương dự đoán thay cho lương thật
+
+
+# Phân khúc thị trường (cluster) đã fit: centroid trong không gian [features số đã chuẩn hóa,
+# features 0/1 (skills, fields, cities) nhân trọng số]. Gán phân khúc bằng centroid gần nhất,
+# khoảng cách tính qua tích vô hướng với centroid và ||c||² tính sẵn nên chỉ cần một phép nhân ma trận
+class MarketSegments:
+
+    def __init__(self, centroids, meta):
+        self.centroids = centroids
+        self.meta = meta
+        self.numeric_features = meta['numeric_features']
+        self.sparse_features = meta['sparse_features']
+        self.mean = np.asarray(meta['mean'], dtype=np.float64)
+        self.scale = np.asarray(meta['scale'], dtype=np.float64)
+        self.sparse_weight = meta['sparse_weight']
+        self.profiles = meta.get('profiles', [])
+        self.sq_norms = np.einsum('ij,ij->i', centroids, centroids)
+        self._bound = None
+
+    @property
+    def n_clusters(self):
+        return self.centroids.shape[0]
+
+    # Ma trận thưa cho clustering từ các cột số (dense, đã gồm lương) và các cột 0/1 (dense hoặc thưa)
+    def transform(self, numeric, binary):
+        numeric = (np.asarray(numeric, dtype=np.float64) - self.mean) / self.scale
+        binary = sparse.csr_matrix(binary, dtype=np.float64) * self.sparse_weight
+        return sparse.hstack([sparse.csr_matrix(numeric), binary], format='csr')
+
+    # Chỉ số centroid gần nhất của từng hàng trong ma trận clustering
+    def predict(self, Z):
+        scores = np.asarray(Z @ self.centroids.T)
+        return np.argmin(self.sq_norms - 2 * scores, axis=1)
+
+    # Tách centroid theo vị trí cột trong features_list của mô hình (tính một lần cho mỗi features_list)
+    def bind(self, feature_names):
+        if self._bound is not None and self._bound[0] == list(feature_names):
+            return self._bound[1]
+        index = {name: i for i, name in enumerate(feature_names)}
+        n_numeric = len(self.numeric_features)
+        numeric_columns = np.array([index.get(name, -1) for name in self.numeric_features])
+        sparse_columns = np.array([index.get(name, -1) for name in self.sparse_features])
+        used = sparse_columns >= 0
+        # Phần centroid của các cột 0/1 đã nhân trọng số, tích với hàng features là tổng các cột bật
+        sparse_centroids = self.centroids[:, n_numeric:][:, used] * self.sparse_weight
+        bound = (numeric_columns, sparse_columns[used], sparse_centroids)
+        self._bound = (list(feature_names), bound)
+        return bound
+
+    # Gán phân khúc cho các hàng features (theo thứ tự features_list) kèm lương dự đoán của từng hàng
+    def assign(self, features, salary, feature_names):
+        numeric_columns, sparse_columns, sparse_centroids = self.bind(feature_names)
+        features = np.atleast_2d(features)
+        numeric = np.empty((features.shape[0], len(numeric_columns)), dtype=np.float64)
+        for j, (name, column) in enumerate(zip(self.numeric_features, numeric_columns)):
+            if name == TARGET:
+                numeric[:, j] = salary
+            elif column >= 0:
+                numeric[:, j] = features[:, column]
+            else:
+                numeric[:, j] = self.mean[j]
+        numeric = (numeric - self.mean) / self.scale
+        scores = numeric @ self.centroids[:, :len(numeric_columns)].T
+        scores += features[:, sparse_columns] @ sparse_centroids.T
+        return np.argmin(self.sq_norms - 2 * scores, axis=1)
+
+    # Thông tin phân khúc để trả về cùng dự đoán
+    def segment(self, label):
+        return self.profiles[int(label)]
+
+
+# Chỉ số các cột số và cột 0/1 dùng cho clustering trong danh sách cột của ma trận features
+def cluster_columns(feature_names, numeric_features=CLUSTER_NUMERIC_FEATURES):
+    numeric = [name for name in numeric_features if name == TARGET or name in feature_names]
+    binary = [name for name in feature_names if name.startswith(BINARY_FEATURE_PREFIXES)]
+    return numeric, binary
+
+
+# Các batch hàng (xáo trộn mỗi epoch) của ma trận features, chuyển sang ma trận thưa cho clustering.
+# X có thể là memory map: mỗi lần chỉ đọc batch_size hàng nên bộ nhớ không tăng theo số dòng
+def _iter_batches(X, y, rows, numeric_index, binary_index, segments, batch_size, rng=None):
+    order = rows if rng is None else rng.permutation(rows)
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size] if rng is None else np.sort(order[start:start + batch_size])
+        values = np.asarray(X[batch], dtype=np.float64)
+        numeric = np.column_stack([y[batch] if i is None else values[:, i] for i in numeric_index])
+        yield batch, segments.transform(numeric, values[:, binary_index])
+
+
+# Các hàng có đủ lương và mọi features (như train_model/evaluate_model bỏ hàng thiếu giá trị),
+# kiểm tra theo từng batch để không đọc cả memory map vào bộ nhớ
+def _complete_rows(X, y, batch_size):
+    complete = ~np.isnan(y)
+    for start in range(0, len(y), batch_size):
+        values = np.asarray(X[start:start + batch_size], dtype=np.float64)
+        complete[start:start + batch_size] &= ~np.isnan(values).any(axis=1)
+    return np.flatnonzero(complete)
+
+
+# Trung bình và độ lệch chuẩn của các cột số tính theo từng batch
+def _numeric_stats(X, y, rows, numeric_index, batch_size):
+    total = np.zeros(len(numeric_index))
+    total_sq = np.zeros(len(numeric_index))
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        values = np.asarray(X[batch], dtype=np.float64)
+        numeric = np.column_stack([y[batch] if i is None else values[:, i] for i in numeric_index])
+        total += numeric.sum(axis=0)
+        total_sq += (numeric ** 2).sum(axis=0)
+    mean = total / len(rows)
+    scale = np.sqrt(np.maximum(total_sq / len(rows) - mean ** 2, 0))
+    return mean, np.where(scale > 0, scale, 1.0)
+
+
+# Tên token từ tên cột (has_skill_tiếng_anh -> tiếng anh)
+def _token_name(column):
+    for prefix in BINARY_FEATURE_PREFIXES:
+        if column.startswith(prefix):
+            return column[len(prefix):].replace('_', ' ')
+    return column
+
+
+# Mô tả từng phân khúc: số tin, lương/kinh nghiệm trung bình, cấp bậc phổ biến, top skills/fields/cities
+def cluster_profiles(sums, counts, numeric_features, sparse_features, top_n=CLUSTER_TOP_TOKENS):
+    profiles = []
+    total = counts.sum()
+    n_numeric = len(numeric_features)
+    for label in range(len(counts)):
+        count = max(counts[label], 1)
+        means = dict(zip(numeric_features, sums[label, :n_numeric] / count))
+        shares = sums[label, n_numeric:] / count
+        profile = {
+            'id': label,
+            'size': int(counts[label]),
+            'share': float(counts[label] / total) if total else 0.0,
+            'salary_mean': float(means.get(TARGET, np.nan)),
+            'experience_mean': float(means.get('experience_years', np.nan))
+        }
+        if 'position_level_encoded' in means:
+            position = int(np.clip(round(means['position_level_encoded']), 0, len(POSITION_ORDER) - 1))
+            profile['position_level'] = POSITION_ORDER[position]
+        for key, prefix in (('top_skills', 'has_skill_'), ('top_fields', 'field_'), ('top_cities', 'city_')):
+            columns = [j for j, name in enumerate(sparse_features) if name.startswith(prefix)]
+            best = sorted(columns, key=lambda j: -shares[j])[:top_n]
+            profile[key] = [_token_name(sparse_features[j]) for j in best if shares[j] > 0]
+        profile['label'] = f"{profile.get('position_level', 'Cluster')} · {profile['salary_mean']:,.0f}tr"
+        profiles.append(profile)
+    return profiles
+
+
+# Phân cụm thị trường việc làm bằng MiniBatchKMeans (partial_fit theo từng batch thưa, vài epoch) thay cho
+# KMeans/DBSCAN trên toàn bộ ma trận dense như notebook 05/06. Trả về MarketSegments (các cluster được
+# đánh số theo lương trung bình tăng dần) và nhãn của từng hàng (-1 với các hàng thiếu giá trị)
+def fit_market_segments(X, y, feature_names, n_clusters=CLUSTER_N_CLUSTERS, batch_size=CLUSTER_BATCH_SIZE,
+                        n_epochs=CLUSTER_N_EPOCHS, sparse_weight=CLUSTER_SPARSE_WEIGHT,
+                        numeric_features=CLUSTER_NUMERIC_FEATURES, random_state=RANDOM_STATE):
+    from sklearn.cluster import MiniBatchKMeans
+
+    feature_names = list(feature_names)
+    numeric, binary = cluster_columns(feature_names, numeric_features)
+    index = {name: i for i, name in enumerate(feature_names)}
+    numeric_index = [None if name == TARGET else index[name] for name in numeric]
+    binary_index = [index[name] for name in binary]
+
+    y = np.asarray(y, dtype=np.float64)
+    rows = _complete_rows(X, y, batch_size)
+    mean, scale = _numeric_stats(X, y, rows, numeric_index, batch_size)
+    meta = {
+        'numeric_features': numeric, 'sparse_features': binary, 'mean': mean.tolist(),
+        'scale': scale.tolist(), 'sparse_weight': sparse_weight
+    }
+    segments = MarketSegments(np.zeros((n_clusters, len(numeric) + len(binary))), meta)
+
+    kmeans = MiniBatchKMeans(n_clusters=n_clusters, batch_size=batch_size, random_state=random_state,
+                             n_init=3, init_size=min(len(rows), max(3 * batch_size, 3 * n_clusters)))
+    rng = np.random.default_rng(random_state)
+    for _ in range(n_epochs):
+        for _, Z in _iter_batches(X, y, rows, numeric_index, binary_index, segments, batch_size, rng):
+            if Z.shape[0] >= n_clusters or hasattr(kmeans, 'cluster_centers_'):
+                kmeans.partial_fit(Z)
+
+    # Đánh số lại theo lương trung bình của centroid (0 là phân khúc lương thấp nhất)
+    centers = kmeans.cluster_centers_
+    if TARGET in numeric:
+        centers = centers[np.argsort(centers[:, numeric.index(TARGET)], kind='stable')]
+    segments = MarketSegments(np.ascontiguousarray(centers), meta)
+
+    # Gán nhãn cho toàn bộ dữ liệu và cộng dồn giá trị gốc theo cluster để mô tả phân khúc
+    labels = np.full(len(y), -1, dtype=np.int32)
+    sums = np.zeros((n_clusters, len(numeric) + len(binary)))
+    inertia = 0.0
+    for batch, Z in _iter_batches(X, y, rows, numeric_index, binary_index, segments, batch_size):
+        batch_labels = segments.predict(Z)
+        labels[batch] = batch_labels
+        values = np.asarray(X[batch], dtype=np.float64)
+        original = np.column_stack([y[batch] if i is None else values[:, i] for i in numeric_index]
+                                   + [values[:, binary_index]])
+        indicator = sparse.csr_matrix((np.ones(len(batch)), (batch_labels, np.arange(len(batch)))),
+                                      shape=(n_clusters, len(batch)))
+        sums += indicator @ original
+        distances = segments.sq_norms[batch_labels] - 2 * np.asarray(
+            Z.multiply(segments.centroids[batch_labels]).sum(axis=1)).ravel()
+        inertia += float(distances.sum() + Z.multiply(Z).sum())
+
+    counts = np.bincount(labels[labels >= 0], minlength=n_clusters)
+    meta['profiles'] = cluster_profiles(sums, counts, numeric, binary)
+    meta.update({'n_clusters': n_clusters, 'n_rows': int(len(rows)), 'inertia': inertia,
+                 'batch_size': batch_size, 'n_epochs': n_epochs})
+    return MarketSegments(segments.centroids, meta), labels
+
+
+# Lưu centroid, nhãn của từng dòng featured_data (assignments.npy) và meta.json vào thư mục
+# (ghi thư mục tạm rồi đổi tên như bundle mô hình)
+def save_market_segments(segments, labels, output_dir=None, source_path=None):
+    output_dir = Path(output_dir or MARKET_SEGMENTS_DIR)
+    meta = dict(segments.meta)
+    meta['format_version'] = SEGMENTS_FORMAT_VERSION
+    if source_path is not None:
+        meta.update({'source_path': str(source_path), 'source_version': artifact_version(source_path)})
+
+    tmp_dir = output_dir.with_name(f'{output_dir.name}.tmp-{os.getpid()}')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    np.save(tmp_dir / 'centroids.npy', segments.centroids)
+    np.save(tmp_dir / 'assignments.npy', labels)
+    with open(tmp_dir / 'meta.json', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+
+    old_dir = output_dir.with_name(f'{output_dir.name}.old-{os.getpid()}')
+    if output_dir.exists():
+        os.replace(output_dir, old_dir)
+    os.replace(tmp_dir, output_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    print(f"Saved {segments.n_clusters} market segments to: {output_dir}")
+    return meta
+
+
+# Load phân khúc đã lưu (None nếu thư mục không có)
+def load_market_segments(segments_dir=None):
+    segments_dir = Path(segments_dir or MARKET_SEGMENTS_DIR)
+    if not (segments_dir / 'meta.json').exists():
+        return None
+    with open(segments_dir / 'meta.json', 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('format_version') != SEGMENTS_FORMAT_VERSION:
+        raise ValueError(f"Market segments format không được hỗ trợ: {meta.get('format_version')}")
+    return MarketSegments(np.load(segments_dir / 'centroids.npy'), meta)
+
+
+# Nhãn phân khúc của từng dòng featured_data đã lưu cùng centroid (memory map)
+def load_assignments(segments_dir=None, mmap_mode='r'):
+    return np.load(Path(segments_dir or MARKET_SEGMENTS_DIR) / 'assignments.npy', mmap_mode=mmap_mode)
+
+
+if __name__ == '__main__':
+    from src.data.data_loader import load_feature_matrix
+
+    parser = argparse.ArgumentParser(description='Phân khúc thị trường việc làm bằng MiniBatchKMeans')
+    parser.add_argument('--data', default=str(FEATURED_DATA_FILE), help='File featured_data.csv')
+    parser.add_argument('--features', default=str(FEATURES_LIST_PATH), help='File features_list.json của mô hình')
+    parser.add_argument('--output', default=str(MARKET_SEGMENTS_DIR))
+    parser.add_argument('--clusters', type=int, default=CLUSTER_N_CLUSTERS)
+    parser.add_argument('--batch-size', type=int, default=CLUSTER_BATCH_SIZE)
+    parser.add_argument('--epochs', type=int, default=CLUSTER_N_EPOCHS)
+    args = parser.parse_args()
+
+    print("="*70)
+    print("Clustering job market segments")
+    print("="*70)
+
+    with open(args.features, 'r') as f:
+        features = json.load(f)
+    X, y = load_feature_matrix(features, args.data, TARGET)
+    print(f"   {X.shape[0]:,} rows, {len(features)} features")
+
+    start = time.perf_counter()
+    segments, labels = fit_market_segments(X, y, features, args.clusters, args.batch_size, args.epochs)
+    print(f"   Fitted in {time.perf_counter() - start:.2f}s")
+    save_market_segments(segments, labels, args.output, args.data)
+
+    for profile in segments.profiles:
+        print(f"\n   Segment {profile['id']}: {profile['label']} ({profile['size']:,} jobs, {profile['share']:.1%})")
+        print(f"      Experience: {profile['experience_mean']:.1f} years")
+        print(f"      Skills: {', '.join(profile['top_skills'])}")
+        print(f"      Cities: {', '.join(profile['top_cities'])}")
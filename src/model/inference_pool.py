@@ -0,0 +1,119 @@
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from src.utils.config import (
+    INFERENCE_POOL_WORKERS, INFERENCE_QUEUE_LIMIT,
+    INFERENCE_QUEUE_TIMEOUT_S, INFERENCE_RETRY_AFTER_S
+)
+
+
+# Lỗi khi pool quá tải: 429 nếu hàng đợi đã đầy, 503 nếu chờ quá thời gian cho phép
+class PoolBusyError(RuntimeError):
+
+    def __init__(self, retry_after, status_code=429):
+        super().__init__('Hệ thống đang quá tải, vui lòng thử lại sau')
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+
+# Pool chạy dự đoán với số luồng cố định theo số core và hàng đợi có giới hạn:
+# request vượt quá giới hạn bị từ chối ngay thay vì làm chậm tất cả các request khác
+class InferencePool:
+
+    def __init__(self, max_workers=None, queue_limit=None, timeout=None, retry_after=None):
+        self.max_workers = max_workers or INFERENCE_POOL_WORKERS or os.cpu_count() or 1
+        self.queue_limit = INFERENCE_QUEUE_LIMIT if queue_limit is None else queue_limit
+        self.timeout = INFERENCE_QUEUE_TIMEOUT_S if timeout is None else timeout
+        self.min_retry_after = INFERENCE_RETRY_AFTER_S if retry_after is None else retry_after
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='inference')
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        self.n_completed = 0
+        self.n_rejected = 0
+        self.n_timeouts = 0
+        self.max_pending = 0
+        self.avg_latency = 0.0
+
+    # Số request tối đa được nhận cùng lúc (đang chạy + đang chờ)
+    @property
+    def capacity(self):
+        return self.max_workers + self.queue_limit
+
+    # Số request đang chờ đến lượt chạy
+    @property
+    def queue_depth(self):
+        return max(0, self._pending - self.max_workers)
+
+    # Ước lượng số giây client nên chờ trước khi thử lại, dựa trên độ trễ trung bình và hàng đợi hiện tại
+    def retry_after(self):
+        estimate = self.avg_latency * (self.queue_depth + 1) / self.max_workers
+        return max(self.min_retry_after, math.ceil(estimate))
+
+    # Nhận một Future được tạo bởi submit (vd. MicroBatcher.submit) vào giới hạn hàng đợi của pool
+    def attach(self, submit, *args):
+        with self._lock:
+            if self._pending >= self.capacity:
+                self.n_rejected += 1
+                raise PoolBusyError(self.retry_after(), status_code=429)
+            self._pending += 1
+            self.max_pending = max(self.max_pending, self._pending)
+
+        started = time.perf_counter()
+        try:
+            future = submit(*args)
+        except Exception:
+            self._release(started, completed=False)
+            raise
+        future.add_done_callback(lambda f: self._release(started, completed=not f.cancelled()))
+        return future
+
+    # Gửi một hàm vào pool, trả về Future (PoolBusyError nếu hàng đợi đã đầy)
+    def submit(self, fn, *args):
+        return self.attach(self._executor.submit, fn, *args)
+
+    # Chờ kết quả của Future; quá thời gian thì trả về 503 (cancel=True để bỏ task chưa chạy)
+    def wait(self, future, cancel=False):
+        try:
+            return future.result(self.timeout)
+        except FutureTimeoutError:
+            if cancel:
+                future.cancel()
+            with self._lock:
+                self.n_timeouts += 1
+            raise PoolBusyError(self.retry_after(), status_code=503)
+
+    # Chạy hàm trong pool và chờ kết quả
+    def run(self, fn, *args):
+        return self.wait(self.submit(fn, *args), cancel=True)
+
+    # Cập nhật bộ đếm khi một request kết thúc (độ trễ tính cả thời gian chờ trong hàng đợi)
+    def _release(self, started, completed=True):
+        latency = time.perf_counter() - started
+        with self._lock:
+            self._pending -= 1
+            if completed:
+                self.n_completed += 1
+                self.avg_latency = latency if self.n_completed == 1 else 0.9 * self.avg_latency + 0.1 * latency
+
+    # Dừng pool sau khi chạy hết các task đã nhận
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    # Trả về thống kê của pool
+    def stats(self):
+        return {
+            'workers': self.max_workers,
+            'queue_limit': self.queue_limit,
+            'in_flight': self._pending,
+            'queue_depth': self.queue_depth,
+            'max_in_flight': self.max_pending,
+            'completed': self.n_completed,
+            'rejected': self.n_rejected,
+            'timeouts': self.n_timeouts,
+            'avg_latency_ms': round(self.avg_latency * 1000, 3)
+        }
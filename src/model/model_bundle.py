@@ -0,0 +1,87 @@
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.utils.config import BEST_MODEL_PATH, MODEL_BUNDLE_DIR
+from src.model.tree_engine import ENGINE_ARRAYS, FlatTreeEnsemble
+
+BUNDLE_FORMAT_VERSION = 2
+
+
+# Phiên bản của file mô hình (dựa trên thời gian sửa và kích thước file)
+def artifact_version(path):
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+# Xuất mô hình thành bundle (các file .npy không nén + meta.json) để load bằng memory map
+def export_model_bundle(model_path=None, bundle_dir=None, feature_names=None):
+    model_path = Path(model_path or BEST_MODEL_PATH)
+    engine = FlatTreeEnsemble.from_model(joblib.load(model_path))
+    return save_engine_bundle(engine, bundle_dir or MODEL_BUNDLE_DIR, model_path, feature_names)
+
+
+# Ghi một FlatTreeEnsemble thành bundle; source_version là phiên bản của file mô hình gốc
+# để predictor biết bundle còn khớp với best_model.pkl hay không
+def save_engine_bundle(engine, bundle_dir, model_path, feature_names=None, extra_meta=None):
+    model_path = Path(model_path)
+    bundle_dir = Path(bundle_dir)
+    meta = dict(engine.meta)
+    if feature_names is not None:
+        meta['feature_names'] = list(feature_names)
+    meta.update(extra_meta or {})
+    meta.update({
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'source_path': str(model_path),
+        'source_version': artifact_version(model_path)
+    })
+
+    # Ghi vào thư mục tạm rồi đổi tên để worker không bao giờ đọc bundle ghi dở
+    tmp_dir = bundle_dir.with_name(f'{bundle_dir.name}.tmp-{os.getpid()}')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    for name in ENGINE_ARRAYS:
+        np.save(tmp_dir / f'{name}.npy', getattr(engine, name))
+    with open(tmp_dir / 'meta.json', 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    old_dir = bundle_dir.with_name(f'{bundle_dir.name}.old-{os.getpid()}')
+    if bundle_dir.exists():
+        os.replace(bundle_dir, old_dir)
+    os.replace(tmp_dir, bundle_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+    print(f"Exported model bundle to: {bundle_dir} ({meta['n_trees']} trees, {meta['n_nodes']:,} nodes)")
+    return meta
+
+
+# Load bundle bằng memory map (mmap_mode='r'): các trang dữ liệu chỉ đọc được chia sẻ giữa các worker
+def load_model_bundle(bundle_dir=None, mmap_mode='r'):
+    bundle_dir = Path(bundle_dir or MODEL_BUNDLE_DIR)
+
+    with open(bundle_dir / 'meta.json', 'r') as f:
+        meta = json.load(f)
+    if meta.get('format_version') != BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Bundle format không được hỗ trợ: {meta.get('format_version')}")
+
+    arrays = {name: np.load(bundle_dir / f'{name}.npy', mmap_mode=mmap_mode) for name in ENGINE_ARRAYS}
+    return FlatTreeEnsemble(arrays, meta)
+
+
+if __name__ == '__main__':
+    # Xuất best_model.pkl thành bundle
+    print("="*70)
+    print("Exporting model bundle")
+    print("="*70)
+
+    meta = export_model_bundle()
+    bundle = load_model_bundle()
+    print(f"   Model type: {meta['model_type']}")
+    print(f"   Bundle size: {bundle.nbytes_mb():.1f} MB")
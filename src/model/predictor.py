@@ -1,7 +1,10 @@
 import pandas as pd
 import numpy as np
 import joblib
+import copy
 import json
+import time
+import warnings
 from pathlib import Path
 import sys
 
@@ -9,39 +12,137 @@ import sys
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from src.utils.config import (
     BEST_MODEL_PATH, SCALER_PATH, FEATURES_LIST_PATH, MODEL_INFO_PATH,
-    EXPERIENCE_MAPPING, POSITION_ORDER, EXCHANGE_RATE
+    EXCHANGE_RATE,
+    PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL, MODEL_BUNDLE_DIR, USE_MODEL_BUNDLE,
+    COMPACT_MODEL_BUNDLE_DIR, USE_COMPACT_MODEL,
+    INFERENCE_BACKEND, FEATURE_ENCODER_PATH, VECTORIZED_ENCODE_MIN_BATCH, FUZZY_TOKEN_MATCHING,
+    PREDICTION_INTERVAL_MODE, MARKET_SEGMENTS_DIR, MARKET_SEGMENTS_ENABLED
 )
+from src.utils.cache import LRUCache
+from src.utils.helpers import memory_report
+from src.utils.metrics import STAGE_LATENCY, MODEL_LOAD_SECONDS
+from src.model.model_bundle import artifact_version, load_model_bundle
+from src.model.tree_engine import FlatTreeEnsemble
+from src.model.intervals import TreeQuantileInterval
+from src.model.clustering import load_market_segments
+from src.features.feature_builder import FeatureBuilder
+
+# Histogram độ trễ của các bước dự đoán (lấy sẵn để mỗi lần ghi chỉ tốn vài trăm ns)
+PREPROCESS_LATENCY = STAGE_LATENCY.labels('preprocess')
+MODEL_PREDICT_LATENCY = STAGE_LATENCY.labels('model_predict')
+BUILD_RESULT_LATENCY = STAGE_LATENCY.labels('build_result')
 
 # Class để dự đoán mức lương dựa trên thông tin công việc
 class SalaryPredictor:
     # Khởi tạo SalaryPredictor
-    def __init__(self, model_path=None, scaler_path=None, features_path=None):
+    def __init__(self, model_path=None, scaler_path=None, features_path=None, model_info_path=None,
+                 cache_size=None, cache_ttl=None, bundle_dir=None, use_bundle=None, backend=None,
+                 encoder_path=None, fuzzy_matching=None, interval_mode=None, segments_dir=None):
 
         self.model_path = model_path or BEST_MODEL_PATH
         self.scaler_path = scaler_path or SCALER_PATH
         self.features_path = features_path or FEATURES_LIST_PATH
+        self.model_info_path = model_info_path or MODEL_INFO_PATH
+        self.bundle_dir = bundle_dir or (COMPACT_MODEL_BUNDLE_DIR if USE_COMPACT_MODEL else MODEL_BUNDLE_DIR)
+        self.encoder_path = encoder_path or FEATURE_ENCODER_PATH
+        self.use_bundle = USE_MODEL_BUNDLE if use_bundle is None else use_bundle
+        self.backend = backend or INFERENCE_BACKEND
+        self.fuzzy_matching = FUZZY_TOKEN_MATCHING if fuzzy_matching is None else fuzzy_matching
+        self.interval_mode = interval_mode or PREDICTION_INTERVAL_MODE
+        self.segments_dir = segments_dir or MARKET_SEGMENTS_DIR
         
         self.model = None
+        self.model_version = None
+        self.model_backend = None
         self.scaler = None
         self.features_list = None
+        self.feature_index = None
+        self.feature_builder = None
         self.model_info = None
+        self.load_seconds = None
+        self.interval = None
+        self.interval_engine = None
+        self.segments = None
+        
+        # Load các artifacts và ghi thời gian từng bước (báo cáo khởi động)
+        self.load_timings = {}
+        for name, load in (('model', self._load_model), ('scaler', self._load_scaler),
+                           ('features', self._load_features), ('model_info', self._load_model_info),
+                           ('interval', self._setup_interval), ('segments', self._load_segments)):
+            started = time.perf_counter()
+            load()
+            self.load_timings[name] = time.perf_counter() - started
         
-        self._load_model()
-        self._load_scaler()
-        self._load_features()
-        self._load_model_info()
+        # Cache kết quả dự đoán theo input đã chuẩn hóa (cache_size=0 để tắt)
+        cache_size = PREDICTION_CACHE_SIZE if cache_size is None else cache_size
+        cache_ttl = PREDICTION_CACHE_TTL if cache_ttl is None else cache_ttl
+        self.cache = LRUCache(cache_size, cache_ttl) if cache_size > 0 else None
     
-    # Load mô hình từ file
+    # Tạo predictor từ một thư mục chứa đủ artifacts (ví dụ một phiên bản trong model registry)
+    @classmethod
+    def from_directory(cls, directory, **kwargs):
+        directory = Path(directory)
+        return cls(
+            model_path=directory / 'best_model.pkl',
+            scaler_path=directory / 'scaler.pkl',
+            features_path=directory / 'features_list.json',
+            model_info_path=directory / 'model_info.json',
+            bundle_dir=directory / ('compact_model_bundle' if USE_COMPACT_MODEL else 'best_model_bundle'),
+            encoder_path=directory / 'feature_encoder.pkl',
+            segments_dir=directory / 'market_segments',
+            **kwargs
+        )
+    
+    # Load mô hình từ file (ưu tiên bundle memory map nếu bundle được xuất từ đúng file mô hình)
     def _load_model(self):
+        started = time.perf_counter()
         try:
-            self.model = joblib.load(self.model_path)
-            print(f"Model loaded from: {self.model_path}")
+            if not (self.use_bundle and self._load_bundle()):
+                self._load_model_file()
         except FileNotFoundError:
             print(f"Model file not found: {self.model_path}")
             raise
         except Exception as e:
             print(f"Error loading model: {str(e)}")
             raise
+        self.load_seconds = time.perf_counter() - started
+        MODEL_LOAD_SECONDS.labels(self.model_backend).set(self.load_seconds)
+    
+    # Load mô hình sklearn từ file joblib (biên dịch sang FlatTreeEnsemble nếu chọn backend flat)
+    def _load_model_file(self):
+        version = artifact_version(self.model_path)
+        self.model = joblib.load(self.model_path)
+        self.model_version = version
+        self.model_backend = 'sklearn'
+        print(f"Model loaded from: {self.model_path}")
+        if self.backend == 'flat':
+            self._compile_model()
+    
+    # Biên dịch mô hình cây thành FlatTreeEnsemble (giữ mô hình sklearn nếu không hỗ trợ)
+    def _compile_model(self):
+        try:
+            self.model = FlatTreeEnsemble.from_model(self.model)
+            self.model_backend = 'flat'
+            print(f"Model compiled to flat tree engine: {self.model.meta['n_trees']} trees")
+        except ValueError as e:
+            print(f"Flat tree engine not available, using sklearn model: {str(e)}")
+    
+    # Load mô hình từ bundle, trả về False nếu không có bundle hoặc bundle đã cũ
+    def _load_bundle(self):
+        if not (Path(self.bundle_dir) / 'meta.json').exists():
+            return False
+        
+        bundle = load_model_bundle(self.bundle_dir)
+        source_version = bundle.meta['source_version']
+        if Path(self.model_path).exists() and artifact_version(self.model_path) != source_version:
+            print(f"Model bundle is older than {self.model_path}, loading model file instead")
+            return False
+        
+        self.model = bundle
+        self.model_version = source_version
+        self.model_backend = 'bundle'
+        print(f"Model bundle memory-mapped from: {self.bundle_dir}")
+        return True
     
     # Load scaler từ file
     def _load_scaler(self):
@@ -61,6 +162,8 @@ class SalaryPredictor:
         try:
             with open(self.features_path, 'r') as f:
                 self.features_list = json.load(f)
+            self._build_feature_index()
+            self._check_feature_order()
             print(f"Features list loaded: {len(self.features_list)} features")
         except FileNotFoundError:
             print(f"Features file not found: {self.features_path}")
@@ -71,111 +174,219 @@ class SalaryPredictor:
     # Load thông tin mô hình từ file
     def _load_model_info(self):
         try:
-            with open(MODEL_INFO_PATH, 'r') as f:
+            with open(self.model_info_path, 'r') as f:
                 self.model_info = json.load(f)
             print(f"Model info loaded")
         except:
             self.model_info = {}
-    # Xử lý input data thành định dạng phù hợp cho mô hình
+
+    # Chuẩn bị khoảng dự đoán theo phân vị các cây (chỉ với forest lấy trung bình các cây và đã được
+    # hiệu chỉnh conformal lúc train), nếu không thì dùng khoảng prediction ± test_mae.
+    # Khoảng chưa hiệu chỉnh (khoảng 5-95% của các cây) phủ thấp hơn nhiều so với mức 90% nên không dùng
+    def _setup_interval(self):
+        self.interval = None
+        self.interval_engine = None
+        if self.interval_mode != 'quantile':
+            return
+        # Bundle thu gọn có hiệu chỉnh riêng (phân vị các cây thay đổi khi bớt cây)
+        meta = self.model.meta if isinstance(self.model, FlatTreeEnsemble) else {}
+        interval = TreeQuantileInterval.from_model_info(meta if 'prediction_interval' in meta else self.model_info)
+        if interval.correction is None:
+            print("Model has no conformal interval calibration, using MAE intervals")
+            return
+
+        # Backend sklearn giữ model.predict cho dự đoán, engine flat riêng chỉ để lấy dự đoán của từng cây
+        engine = self.model
+        if not isinstance(engine, FlatTreeEnsemble):
+            try:
+                engine = FlatTreeEnsemble.from_model(self.model)
+            except ValueError:
+                engine = None
+        if engine is None or engine.aggregation != 'mean':
+            print("Quantile intervals need a tree forest, using MAE intervals")
+            return
+        self.interval, self.interval_engine = interval, engine
+        print(f"Prediction intervals: {self.interval.method} ({self.interval.level:.0%})")
+
+    # Load phân khúc thị trường (src/model/clustering.py) nếu có, để gắn vào kết quả dự đoán
+    def _load_segments(self):
+        self.segments = None
+        if not MARKET_SEGMENTS_ENABLED:
+            return
+        try:
+            self.segments = load_market_segments(self.segments_dir)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading market segments: {str(e)}")
+            return
+        if self.segments is not None:
+            print(f"Market segments loaded: {self.segments.n_clusters} segments")
+
+    # Phân khúc của từng hàng (centroid gần nhất theo features và lương dự đoán), None nếu không có
+    def _assign_segments(self, features, predictions):
+        if self.segments is None:
+            return None
+        labels = self.segments.assign(features, predictions, self.features_list)
+        return [self.segments.segment(label) for label in labels]
+
+    # Tạo bảng tra cứu tên feature -> vị trí cột, hàng mẫu (template) cho vector đầu vào
+    # và vị trí trong features_list của từng cột do FeatureBuilder tạo ra (-1 nếu mô hình không dùng)
+    def _build_feature_index(self):
+        self.feature_index = {name: i for i, name in enumerate(self.features_list)}
+        self._template_row = np.zeros(len(self.features_list), dtype=np.float64)
+        self.feature_builder = self._load_feature_builder().set_fuzzy(self.fuzzy_matching)
+        self._builder_positions = [self.feature_index.get(name, -1) for name in self.feature_builder.feature_names]
+
+    # FeatureBuilder đã lưu cùng mô hình; mô hình cũ (train từ notebook) thì suy ra từ features_list
+    def _load_feature_builder(self):
+        if Path(self.encoder_path).exists():
+            print(f"Feature encoder loaded from: {self.encoder_path}")
+            return FeatureBuilder.load(self.encoder_path)
+        return FeatureBuilder.from_feature_names(self.features_list)
+
+    # Kiểm tra thứ tự features_list khớp với thứ tự cột lúc train mô hình
+    def _check_feature_order(self):
+        model_features = getattr(self.model, 'feature_names_in_', None)
+        if model_features is not None and list(model_features) != list(self.features_list):
+            raise ValueError("features_list không khớp với thứ tự features của mô hình")
+
+    # Điền các features của một input vào hàng row đã cấp phát sẵn (hàng thưa từ FeatureBuilder)
+    def _encode_into(self, input_data, row):
+        positions = self._builder_positions
+        for index, value in zip(*self.feature_builder.encode_one(input_data)):
+            position = positions[index]
+            if position >= 0:
+                row[position] = value
+        return row
+
+    # Mã hóa một input thành vector numpy (1 hàng) theo thứ tự features_list
+    def encode_input(self, input_data):
+        return self._encode_into(input_data, self._template_row.copy())
+
+    # Xử lý input data thành định dạng phù hợp cho mô hình (DataFrame 1 dòng)
     def preprocess_input(self, input_data):
-        # Tạo DataFrame rỗng với tất cả features
-        features_df = pd.DataFrame(0, index=[0], columns=self.features_list)
-        
-        # 1. Experience years
-        if 'experience' in input_data:
-            exp = input_data['experience']
-            if isinstance(exp, str):
-                features_df['experience_years'] = EXPERIENCE_MAPPING.get(exp, 0)
-            else:
-                features_df['experience_years'] = float(exp)
-        
-        # 2. Position level encoding
-        if 'position_level' in input_data:
-            pos = input_data['position_level']
-            if pos in POSITION_ORDER:
-                features_df['position_level_encoded'] = POSITION_ORDER.index(pos)
-        
-        # 3. Skills count và binary features
-        if 'skills' in input_data:
-            skills = str(input_data['skills']).split(',')
-            skills = [s.strip().lower() for s in skills if s.strip()]
-            features_df['skills_count'] = len(skills)
-            
-            # Set binary features cho skills
-            for skill in skills:
-                skill_col = f'has_skill_{skill.replace(" ", "_")}'
-                if skill_col in self.features_list:
-                    features_df[skill_col] = 1
-        
-        # 4. Job fields count và binary features
-        if 'job_fields' in input_data:
-            fields = str(input_data['job_fields']).split(',')
-            fields = [f.strip().lower() for f in fields if f.strip()]
-            features_df['fields_count'] = len(fields)
-            
-            # Set binary features cho fields
-            for field in fields:
-                field_col = f'field_{field.replace(" ", "_").replace("/", "_")}'
-                if field_col in self.features_list:
-                    features_df[field_col] = 1
-        
-        # 5. City binary features
-        if 'city' in input_data:
-            city = input_data['city']
-            city_col = f'city_{city.lower().replace(" ", "_")}'
-            if city_col in self.features_list:
-                features_df[city_col] = 1
-        
-        # 6. Interaction features
-        if 'exp_position_interaction' in self.features_list:
-            features_df['exp_position_interaction'] = (
-                features_df['experience_years'] * features_df['position_level_encoded']
-            )
-        
-        if 'skills_exp_interaction' in self.features_list:
-            features_df['skills_exp_interaction'] = (
-                features_df['skills_count'] * features_df['experience_years']
-            )
-        
-        # 7. Salary range features
-        if 'salary_min' in input_data and 'salary_max' in input_data:
-            salary_min = float(input_data['salary_min'])
-            salary_max = float(input_data['salary_max'])
-            
-            if 'salary_range' in self.features_list:
-                features_df['salary_range'] = salary_max - salary_min
-            
-            if 'salary_range_ratio' in self.features_list:
-                features_df['salary_range_ratio'] = (salary_max - salary_min) / (salary_min + 1)
-        
-        return features_df
-    
+        row = self.encode_input(input_data)
+        return pd.DataFrame(row.reshape(1, -1), columns=self.features_list)
+
     # Dự đoán mức lương
     def predict(self, input_data):
 
-        # Preprocess input
-        features_df = self.preprocess_input(input_data)
+        # Mã hóa input thành vector (không tạo DataFrame trên đường dự đoán)
+        started = time.perf_counter()
+        features = self.encode_input(input_data).reshape(1, -1)
+        encoded = time.perf_counter()
+        PREPROCESS_LATENCY.observe(encoded - started)
         
         # Predict
-        prediction = self.model.predict(features_df)[0]
+        prediction = self._model_predict(features)[0]
+        MODEL_PREDICT_LATENCY.observe(time.perf_counter() - encoded)
         
         return prediction
     
+    # Tạo key cache từ input đã chuẩn hóa (None nếu input không thể chuẩn hóa)
+    @staticmethod
+    def _cache_key(input_data):
+        try:
+            exp = input_data.get('experience', '')
+            if not isinstance(exp, str):
+                exp = float(exp)
+            city = input_data.get('city', '')
+            if isinstance(city, str):
+                city = city.lower()
+            skills = sorted(
+                s.strip().lower() for s in str(input_data.get('skills', '')).split(',') if s.strip()
+            )
+            fields = sorted(
+                f.strip().lower() for f in str(input_data.get('job_fields', '')).split(',') if f.strip()
+            )
+            salary = None
+            if 'salary_min' in input_data and 'salary_max' in input_data:
+                salary = (float(input_data['salary_min']), float(input_data['salary_max']))
+            key = (exp, input_data.get('position_level', ''), city, tuple(skills), tuple(fields), salary)
+            hash(key)
+            return key
+        except (TypeError, ValueError):
+            return None
+    
+    # Lấy kết quả từ cache, cập nhật input_summary theo input hiện tại. Trả về bản deep copy để
+    # caller sửa các dict/list lồng nhau (interval, segment, ...) không làm hỏng entry trong cache
+    def _get_cached(self, key, input_data):
+        if self.cache is None or key is None:
+            return None
+        cached = self.cache.get(key, self.model_version)
+        if cached is None:
+            return None
+        result = copy.deepcopy(cached)
+        result['input_summary'] = self._input_summary(input_data)
+        return result
+    
+    # Lưu kết quả vào cache
+    def _put_cached(self, key, result):
+        if self.cache is not None and key is not None:
+            self.cache.put(key, copy.deepcopy(result), self.model_version)
+    
     # Dự đoán mức lương kèm thông tin chi tiết
     def predict_with_details(self, input_data):
         
-        # Predict
-        prediction = self.predict(input_data)
+        key = self._cache_key(input_data) if self.cache is not None else None
+        cached = self._get_cached(key, input_data)
+        if cached is not None:
+            return cached
+        
+        # Predict (kèm khoảng dự đoán riêng cho input này nếu được bật)
+        started = time.perf_counter()
+        features = self.encode_input(input_data).reshape(1, -1)
+        PREPROCESS_LATENCY.observe(time.perf_counter() - started)
+        predictions, bounds = self._predict_matrix(features, with_interval=True)
+        interval = None if bounds is None else (bounds[0][0], bounds[1][0])
+        
+        started = time.perf_counter()
+        segments = self._assign_segments(features, predictions)
+        result = self._build_result(input_data, predictions[0], interval, None if segments is None else segments[0])
+        BUILD_RESULT_LATENCY.observe(time.perf_counter() - started)
+        self._put_cached(key, result)
+        
+        return result
+    
+    # Dự đoán một ma trận features; with_interval=True thì trả kèm khoảng (lower, upper) theo
+    # phân vị dự đoán của các cây, tính từ cùng lần duyệt cây với dự đoán
+    def _predict_matrix(self, features, with_interval=False):
+        started = time.perf_counter()
+        if with_interval and self.interval is not None and self.interval_engine is self.model:
+            predictions, tree_values = self.model.predict_with_trees(features)
+            bounds = self.interval.bounds(tree_values)
+        elif with_interval and self.interval is not None:
+            predictions = self._model_predict(features)
+            bounds = self.interval.bounds(self.interval_engine.tree_predictions(features))
+        else:
+            predictions, bounds = self._model_predict(features), None
+        MODEL_PREDICT_LATENCY.observe(time.perf_counter() - started)
+        return predictions, bounds
+    
+    # Gọi model.predict trên mảng numpy. Mô hình sklearn được train trên DataFrame nhưng mảng đã sắp
+    # đúng thứ tự features_list, nên chỉ bỏ qua cảnh báo thiếu tên feature trong lần gọi này
+    def _model_predict(self, features):
+        if self.model_backend != 'sklearn':
+            return self.model.predict(features)
+        with warnings.catch_warnings():
+            warnings.filterwarnings('ignore', message='X does not have valid feature names')
+            return self.model.predict(features)
+    
+    # Tạo dictionary kết quả chi tiết từ giá trị dự đoán
+    def _build_result(self, input_data, prediction, interval=None, segment=None):
+        prediction = float(prediction)
         
         # Lấy thông tin mô hình
         mae = self.model_info.get('test_mae', 0)
         r2 = self.model_info.get('test_r2', 0)
         
-        # Tính khoảng tin cậy (dựa trên MAE)
-        confidence_interval = (
-            max(0, prediction - mae),
-            prediction + mae
-        )
+        # Khoảng dự đoán riêng cho input (phân vị các cây), hoặc prediction ± MAE nếu không có
+        if interval is not None:
+            method, level = self.interval.method, self.interval.level
+            lower, upper = min(float(interval[0]), prediction), max(float(interval[1]), prediction)
+        else:
+            method, level = 'mae', None
+            lower, upper = prediction - mae, prediction + mae
+        confidence_interval = (max(0, lower), upper)
         
         # Phân loại mức lương (Triệu VND)
         if prediction < 10: 
@@ -194,7 +405,9 @@ class SalaryPredictor:
                 'lower': confidence_interval[0],
                 'upper': confidence_interval[1],
                 'lower_formatted': f'{confidence_interval[0]:,.0f}tr VND',
-                'upper_formatted': f'{confidence_interval[1]:,.0f}tr VND'
+                'upper_formatted': f'{confidence_interval[1]:,.0f}tr VND',
+                'method': method,
+                'level': level
             },
             'salary_category': category,
             'model_info': {
@@ -202,35 +415,112 @@ class SalaryPredictor:
                 'r2': r2,
                 'model_type': self.model_info.get('model_type', 'RandomForest')
             },
-            'input_summary': {
-                'experience_years': input_data.get('experience', 'N/A'),
-                'position': input_data.get('position_level', 'N/A'),
-                'city': input_data.get('city', 'N/A'),
-                'skills_count': len(str(input_data.get('skills', '')).split(','))
-            }
+            'input_summary': self._input_summary(input_data)
         }
+        if segment is not None:
+            result['market_segment'] = segment
         
         return result
     
-    # Dự đoán cho nhiều inputs cùng lúc
+    # Tóm tắt input người dùng để hiển thị cùng kết quả, kèm các token không khớp với feature nào
+    def _input_summary(self, input_data):
+        return {
+            'experience_years': input_data.get('experience', 'N/A'),
+            'position': input_data.get('position_level', 'N/A'),
+            'city': input_data.get('city', 'N/A'),
+            'skills_count': len(str(input_data.get('skills', '')).split(',')),
+            'unmatched_tokens': self.feature_builder.unmatched_tokens(input_data)
+        }
+    
+    # Mã hóa nhiều inputs thành một ma trận 2 chiều (mỗi input một hàng)
+    def encode_batch(self, input_list):
+        matrix = np.zeros((len(input_list), len(self.features_list)), dtype=np.float64)
+        if len(input_list) >= VECTORIZED_ENCODE_MIN_BATCH:
+            # Batch lớn: mã hóa theo cột (mỗi giá trị unique chỉ xử lý một lần)
+            features = self.feature_builder.transform(pd.DataFrame(input_list))
+            positions = np.asarray(self._builder_positions)
+            used = np.flatnonzero(positions >= 0)
+            matrix[:, positions[used]] = features[:, used].toarray()
+            return matrix
+        for row, input_data in zip(matrix, input_list):
+            self._encode_into(input_data, row)
+        return matrix
+    
+    # Dự đoán cho nhiều inputs cùng lúc (một lần gọi model.predict)
     def predict_batch(self, input_list):
-
-        predictions = []
-        for input_data in input_list:
-            pred = self.predict(input_data)
-            predictions.append(pred)
+        if len(input_list) == 0:
+            return []
+        
+        predictions, _ = self._predict_inputs(input_list)
+        return predictions.tolist()
+    
+    # Mã hóa và dự đoán nhiều inputs (kèm khoảng dự đoán nếu with_interval=True)
+    def _predict_inputs(self, input_list, with_interval=False):
+        return self._predict_matrix(self._encode_inputs(input_list), with_interval)
+    
+    # Mã hóa nhiều inputs thành ma trận features (ghi thời gian vào metrics preprocess)
+    def _encode_inputs(self, input_list):
+        started = time.perf_counter()
+        features = self.encode_batch(input_list)
+        PREPROCESS_LATENCY.observe(time.perf_counter() - started)
+        return features
+    
+    # Dự đoán kèm thông tin chi tiết cho nhiều inputs cùng lúc
+    def predict_with_details_batch(self, input_list):
+        results = [None] * len(input_list)
+        keys = [None] * len(input_list)
+        
+        # Lấy các kết quả đã có trong cache, chỉ dự đoán phần còn lại
+        if self.cache is not None:
+            for i, input_data in enumerate(input_list):
+                keys[i] = self._cache_key(input_data)
+                results[i] = self._get_cached(keys[i], input_data)
         
-        return predictions
+        missing = [i for i, result in enumerate(results) if result is None]
+        if not missing:
+            return results
+        features = self._encode_inputs([input_list[i] for i in missing])
+        predictions, bounds = self._predict_matrix(features, with_interval=True)
+        
+        started = time.perf_counter()
+        segments = self._assign_segments(features, predictions)
+        for j, i in enumerate(missing):
+            interval = None if bounds is None else (bounds[0][j], bounds[1][j])
+            segment = None if segments is None else segments[j]
+            results[i] = self._build_result(input_list[i], predictions[j], interval, segment)
+            self._put_cached(keys[i], results[i])
+        BUILD_RESULT_LATENCY.observe(time.perf_counter() - started)
+        
+        return results
+    
+    # Báo cáo bộ nhớ của worker hiện tại (kèm phần bộ nhớ của bundle được map)
+    def get_memory_report(self):
+        report = memory_report(self.bundle_dir if self.model_backend == 'bundle' else None)
+        if self.model_backend == 'bundle':
+            report['bundle_arrays_mb'] = self.model.nbytes_mb()
+        return report
+    
+    # Trả về thống kê cache dự đoán
+    def get_cache_stats(self):
+        if self.cache is None:
+            return {'enabled': False}
+        return {'enabled': True, **self.cache.stats()}
     
     # Trả về thông tin về mô hình
     def get_model_info(self):
         return {
             'model_type': self.model_info.get('model_type', 'N/A'),
+            'model_version': self.model_version,
+            'model_backend': self.model_backend,
             'n_features': len(self.features_list),
             'test_mae': self.model_info.get('test_mae', 'N/A'),
             'test_rmse': self.model_info.get('test_rmse', 'N/A'),
             'test_r2': self.model_info.get('test_r2', 'N/A'),
-            'best_params': self.model_info.get('best_params', {})
+            'best_params': self.model_info.get('best_params', {}),
+            'load_seconds': self.load_seconds,
+            'prediction_interval': self.interval.to_dict() if self.interval is not None else {'method': 'mae'},
+            'market_segments': self.segments.n_clusters if self.segments is not None else None,
+            'cache': self.get_cache_stats()
         }
 
 
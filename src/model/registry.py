@@ -0,0 +1,275 @@
+import argparse
+import os
+import shutil
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.utils.config import (
+    MODELS_DIR, MODEL_REGISTRY_DIR, MODEL_WATCH_INTERVAL, STARTUP_MODE, STARTUP_PRELOAD_MODULES
+)
+from src.utils.startup import STARTUP
+
+# SalaryPredictor (pandas, joblib, sklearn) chỉ được import khi cần load mô hình để app khởi động nhanh
+STARTUP_MODES = ['background', 'lazy', 'eager']
+
+# Các file của một phiên bản mô hình (scaler, feature encoder và bundle là tùy chọn)
+VERSION_FILES = ['best_model.pkl', 'scaler.pkl', 'features_list.json', 'model_info.json', 'feature_encoder.pkl']
+REQUIRED_FILES = ['best_model.pkl', 'features_list.json']
+BUNDLE_NAME = 'best_model_bundle'
+COMPACT_BUNDLE_NAME = 'compact_model_bundle'  # Forest thu gọn (src/model/regression.py), tùy chọn
+SEGMENTS_NAME = 'market_segments'  # Phân khúc thị trường (src/model/clustering.py), tùy chọn
+
+# Input mẫu dùng để warm up mô hình mới trước khi đưa vào phục vụ
+WARMUP_INPUT = {
+    'job_title': 'Data Analyst',
+    'city': 'Hồ Chí Minh',
+    'experience': '2-5 năm',
+    'position_level': 'Nhân viên',
+    'skills': 'Python, SQL, Excel',
+    'job_fields': 'IT, Data Analysis'
+}
+
+
+# Thư mục chứa các phiên bản mô hình: registry/<version>/ và file ACTIVE trỏ tới phiên bản đang dùng
+class ModelRegistry:
+
+    def __init__(self, root=None):
+        self.root = Path(root or MODEL_REGISTRY_DIR)
+
+    # Đường dẫn thư mục của một phiên bản
+    def version_dir(self, version):
+        return self.root / version
+
+    # Danh sách các phiên bản (sắp xếp theo tên)
+    def list_versions(self):
+        if not self.root.exists():
+            return []
+        return sorted(
+            p.name for p in self.root.iterdir()
+            if p.is_dir() and not p.name.startswith('.') and (p / 'best_model.pkl').exists()
+        )
+
+    # Phiên bản đang được kích hoạt (None nếu chưa có)
+    def active_version(self):
+        try:
+            return (self.root / 'ACTIVE').read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    # Kích hoạt một phiên bản (ghi file tạm rồi đổi tên để thao tác là atomic)
+    def activate(self, version):
+        if version not in self.list_versions():
+            raise ValueError(f"Không tìm thấy phiên bản mô hình: {version}")
+        tmp = self.root / f'.ACTIVE.tmp-{os.getpid()}'
+        tmp.write_text(version)
+        os.replace(tmp, self.root / 'ACTIVE')
+        print(f"Activated model version: {version}")
+
+    # Đưa các artifacts trong source_dir vào registry thành một phiên bản mới
+    def publish(self, source_dir=None, version=None, activate=True, export_bundle=True):
+        source_dir = Path(source_dir or MODELS_DIR)
+        version = version or datetime.now().strftime('%Y%m%d-%H%M%S')
+
+        missing = [name for name in REQUIRED_FILES if not (source_dir / name).exists()]
+        if missing:
+            raise FileNotFoundError(f"Thiếu artifacts trong {source_dir}: {', '.join(missing)}")
+        if self.version_dir(version).exists():
+            raise ValueError(f"Phiên bản đã tồn tại: {version}")
+
+        tmp_dir = self.root / f'.{version}.tmp-{os.getpid()}'
+        tmp_dir.mkdir(parents=True)
+        for name in VERSION_FILES:
+            if (source_dir / name).exists():
+                shutil.copy2(source_dir / name, tmp_dir / name)
+        for name in (COMPACT_BUNDLE_NAME, SEGMENTS_NAME):
+            if (source_dir / name).exists():
+                shutil.copytree(source_dir / name, tmp_dir / name)
+        if export_bundle:
+            from src.model.model_bundle import export_model_bundle
+            try:
+                export_model_bundle(tmp_dir / 'best_model.pkl', tmp_dir / BUNDLE_NAME)
+            except ValueError as e:
+                print(f"Skipping model bundle: {str(e)}")
+        os.replace(tmp_dir, self.version_dir(version))
+        print(f"Published model version: {version}")
+
+        if activate:
+            self.activate(version)
+        return version
+
+    # Tạo SalaryPredictor cho một phiên bản
+    def load_predictor(self, version, **kwargs):
+        from src.model.predictor import SalaryPredictor
+        return SalaryPredictor.from_directory(self.version_dir(version), **kwargs)
+
+
+# Giữ predictor đang phục vụ và thay thế nó một cách atomic khi có phiên bản mới.
+# state: 'idle' (chưa load), 'loading', 'ready' hoặc 'failed' (lần load đầu tiên lỗi)
+class ModelManager:
+
+    def __init__(self, registry=None, predictor=None, version=None):
+        self.registry = registry or ModelRegistry()
+        self.predictor = predictor
+        self.version = version or (predictor.model_version if predictor is not None else None)
+        self.loaded_at = time.time() if predictor is not None else None
+        self.state = 'ready' if predictor is not None else 'idle'
+        self.error = None
+        self.lazy = False
+
+        self._reload_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._loaded = threading.Event()
+        if predictor is not None:
+            self._loaded.set()
+        self._watcher = None
+        self._stop_watching = threading.Event()
+
+    # Predictor hiện tại; request giữ tham chiếu này nên vẫn dùng phiên bản cũ đến khi xong.
+    # Ở chế độ lazy, request đầu tiên load predictor (các request khác chờ cùng lần load đó)
+    def get(self):
+        predictor = self.predictor
+        if predictor is None and self.lazy and self.state != 'failed':
+            self.ensure_loaded()
+            predictor = self.predictor
+        return predictor
+
+    @property
+    def ready(self):
+        return self.state == 'ready'
+
+    # Bắt đầu load predictor theo chế độ khởi động ('background', 'lazy' hoặc 'eager')
+    def start(self, mode=None):
+        mode = mode or STARTUP_MODE
+        if mode not in STARTUP_MODES:
+            raise ValueError(f"Invalid startup mode: {mode}")
+        if mode == 'eager':
+            self.ensure_loaded()
+        elif mode == 'background':
+            if self._claim_load():
+                threading.Thread(target=self._initial_load, name='model-loader', daemon=True).start()
+        else:
+            self.lazy = True
+        self.start_watcher()
+
+    # Chuyển từ 'idle' sang 'loading'; chỉ một thread được load lần đầu
+    def _claim_load(self):
+        with self._start_lock:
+            if self.state != 'idle':
+                return False
+            self.state = 'loading'
+            return True
+
+    # Load predictor nếu chưa có (chờ nếu đang được load ở thread khác)
+    def ensure_loaded(self, timeout=None):
+        if self._claim_load():
+            self._initial_load()
+        self._loaded.wait(timeout)
+        return self.predictor
+
+    # Lần load đầu tiên: import các module nặng, load artifacts và ghi báo cáo khởi động
+    def _initial_load(self):
+        try:
+            STARTUP.import_modules(STARTUP_PRELOAD_MODULES)
+            self.reload()
+            for name, seconds in self.predictor.load_timings.items():
+                STARTUP.add(f'load {name}', seconds)
+            STARTUP.mark_ready()
+            STARTUP.print_report()
+        except Exception as e:
+            self.state = 'failed'
+            self.error = str(e)
+            print(f"Error loading predictor: {str(e)}")
+        finally:
+            self._loaded.set()
+
+    # Load phiên bản đang active trong registry, hoặc các artifacts mặc định trong models/
+    def _build_predictor(self, version):
+        if version is None:
+            from src.model.predictor import SalaryPredictor
+            return SalaryPredictor()
+        return self.registry.load_predictor(version)
+
+    # Load predictor mới ngoài luồng request, warm up rồi thay thế predictor hiện tại
+    def reload(self, version=None):
+        with self._reload_lock:
+            version = version or self.registry.active_version()
+            new_predictor = self._build_predictor(version)
+            with STARTUP.stage('warmup') if self.state != 'ready' else nullcontext():
+                new_predictor.predict_batch([WARMUP_INPUT])
+
+            self.predictor = new_predictor
+            self.version = version or new_predictor.model_version
+            self.loaded_at = time.time()
+            self.state = 'ready'
+            self.error = None
+            print(f"Model version {self.version} is now serving")
+            return self.status()
+
+    # Thông tin phiên bản đang phục vụ
+    def status(self):
+        return {
+            'state': self.state,
+            'active_version': self.version,
+            'model_version': self.predictor.model_version if self.predictor is not None else None,
+            'loaded_at': self.loaded_at,
+            'registry_versions': self.registry.list_versions()
+        }
+
+    # Thread nền theo dõi file ACTIVE của registry và tự reload khi phiên bản thay đổi
+    def start_watcher(self, interval=None):
+        interval = interval or MODEL_WATCH_INTERVAL
+        if interval <= 0 or self._watcher is not None:
+            return
+
+        def watch():
+            while not self._stop_watching.wait(interval):
+                active = self.registry.active_version()
+                if active is not None and active != self.version:
+                    try:
+                        self.reload(active)
+                    except Exception as e:
+                        print(f"Error reloading model version {active}: {str(e)}")
+
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(target=watch, name='model-watcher', daemon=True)
+        self._watcher.start()
+
+    # Dừng thread theo dõi
+    def stop_watcher(self):
+        self._stop_watching.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Quản lý các phiên bản mô hình')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    publish_parser = subparsers.add_parser('publish', help='Đưa artifacts trong models/ vào registry')
+    publish_parser.add_argument('--source', default=str(MODELS_DIR))
+    publish_parser.add_argument('--version')
+    publish_parser.add_argument('--no-activate', action='store_true')
+
+    activate_parser = subparsers.add_parser('activate', help='Kích hoạt một phiên bản')
+    activate_parser.add_argument('version')
+
+    subparsers.add_parser('list', help='Liệt kê các phiên bản')
+
+    args = parser.parse_args()
+    registry = ModelRegistry()
+
+    if args.command == 'publish':
+        registry.publish(args.source, args.version, activate=not args.no_activate)
+    elif args.command == 'activate':
+        registry.activate(args.version)
+    else:
+        active = registry.active_version()
+        for version in registry.list_versions():
+            print(f"{'*' if version == active else ' '} {version}")
@@ -0,0 +1,286 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import train_test_split
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.utils.config import (
+    BEST_MODEL_PATH, FEATURES_LIST_PATH, FEATURED_DATA_FILE, COMPACT_MODEL_BUNDLE_DIR, TEST_SIZE, VALIDATION_SIZE,
+    RANDOM_STATE, COMPACTION_MAE_BUDGET, COMPACTION_MIN_TREES, COMPACTION_DEPTHS, COMPACTION_DISTILL_GRID, PREDICTION_INTERVAL_ALPHA, TRAIN_N_JOBS
+)
+from src.data.data_loader import load_feature_matrix
+from src.model.intervals import TreeQuantileInterval
+from src.model.model_bundle import save_engine_bundle
+from src.model.tree_engine import ENGINE_ARRAYS, FlatTreeEnsemble
+
+TARGET = 'salary_avg_vnd'
+
+
+# Tạo forest mới chỉ gồm các cây trong trees (theo thứ tự), cắt mỗi cây ở độ sâu max_depth:
+# node ở độ sâu max_depth thành lá với giá trị là trung bình mẫu train tại node đó (sklearn lưu sẵn),
+# các node bên dưới bị bỏ nên mảng node nhỏ lại và engine duyệt ít bước hơn
+def compact_engine(engine, trees=None, max_depth=None):
+    if engine.aggregation != 'mean':
+        raise ValueError("Chỉ thu gọn được forest lấy trung bình các cây")
+
+    trees = range(len(engine.roots)) if trees is None else trees
+    depth_cap = engine.max_depth if max_depth is None else min(max_depth, engine.max_depth)
+    parts = {name: [] for name in ENGINE_ARRAYS}
+    offset = 0
+    reached = 0
+
+    for tree in trees:
+        # Duyệt theo tầng từ gốc tới depth_cap; node lá trỏ về chính nó
+        level = np.asarray([engine.roots[tree]], dtype=np.intp)
+        levels = [level]
+        for depth in range(depth_cap):
+            left = engine.children[2 * level]
+            internal = left != level
+            if not internal.any():
+                break
+            level = np.column_stack([left[internal], engine.children[2 * level[internal] + 1]]).ravel()
+            levels.append(level)
+        reached = max(reached, len(levels) - 1)
+
+        old = np.concatenate(levels)
+        is_leaf = engine.children[2 * old] == old
+        is_leaf[len(old) - len(levels[-1]):] = True
+        new_index = np.arange(len(old)) + offset
+        sorter = np.argsort(old)
+
+        # Chỉ số mới của các node con (chỉ cần cho node không phải lá, con của chúng luôn ở tầng kế tiếp)
+        children = np.repeat(new_index, 2).reshape(-1, 2)
+        for side in (0, 1):
+            child = engine.children[2 * old[~is_leaf] + side]
+            children[~is_leaf, side] = sorter[np.searchsorted(old, child, sorter=sorter)] + offset
+
+        parts['roots'].append(np.asarray([offset]))
+        parts['children'].append(children.ravel())
+        parts['feature'].append(np.where(is_leaf, 0, engine.feature[old]))
+        parts['threshold'].append(np.where(is_leaf, np.inf, engine.threshold[old]))
+        parts['value'].append(engine.value[old])
+        parts['missing_left'].append(engine.missing_left[old])
+        offset += len(old)
+
+    arrays = {
+        'roots': np.concatenate(parts['roots']).astype(np.int64),
+        'children': np.concatenate(parts['children']).astype(np.intp),
+        'feature': np.concatenate(parts['feature']).astype(np.intp),
+        'threshold': np.concatenate(parts['threshold']).astype(np.float64),
+        'value': np.concatenate(parts['value']).astype(np.float64),
+        'missing_left': np.concatenate(parts['missing_left']).astype(np.bool_),
+    }
+    meta = dict(engine.meta)
+    meta.update({'n_trees': int(len(arrays['roots'])), 'n_nodes': offset, 'max_depth': reached})
+    return FlatTreeEnsemble(arrays, meta)
+
+
+# Thứ tự chọn cây tham lam: mỗi bước thêm cây làm MAE của trung bình các cây đã chọn giảm nhiều nhất.
+# Trả về thứ tự cây và MAE sau k cây đầu tiên (k = 1..n_trees)
+def greedy_tree_order(tree_values, y):
+    y = np.asarray(y, dtype=np.float64)
+    remaining = list(range(tree_values.shape[1]))
+    total = np.zeros(len(y))
+    order, curve = [], []
+
+    for k in range(1, tree_values.shape[1] + 1):
+        candidates = tree_values[:, remaining]
+        mae = np.abs((total[:, None] + candidates) / k - y[:, None]).mean(axis=0)
+        best = int(np.argmin(mae))
+        tree = remaining.pop(best)
+        order.append(tree)
+        curve.append(float(mae[best]))
+        total += tree_values[:, tree]
+
+    return np.asarray(order), np.asarray(curve)
+
+
+# MAE của trung bình k cây đầu tiên theo thứ tự order, với mọi k
+def prefix_mae(tree_values, y, order):
+    y = np.asarray(y, dtype=np.float64)
+    means = np.cumsum(tree_values[:, order], axis=1) / np.arange(1, len(order) + 1)
+    return np.abs(means - y[:, None]).mean(axis=0)
+
+
+# Chưng cất: train forest nhỏ trên dự đoán của forest gốc (nhãn không nhiễu nên cây nông vẫn khớp tốt)
+def distill_forest(teacher, X_train, n_estimators, max_depth, random_state=RANDOM_STATE, n_jobs=TRAIN_N_JOBS):
+    student = RandomForestRegressor(n_estimators=n_estimators, max_depth=max_depth,
+                                    random_state=random_state, n_jobs=n_jobs)
+    student.fit(X_train, teacher.predict(X_train))
+    return FlatTreeEnsemble.from_model(student)
+
+
+# Độ trễ dự đoán (ms, median) với một batch
+def _latency_ms(engine, X, batch_size, repeat=30):
+    batch = np.ascontiguousarray(X[:batch_size])
+    engine.predict(batch)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        engine.predict(batch)
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+# Thông số của một forest: số cây, độ sâu, số node, dung lượng, MAE trên tập kiểm tra
+def _describe(method, engine, mae):
+    return {
+        'method': method,
+        'n_trees': int(len(engine.roots)),
+        'max_depth': int(engine.max_depth),
+        'n_nodes': int(len(engine.value)),
+        'size_mb': round(engine.nbytes_mb(), 2),
+        'mae': float(mae)
+    }
+
+
+# Thu gọn forest trong giới hạn MAE: tập validation (X_val, y_val) được chia đôi, một nửa để chọn thứ tự cây,
+# nửa còn lại để kiểm tra MAE <= MAE của forest gốc * (1 + mae_budget). Thử mọi độ sâu trong depths,
+# với mỗi độ sâu lấy số cây ít nhất còn trong giới hạn; nếu có X_train thì thử thêm forest chưng cất.
+# Chọn phương án có chi phí duyệt (số cây x độ sâu) nhỏ nhất. Trả về (engine, report)
+def compact_forest(model, X_val, y_val, X_train=None, mae_budget=COMPACTION_MAE_BUDGET, depths=None,
+                   distill_grid=None, min_trees=COMPACTION_MIN_TREES, alpha=PREDICTION_INTERVAL_ALPHA,
+                   random_state=RANDOM_STATE):
+    engine = model if isinstance(model, FlatTreeEnsemble) else FlatTreeEnsemble.from_model(model)
+    depths = COMPACTION_DEPTHS if depths is None else depths
+    distill_grid = COMPACTION_DISTILL_GRID if distill_grid is None else distill_grid
+
+    X_val = np.ascontiguousarray(X_val, dtype=np.float32)
+    y_val = np.asarray(y_val, dtype=np.float64)
+    rows = np.random.default_rng(random_state).permutation(len(y_val))
+    select, check = rows[:len(rows) // 2], rows[len(rows) // 2:]
+
+    reference_mae = float(np.abs(engine.predict(X_val[check]) - y_val[check]).mean())
+    limit = reference_mae * (1 + mae_budget)
+    original = _describe('original', engine, reference_mae)
+    candidates = []
+
+    # Chọn cây và cắt độ sâu
+    for depth in [engine.max_depth] + sorted((d for d in depths if d < engine.max_depth), reverse=True):
+        capped = engine if depth == engine.max_depth else compact_engine(engine, max_depth=depth)
+        order, _ = greedy_tree_order(capped.tree_predictions(X_val[select]), y_val[select])
+        check_mae = prefix_mae(capped.tree_predictions(X_val[check]), y_val[check], order)
+        skip = min(min_trees, len(order)) - 1
+        within = np.flatnonzero(check_mae[skip:] <= limit) + skip
+        if len(within) == 0:
+            print(f"   depth {depth:3d}: exceeds MAE budget with all {len(order)} trees")
+            break
+        k = int(within[0]) + 1
+        compacted = compact_engine(capped, trees=order[:k])
+        candidates.append((compacted, _describe(f'select_trees(depth={depth})', compacted, check_mae[k - 1])))
+        print(f"   depth {depth:3d}: {k} trees, MAE {check_mae[k - 1]:,.4g}")
+
+    # Chưng cất thành forest nhỏ hơn (chỉ thử những cấu hình rẻ hơn phương án tốt nhất hiện có)
+    if X_train is not None:
+        best_cost = min((c[1]['n_trees'] * c[1]['max_depth'] for c in candidates), default=np.inf)
+        for n_estimators, max_depth in sorted(distill_grid, key=lambda p: p[0] * p[1]):
+            if n_estimators * max_depth >= best_cost or n_estimators < min_trees:
+                continue
+            student = distill_forest(engine, X_train, n_estimators, max_depth, random_state)
+            mae = float(np.abs(student.predict(X_val[check]) - y_val[check]).mean())
+            print(f"   distill {n_estimators} trees, depth {max_depth}: MAE {mae:,.4g}")
+            if mae <= limit:
+                candidates.append((student, _describe(f'distill({n_estimators}x{max_depth})', student, mae)))
+                break
+
+    if not candidates:
+        compacted, chosen = engine, dict(original, method='original')
+    else:
+        compacted, chosen = min(candidates, key=lambda c: (c[1]['n_trees'] * c[1]['max_depth'], c[1]['n_nodes']))
+
+    # Hiệu chỉnh lại khoảng dự đoán cho forest mới (phân vị các cây thay đổi khi bớt cây)
+    interval = TreeQuantileInterval.calibrate(compacted.tree_predictions(X_val[select]), y_val[select], alpha)
+    interval_report = {**interval.to_dict(), 'holdout': interval.evaluate(compacted.tree_predictions(X_val[check]),
+                                                                          y_val[check])}
+
+    for summary, target in ((original, engine), (chosen, compacted)):
+        summary['latency_ms_1'] = _latency_ms(target, X_val, 1)
+        summary['latency_ms_32'] = _latency_ms(target, X_val, 32)
+
+    report = {
+        'mae_budget': mae_budget,
+        'reference_mae': reference_mae,
+        'mae_limit': limit,
+        'original': original,
+        'chosen': chosen,
+        'candidates': [summary for _, summary in candidates],
+        'prediction_interval': interval_report
+    }
+    return compacted, report
+
+
+# Lưu forest thu gọn thành bundle riêng (không thay best_model_bundle), kèm báo cáo trong meta.json
+def save_compact_model(engine, report, model_path=None, bundle_dir=None, feature_names=None):
+    return save_engine_bundle(
+        engine, bundle_dir or COMPACT_MODEL_BUNDLE_DIR, model_path or BEST_MODEL_PATH, feature_names,
+        extra_meta={'compaction': {k: v for k, v in report.items() if k != 'prediction_interval'},
+                    'prediction_interval': report['prediction_interval']}
+    )
+
+
+# Chia các dòng thành train/validation/test: tập test tách trước như notebook (chỉ dùng để báo cáo metrics),
+# validation là validation_size phần của tập train, dùng để thu gọn forest và hiệu chỉnh khoảng dự đoán
+def split_rows(rows, test_size=TEST_SIZE, validation_size=VALIDATION_SIZE, random_state=RANDOM_STATE):
+    train_rows, test_rows = train_test_split(rows, test_size=test_size, random_state=random_state)
+    train_rows, val_rows = train_test_split(train_rows, test_size=validation_size, random_state=random_state)
+    return train_rows, val_rows, test_rows
+
+
+# Chia lại tập train/validation/test giống scripts/train_model.py (cùng tỉ lệ và random_state)
+def held_out_split(features, data_path=None, test_size=TEST_SIZE, validation_size=VALIDATION_SIZE,
+                   random_state=RANDOM_STATE):
+    X, y = load_feature_matrix(features, data_path or FEATURED_DATA_FILE, TARGET)
+    rows = np.flatnonzero(~(np.isnan(X).any(axis=1) | np.isnan(y)))
+    train_rows, val_rows, test_rows = split_rows(rows, test_size, validation_size, random_state)
+    return X[train_rows], y[train_rows], X[val_rows], y[val_rows], X[test_rows], y[test_rows]
+
+
+# So sánh forest gốc và forest đã thu gọn
+def print_report(report):
+    table = pd.DataFrame([report['original'], report['chosen']]).set_index('method')
+    print(table.to_string(float_format=lambda v: f'{v:,.4g}'))
+    original, chosen = report['original'], report['chosen']
+    print(f"\n   MAE: {chosen['mae'] / original['mae'] - 1:+.2%} (budget {report['mae_budget']:+.2%})")
+    print(f"   Size: {chosen['size_mb'] / original['size_mb']:.1%} of original")
+    print(f"   Latency (1 row): {original['latency_ms_1'] / chosen['latency_ms_1']:.1f}x faster")
+    print(f"   Interval coverage: {report['prediction_interval']['holdout']['coverage']:.1%}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Thu gọn forest đã train trong giới hạn MAE trên tập validation')
+    parser.add_argument('--model', default=str(BEST_MODEL_PATH), help='File mô hình (joblib)')
+    parser.add_argument('--features', default=str(FEATURES_LIST_PATH), help='File features_list.json')
+    parser.add_argument('--data', default=str(FEATURED_DATA_FILE), help='File featured_data.csv')
+    parser.add_argument('--output-dir', default=str(COMPACT_MODEL_BUNDLE_DIR), help='Thư mục bundle thu gọn')
+    parser.add_argument('--budget', type=float, default=COMPACTION_MAE_BUDGET,
+                        help='MAE được tăng tối đa bao nhiêu so với forest gốc (0.01 = 1%%)')
+    parser.add_argument('--no-distill', action='store_true', help='Không thử chưng cất thành forest nhỏ hơn')
+    args = parser.parse_args()
+
+    print("="*70)
+    print("Compacting forest")
+    print("="*70)
+
+    with open(args.features, 'r') as f:
+        features = json.load(f)
+    model = joblib.load(args.model)
+    X_train, y_train, X_val, y_val, X_test, y_test = held_out_split(features, args.data)
+    print(f"Validation set: {len(y_val):,} rows, test set: {len(y_test):,} rows, MAE budget {args.budget:+.1%}\n")
+
+    engine, report = compact_forest(model, X_val, y_val, None if args.no_distill else X_train,
+                                    mae_budget=args.budget)
+    print()
+    print_report(report)
+    original_test_mae = float(np.abs(FlatTreeEnsemble.from_model(model).predict(X_test) - y_test).mean())
+    compact_test_mae = float(np.abs(engine.predict(X_test) - y_test).mean())
+    print(f"   Test MAE: {original_test_mae:,.4g} -> {compact_test_mae:,.4g}")
+    save_compact_model(engine, report, args.model, args.output_dir, features)
+    print("\nServe it with SALARY_USE_COMPACT_MODEL=1")
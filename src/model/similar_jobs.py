@@ -0,0 +1,312 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.utils.config import (
+    FEATURED_DATA_FILE, SIMILAR_JOBS_DIR, SIMILAR_JOBS_K, SIMILAR_JOBS_WEIGHTS, SIMILAR_JOBS_EXPERIENCE_SCALE,
+    SIMILAR_JOBS_COLUMNS, POSITION_ORDER
+)
+from src.model.model_bundle import artifact_version
+
+INDEX_FORMAT_VERSION = 1
+TARGET = 'salary_avg_vnd'
+TOKEN_PREFIXES = ('has_skill_', 'field_')
+CITY_PREFIX = 'city_'
+INDEX_ARRAYS = ('token_sets', 'token_counts', 'attr_cities', 'attr_city_counts', 'attr_position',
+                'attr_experience', 'group_tokens', 'group_attrs', 'offsets', 'rows')
+_M1, _M2, _M4, _H01 = (np.uint64(m) for m in (0x5555555555555555, 0x3333333333333333, 0x0f0f0f0f0f0f0f0f,
+                                                0x0101010101010101))
+
+
+# Gói ma trận 0/1 (n, m) thành bitmask uint64 (n, ceil(m / 64)), bit j là cột j
+def pack_bits(bits):
+    bits = np.asarray(bits, dtype=bool)
+    n_words = max(1, -(-bits.shape[1] // 64))
+    padded = np.zeros((bits.shape[0], n_words * 64), dtype=bool)
+    padded[:, :bits.shape[1]] = bits
+    return np.packbits(padded, axis=1, bitorder='little').view('<u8')
+
+
+# Đếm bit 1 của từng số uint64 bằng phép toán bit (SWAR), dùng khi numpy < 2.0 chưa có np.bitwise_count
+def _bitwise_count_swar(x):
+    x = np.asarray(x, dtype=np.uint64)
+    x = x - ((x >> np.uint64(1)) & _M1)
+    x = (x & _M2) + ((x >> np.uint64(2)) & _M2)
+    x = (x + (x >> np.uint64(4))) & _M4
+    return (x * _H01) >> np.uint64(56)
+
+
+_bitwise_count = getattr(np, 'bitwise_count', _bitwise_count_swar)
+
+
+# Số bit 1 trên mỗi dòng của bitmask uint64 (n, words)
+def popcount(masks):
+    return _bitwise_count(masks).sum(axis=1, dtype=np.int32)
+
+
+# Hệ số Jaccard giữa bitmask truy vấn (1, words) và các bitmask (n, words). Hai tập rỗng coi như giống nhau
+def _jaccard(masks, counts, query, query_count):
+    inter = popcount(masks & query)
+    union = counts + query_count - inter
+    return np.where(union > 0, inter / np.maximum(union, 1), 1.0)
+
+
+# Mã của các giá trị khác nhau theo thứ tự xuất hiện đầu tiên: trả về (chỉ số dòng đại diện, mã của từng dòng)
+def _factorize(keys):
+    _, first, inverse = np.unique(keys, axis=0 if keys.ndim > 1 else None, return_index=True, return_inverse=True)
+    order = np.argsort(first, kind='stable')
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return first[order], rank[inverse.ravel()].astype(np.int32)
+
+
+# Chỉ mục tìm tin tuyển dụng tương tự trên featured_data, được phân rã thành:
+#   - các tập skills/fields khác nhau (bitmask) và các bộ (thành phố, cấp bậc, kinh nghiệm) khác nhau,
+#   - các nhóm tin có cùng (tập skills/fields, bộ thuộc tính), mỗi nhóm trỏ tới danh sách dòng của nó.
+# Mỗi truy vấn chấm điểm chính xác từng tập skills/fields (AND + popcount) và từng bộ thuộc tính,
+# điểm của nhóm là tổng hai điểm thành phần (hai phép gather), rồi lấy top-k nhóm
+class SimilarJobsIndex:
+
+    def __init__(self, arrays, postings, meta):
+        for name in INDEX_ARRAYS:
+            setattr(self, name, np.asarray(arrays[name]))
+        self.postings = postings
+        self.meta = meta
+        self.token_features = meta['token_features']
+        self.city_features = meta['city_features']
+        self.weights = meta['weights']
+        self.experience_scale = meta['experience_scale']
+        # Các cột thông tin tin tuyển dụng dạng mảng để tạo kết quả mà không cần DataFrame.iloc
+        self._columns = {name: postings[name].to_numpy(dtype=object) for name in postings.columns}
+        self._bound = None
+
+    @property
+    def n_groups(self):
+        return len(self.group_tokens)
+
+    @property
+    def n_jobs(self):
+        return len(self.rows)
+
+    # Tạo chỉ mục từ các cột 0/1 (skills/fields và cities), cấp bậc, kinh nghiệm và bảng thông tin tin tuyển dụng
+    @classmethod
+    def build(cls, token_bits, city_bits, position, experience, postings, token_features, city_features,
+              weights=None, experience_scale=SIMILAR_JOBS_EXPERIENCE_SCALE):
+        tokens, cities = pack_bits(token_bits), pack_bits(city_bits)
+        position = np.asarray(position, dtype=np.float64)
+        experience = np.asarray(experience, dtype=np.float64)
+
+        token_first, token_code = _factorize(tokens)
+        attrs = np.column_stack([cities, position.view(np.uint64), experience.view(np.uint64)])
+        attr_first, attr_code = _factorize(attrs)
+        # Nhóm = cặp (tập skills/fields, bộ thuộc tính); các tin trong nhóm có cùng điểm với mọi truy vấn
+        group_first, group = _factorize(token_code.astype(np.int64) * len(attr_first) + attr_code)
+
+        arrays = {
+            'token_sets': np.ascontiguousarray(tokens[token_first]),
+            'attr_cities': np.ascontiguousarray(cities[attr_first]),
+            'attr_position': position[attr_first],
+            'attr_experience': experience[attr_first],
+            'group_tokens': token_code[group_first],
+            'group_attrs': attr_code[group_first],
+            'offsets': np.concatenate([[0], np.cumsum(np.bincount(group, minlength=len(group_first)))]),
+            'rows': np.argsort(group, kind='stable')
+        }
+        arrays['token_counts'] = popcount(arrays['token_sets'])
+        arrays['attr_city_counts'] = popcount(arrays['attr_cities'])
+        arrays['offsets'] = arrays['offsets'].astype(np.int64)
+        arrays['rows'] = arrays['rows'].astype(np.int64)
+        meta = {
+            'token_features': list(token_features),
+            'city_features': list(city_features),
+            'weights': dict(weights or SIMILAR_JOBS_WEIGHTS),
+            'experience_scale': experience_scale,
+            'n_jobs': int(len(group)),
+            'n_groups': int(len(group_first)),
+            'n_token_sets': int(len(token_first)),
+            'n_attributes': int(len(attr_first))
+        }
+        return cls(arrays, postings.reset_index(drop=True), meta)
+
+    # Vị trí các cột của chỉ mục trong features_list của mô hình (tính một lần cho mỗi features_list)
+    def bind(self, feature_names):
+        if self._bound is not None and self._bound[0] == list(feature_names):
+            return self._bound[1]
+        index = {name: i for i, name in enumerate(feature_names)}
+        bound = tuple(
+            np.array([index.get(name, -1) for name in names])
+            for names in (self.token_features, self.city_features, ['position_level_encoded', 'experience_years'])
+        )
+        self._bound = (list(feature_names), bound)
+        return bound
+
+    # Điểm tương đồng (0-1) của truy vấn với mọi nhóm: Jaccard skills/fields, Jaccard thành phố,
+    # độ gần cấp bậc và kinh nghiệm, lấy trung bình có trọng số
+    def scores(self, row, feature_names):
+        token_columns, city_columns, numeric_columns = self.bind(feature_names)
+        row = np.asarray(row, dtype=np.float64).ravel()
+        values = [np.where(columns >= 0, row[np.maximum(columns, 0)], 0) > 0
+                  for columns in (token_columns, city_columns)]
+        position, experience = (row[c] if c >= 0 else 0.0 for c in numeric_columns)
+
+        weights = self.weights
+        total = sum(weights.values())
+        token_score = (weights['tokens'] / total) * _jaccard(
+            self.token_sets, self.token_counts, pack_bits(values[0][None]), int(values[0].sum()))
+        attr_score = weights['city'] * _jaccard(
+            self.attr_cities, self.attr_city_counts, pack_bits(values[1][None]), int(values[1].sum()))
+        attr_score += weights['position'] * (1 - np.abs(self.attr_position - position) / (len(POSITION_ORDER) - 1))
+        attr_score += weights['experience'] * np.maximum(
+            0, 1 - np.abs(self.attr_experience - experience) / self.experience_scale)
+        attr_score /= total
+        return token_score[self.group_tokens] + attr_score[self.group_attrs]
+
+    # Top-k tin tương tự nhất: (chỉ số dòng trong featured_data, điểm), điểm giảm dần
+    def query(self, row, feature_names, k=SIMILAR_JOBS_K):
+        k = min(k, self.n_jobs)
+        if k <= 0:
+            return []
+        score = self.scores(row, feature_names)
+        # Mỗi nhóm có ít nhất một tin nên k nhóm điểm cao nhất là đủ; giữ mọi nhóm bằng điểm nhóm thứ k
+        # để tin bằng điểm được xếp theo thứ tự dòng như khi duyệt toàn bộ
+        n_top = min(k, self.n_groups)
+        if n_top < self.n_groups:
+            threshold = -np.partition(-score, n_top - 1)[n_top - 1]
+            top = np.flatnonzero(score >= threshold)
+        else:
+            top = np.arange(self.n_groups)
+
+        starts, ends = self.offsets[top], self.offsets[top + 1]
+        rows = self.rows[np.concatenate([np.arange(start, end) for start, end in zip(starts, ends)])]
+        row_scores = np.repeat(score[top], ends - starts)
+        order = np.lexsort((rows, -row_scores))[:k]
+        return [(int(rows[i]), float(row_scores[i])) for i in order]
+
+    # Thông tin các tin tuyển dụng (dạng dict cho JSON) kèm điểm tương đồng
+    def jobs(self, matches):
+        jobs = []
+        for row, score in matches:
+            job = {'row': row, 'similarity': round(score, 4)}
+            for name, values in self._columns.items():
+                value = values[row]
+                job[name] = None if pd.isna(value) else value.item() if hasattr(value, 'item') else value
+            jobs.append(job)
+        return jobs
+
+    # Tìm tin tương tự cho một vector features (thứ tự features_list) và trả về dạng dict
+    def similar_jobs(self, row, feature_names, k=SIMILAR_JOBS_K):
+        return self.jobs(self.query(row, feature_names, k))
+
+
+# Xây chỉ mục từ featured_data.csv: chỉ đọc các cột cần thiết (qua cache dạng cột), bỏ dòng thiếu lương
+def build_similar_jobs_index(data_path=None, columns=SIMILAR_JOBS_COLUMNS):
+    from src.data.data_loader import load_cached_csv
+
+    data_path = Path(data_path or FEATURED_DATA_FILE)
+    header = pd.read_csv(data_path, nrows=0, encoding='utf-8-sig').columns.tolist()
+    token_features = [col for col in header if col.startswith(TOKEN_PREFIXES)]
+    city_features = [col for col in header if col.startswith(CITY_PREFIX)]
+    numeric = ['position_level_encoded', 'experience_years']
+    display = [col for col in columns if col in header and col not in token_features + city_features]
+
+    df = load_cached_csv(data_path, columns=list(dict.fromkeys(token_features + city_features + numeric + display)))
+    if TARGET in df:
+        df = df[df[TARGET].notna()]
+    return SimilarJobsIndex.build(
+        df[token_features].to_numpy() > 0, df[city_features].to_numpy() > 0,
+        df['position_level_encoded'].fillna(0).to_numpy(), df['experience_years'].fillna(0).to_numpy(),
+        df[display], token_features, city_features
+    ), data_path
+
+
+# Lưu chỉ mục (các mảng .npy, postings.pkl và meta.json) qua thư mục tạm rồi đổi tên như bundle mô hình
+def save_similar_jobs_index(index, output_dir=None, source_path=None):
+    output_dir = Path(output_dir or SIMILAR_JOBS_DIR)
+    meta = dict(index.meta)
+    meta['format_version'] = INDEX_FORMAT_VERSION
+    if source_path is not None:
+        meta.update({'source_path': str(source_path), 'source_version': artifact_version(source_path)})
+
+    tmp_dir = output_dir.with_name(f'{output_dir.name}.tmp-{os.getpid()}')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    for name in INDEX_ARRAYS:
+        np.save(tmp_dir / f'{name}.npy', getattr(index, name))
+    joblib.dump(index.postings, tmp_dir / 'postings.pkl')
+    with open(tmp_dir / 'meta.json', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+
+    old_dir = output_dir.with_name(f'{output_dir.name}.old-{os.getpid()}')
+    if output_dir.exists():
+        os.replace(output_dir, old_dir)
+    os.replace(tmp_dir, output_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    print(f"Saved similar jobs index to: {output_dir} ({meta['n_jobs']:,} jobs, {meta['n_groups']:,} groups)")
+    return meta
+
+
+# Load chỉ mục (các mảng bằng memory map), None nếu chưa được xây
+def load_similar_jobs_index(index_dir=None, mmap_mode='r'):
+    index_dir = Path(index_dir or SIMILAR_JOBS_DIR)
+    if not (index_dir / 'meta.json').exists():
+        return None
+    with open(index_dir / 'meta.json', 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('format_version') != INDEX_FORMAT_VERSION:
+        raise ValueError(f"Similar jobs index format không được hỗ trợ: {meta.get('format_version')}")
+    arrays = {name: np.load(index_dir / f'{name}.npy', mmap_mode=mmap_mode) for name in INDEX_ARRAYS}
+    return SimilarJobsIndex(arrays, joblib.load(index_dir / 'postings.pkl'), meta)
+
+
+# So sánh với cách duyệt toàn bộ: chấm điểm từng dòng (không gộp nhóm) rồi sắp xếp
+def brute_force_query(index, row, feature_names, k=SIMILAR_JOBS_K):
+    group = np.repeat(np.arange(index.n_groups), np.diff(index.offsets))
+    score = np.empty(index.n_jobs)
+    score[index.rows] = index.scores(row, feature_names)[group]
+    top = np.lexsort((np.arange(index.n_jobs), -score))[:k]
+    return [(int(row_id), float(score[row_id])) for row_id in top]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Xây chỉ mục tìm tin tuyển dụng tương tự từ featured_data')
+    parser.add_argument('--data', default=str(FEATURED_DATA_FILE), help='File featured_data.csv')
+    parser.add_argument('--output', default=str(SIMILAR_JOBS_DIR))
+    parser.add_argument('--queries', type=int, default=200, help='Số truy vấn mẫu để đo độ trễ')
+    args = parser.parse_args()
+
+    print("="*70)
+    print("Building similar jobs index")
+    print("="*70)
+
+    start = time.perf_counter()
+    index, data_path = build_similar_jobs_index(args.data)
+    print(f"   Built in {time.perf_counter() - start:.2f}s")
+    save_similar_jobs_index(index, args.output, data_path)
+
+    # Đo độ trễ truy vấn với các tin có sẵn làm truy vấn
+    index = load_similar_jobs_index(args.output)
+    feature_names = index.token_features + index.city_features + ['position_level_encoded', 'experience_years']
+    rng = np.random.default_rng(0)
+    groups = rng.integers(0, index.n_groups, size=args.queries)
+    tokens, attrs = index.group_tokens[groups], index.group_attrs[groups]
+    queries = np.column_stack([
+        np.unpackbits(index.token_sets[tokens].view(np.uint8), axis=1, bitorder='little')[:, :len(index.token_features)],
+        np.unpackbits(index.attr_cities[attrs].view(np.uint8), axis=1, bitorder='little')[:, :len(index.city_features)],
+        index.attr_position[attrs], index.attr_experience[attrs]
+    ])
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        index.similar_jobs(query, feature_names)
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"   Query latency: p50 {np.percentile(timings, 50):.2f} ms, p99 {np.percentile(timings, 99):.2f} ms")
@@ -0,0 +1,229 @@
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+ENGINE_ARRAYS = ('roots', 'children', 'feature', 'threshold', 'value', 'missing_left')
+
+# Số cặp (hàng, cây) tối đa duyệt cùng lúc, giới hạn bộ nhớ tạm khi dự đoán batch lớn
+MAX_ACTIVE_NODES = 1 << 18
+
+
+# Chuyển các cây sklearn thành các mảng node liên tục (chỉ số node là toàn cục).
+# children[2 * i] / children[2 * i + 1] là con trái / phải của node i; node lá trỏ về chính nó
+# với ngưỡng +inf nên có thể duyệt đúng max_depth bước mà không cần kiểm tra node lá
+def _flatten_estimators(estimators):
+    roots, children, feature, threshold, value, missing_left = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in estimators:
+        tree = estimator.tree_
+        is_leaf = tree.children_left == -1
+        own_index = np.arange(tree.node_count) + offset
+        roots.append(offset)
+        children.append(np.column_stack([
+            np.where(is_leaf, own_index, tree.children_left + offset),
+            np.where(is_leaf, own_index, tree.children_right + offset)
+        ]).ravel())
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+        value.append(tree.value[:, 0, 0])
+        missing_left.append(tree.missing_go_to_left)
+        offset += tree.node_count
+        max_depth = max(max_depth, int(tree.max_depth))
+
+    arrays = {
+        'roots': np.asarray(roots, dtype=np.int64),
+        'children': np.concatenate(children).astype(np.intp),
+        'feature': np.concatenate(feature).astype(np.intp),
+        'threshold': np.concatenate(threshold).astype(np.float64),
+        'value': np.concatenate(value).astype(np.float64),
+        'missing_left': np.concatenate(missing_left).astype(np.bool_),
+    }
+    return arrays, max_depth
+
+
+# Engine dự đoán cho các mô hình cây (RandomForest, ExtraTrees, DecisionTree, GradientBoosting)
+# đã được làm phẳng thành mảng numpy; duyệt tất cả các cây cùng lúc theo kiểu vector hóa
+class FlatTreeEnsemble:
+
+    def __init__(self, arrays, meta):
+        for name in ENGINE_ARRAYS:
+            setattr(self, name, arrays[name])
+        self.meta = meta
+        self.aggregation = meta['aggregation']
+        self.scale = meta.get('scale', 1.0)
+        self.base = meta.get('base', 0.0)
+        self.max_depth = meta['max_depth']
+        self.n_features_in_ = meta['n_features']
+        if meta.get('feature_names'):
+            self.feature_names_in_ = np.asarray(meta['feature_names'], dtype=object)
+
+    # Biên dịch một mô hình sklearn đã train
+    @classmethod
+    def from_model(cls, model):
+        if getattr(model, 'n_outputs_', 1) != 1:
+            raise ValueError("Chỉ hỗ trợ mô hình hồi quy một output")
+
+        if hasattr(model, 'init_') and hasattr(model, 'learning_rate'):
+            # GradientBoosting: base (dự đoán khởi tạo) + learning_rate * tổng các cây
+            estimators = list(model.estimators_[:, 0])
+            aggregation, scale = 'sum', float(model.learning_rate)
+            if model.init_ == 'zero':
+                base = 0.0
+            elif hasattr(model.init_, 'constant_'):
+                base = float(np.ravel(model.init_.constant_)[0])
+            else:
+                raise ValueError("Chỉ hỗ trợ GradientBoosting với init mặc định hoặc 'zero'")
+        elif hasattr(model, 'estimators_'):
+            estimators, aggregation, scale, base = list(model.estimators_), 'mean', 1.0, 0.0
+        elif hasattr(model, 'tree_'):
+            estimators, aggregation, scale, base = [model], 'sum', 1.0, 0.0
+        else:
+            raise ValueError(f"Không hỗ trợ mô hình {type(model).__name__}")
+
+        arrays, max_depth = _flatten_estimators(estimators)
+        feature_names = None
+        if hasattr(model, 'feature_names_in_'):
+            feature_names = [str(name) for name in model.feature_names_in_]
+
+        meta = {
+            'model_type': type(model).__name__,
+            'aggregation': aggregation,
+            'scale': scale,
+            'base': base,
+            'n_trees': int(len(arrays['roots'])),
+            'n_nodes': int(len(arrays['value'])),
+            'max_depth': max_depth,
+            'n_features': int(model.n_features_in_),
+            'feature_names': feature_names
+        }
+        return cls(arrays, meta)
+
+    # Chuyển X về float32 như sklearn (ngưỡng so sánh vẫn là float64)
+    def _validate(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X phải có dạng (n, {self.n_features_in_})")
+        return X
+
+    # Duyệt tất cả các cây cho một nhóm hàng, trả về chỉ số node lá dạng (n, n_trees)
+    def _apply_chunk(self, X, has_nan):
+        n, n_trees = X.shape[0], len(self.roots)
+        values = X.ravel()
+        nodes = np.tile(self.roots, n)
+        # Vị trí đầu hàng của mỗi cặp (hàng, cây) trong X đã làm phẳng
+        row_offsets = np.repeat(np.arange(n) * X.shape[1], n_trees)
+
+        for _ in range(self.max_depth):
+            x = values[row_offsets + self.feature[nodes]]
+            threshold = self.threshold[nodes]
+            go_right = x > threshold
+            if has_nan:
+                go_right |= np.isnan(x) & ~self.missing_left[nodes]
+            nodes = self.children[2 * nodes + go_right]
+
+        return nodes.reshape(n, n_trees)
+
+    # Chỉ số node lá của mỗi hàng trong mỗi cây, dạng (n, n_trees)
+    def apply(self, X):
+        X = self._validate(X)
+        has_nan = bool(np.isnan(X).any())
+        chunk = max(1, MAX_ACTIVE_NODES // len(self.roots))
+        if X.shape[0] <= chunk:
+            return self._apply_chunk(X, has_nan)
+        return np.concatenate([
+            self._apply_chunk(X[start:start + chunk], has_nan)
+            for start in range(0, X.shape[0], chunk)
+        ])
+
+    # Giá trị dự đoán của từng cây, dạng (n, n_trees)
+    def tree_predictions(self, X):
+        return self.value[self.apply(X)]
+
+    # Gộp dự đoán các cây theo đúng thứ tự cộng của sklearn để kết quả khớp chính xác
+    def _aggregate(self, values):
+        out = np.full(values.shape[0], self.base, dtype=np.float64)
+        for t in range(values.shape[1]):
+            out += self.scale * values[:, t]
+        if self.aggregation == 'mean':
+            out /= values.shape[1]
+        return out
+
+    # Dự đoán
+    def predict(self, X):
+        return self._aggregate(self.tree_predictions(X))
+
+    # Dự đoán kèm giá trị của từng cây trong cùng một lần duyệt (dùng để tính khoảng dự đoán)
+    def predict_with_trees(self, X):
+        values = self.tree_predictions(X)
+        return self._aggregate(values), values
+
+    # Tổng dung lượng các mảng node (MB)
+    def nbytes_mb(self):
+        return sum(getattr(self, name).nbytes for name in ENGINE_ARRAYS) / 1024 ** 2
+
+
+# Đo thời gian dự đoán (ms mỗi lần gọi, lấy median) của model.predict và engine ở các batch size
+def benchmark(model, engine, X, batch_sizes=(1, 32, 10000), repeat=20):
+    results = []
+    rng = np.random.default_rng(0)
+
+    for batch_size in batch_sizes:
+        batch = X[rng.integers(0, len(X), size=batch_size)]
+        n_repeat = max(3, repeat if batch_size < 1000 else repeat // 5)
+        timings = {}
+        for name, predict in (('sklearn', model.predict), ('flat', engine.predict)):
+            predict(batch)
+            samples = []
+            for _ in range(n_repeat):
+                start = time.perf_counter()
+                predict(batch)
+                samples.append((time.perf_counter() - start) * 1000)
+            timings[name] = float(np.median(samples))
+
+        results.append({
+            'batch_size': batch_size,
+            'sklearn_ms': timings['sklearn'],
+            'flat_ms': timings['flat'],
+            'speedup': timings['sklearn'] / timings['flat'],
+            'max_abs_diff': float(np.max(np.abs(model.predict(batch) - engine.predict(batch))))
+        })
+
+    return results
+
+
+if __name__ == '__main__':
+    # Benchmark engine so với model.predict
+    import joblib
+    import pandas as pd
+    from src.utils.config import BEST_MODEL_PATH, FEATURES_LIST_PATH
+
+    print("="*70)
+    print("Benchmarking FlatTreeEnsemble")
+    print("="*70)
+
+    if BEST_MODEL_PATH.exists():
+        import json
+        model = joblib.load(BEST_MODEL_PATH)
+        with open(FEATURES_LIST_PATH, 'r') as f:
+            n_features = len(json.load(f))
+        print(f"Model: {BEST_MODEL_PATH}")
+    else:
+        # Không có mô hình đã train: dùng RandomForest tổng hợp cùng cấu hình với mô hình phục vụ
+        from sklearn.ensemble import RandomForestRegressor
+        n_features = 38
+        X_train = np.random.default_rng(42).random((20000, n_features))
+        y_train = X_train[:, :8].sum(axis=1) + np.random.default_rng(0).normal(0, 0.1, 20000)
+        model = RandomForestRegressor(n_estimators=100, max_depth=20, random_state=42, n_jobs=-1)
+        model.fit(X_train, y_train)
+        print("Model: synthetic RandomForestRegressor(n_estimators=100, max_depth=20)")
+
+    engine = FlatTreeEnsemble.from_model(model)
+    X = np.random.default_rng(1).random((20000, n_features))
+    print(f"Trees: {engine.meta['n_trees']}, nodes: {engine.meta['n_nodes']:,}, size: {engine.nbytes_mb():.1f} MB\n")
+    print(pd.DataFrame(benchmark(model, engine, X)).to_string(index=False))
@@ -20,10 +20,66 @@ BEST_MODEL_PATH = MODELS_DIR / 'best_model.pkl'
 SCALER_PATH = MODELS_DIR / 'scaler.pkl'
 FEATURES_LIST_PATH = MODELS_DIR / 'features_list.json'
 MODEL_INFO_PATH = MODELS_DIR / 'model_info.json'
+FEATURE_ENCODER_PATH = MODELS_DIR / 'feature_encoder.pkl'  # FeatureBuilder đã fit (src/features/feature_builder.py)
+MODEL_BUNDLE_DIR = MODELS_DIR / 'best_model_bundle'  # Bundle memory map (python -m src.model.model_bundle)
+COMPACT_MODEL_BUNDLE_DIR = MODELS_DIR / 'compact_model_bundle'  # Forest đã thu gọn (python -m src.model.regression)
+USE_COMPACT_MODEL = os.environ.get('SALARY_USE_COMPACT_MODEL', '0') == '1'  # Phục vụ bằng bundle thu gọn nếu có
+
+MODEL_REGISTRY_DIR = MODELS_DIR / 'registry'  # Các phiên bản mô hình (python -m src.model.registry)
+MODEL_WATCH_INTERVAL = float(os.environ.get('SALARY_MODEL_WATCH_INTERVAL', '0'))  # Giây, 0 để tắt
+
+# Cách load predictor khi app khởi động: 'background' (thread nền, app nhận request ngay và báo ready khi
+# load xong), 'lazy' (load ở request dự đoán đầu tiên) hoặc 'eager' (load xong mới tạo app)
+STARTUP_MODE = os.environ.get('SALARY_STARTUP_MODE', 'background')
+STARTUP_RETRY_AFTER_S = 2  # Giây client nên chờ khi gọi API dự đoán lúc mô hình đang load (503)
+# Các module nặng được import (và đo thời gian) trước khi load predictor; sklearn chỉ được import khi
+# phải unpickle best_model.pkl (bundle memory map không cần sklearn)
+STARTUP_PRELOAD_MODULES = ['numpy', 'scipy.sparse', 'pandas', 'joblib', 'src.model.predictor']
+
+# Load mô hình từ bundle memory map (dùng chung bộ nhớ giữa các worker) nếu có
+USE_MODEL_BUNDLE = os.environ.get('SALARY_USE_MODEL_BUNDLE', '1') == '1'
+
+# Backend dự đoán khi load từ best_model.pkl: 'sklearn' (model.predict) hoặc 'flat'
+# (biên dịch thành FlatTreeEnsemble, nhanh hơn cho batch nhỏ, kết quả giống hệt)
+INFERENCE_BACKEND = os.environ.get('SALARY_INFERENCE_BACKEND', 'sklearn')
+
+# Khoảng dự đoán: 'quantile' (phân vị dự đoán của từng cây với hiệu chỉnh conformal; chỉ dùng khi
+# model_info.json có kết quả hiệu chỉnh lúc train, nếu không thì như 'mae') hoặc 'mae' (prediction ± test_mae)
+PREDICTION_INTERVAL_MODE = os.environ.get('SALARY_INTERVAL_MODE', 'quantile')
+PREDICTION_INTERVAL_ALPHA = 0.1  # Khoảng 90% (dùng khi mô hình chưa được hiệu chỉnh)
+
+# Prediction cache
+PREDICTION_CACHE_SIZE = 4096  # Số kết quả tối đa trong cache (0 để tắt)
+PREDICTION_CACHE_TTL = 3600  # Thời gian sống của mỗi kết quả (giây, None để không hết hạn)
+
+# Schema khi load CSV (giảm bộ nhớ so với object/int64/float64 mặc định của pandas)
+CATEGORICAL_COLUMNS = ['city', 'position_level', 'experience', 'job_type', 'unit', 'salary_category']
+BINARY_FEATURE_PREFIXES = ('has_skill_', 'field_', 'city_')  # Các cột 0/1 -> uint8
+FLOAT32_COLUMNS = [
+    'experience_years', 'skills_count', 'fields_count',
+    'position_level_encoded', 'job_type_encoded', 'exp_position_interaction',
+    'skills_exp_interaction', 'salary_range', 'salary_range_ratio'
+]  # Các cột lương gốc và target giữ float64
+DATA_CHUNK_SIZE = 50000  # Số dòng mỗi chunk khi đọc dữ liệu theo kiểu streaming
+
+# Cache nhị phân dạng cột cạnh mỗi file CSV (<file>.csv.cache/), tự build lại khi CSV thay đổi.
+# DataLoader chỉ dùng cache khi bật (dữ liệu trả về theo schema dtype); load_cached_csv luôn dùng cache
+DATA_CACHE_ENABLED = os.environ.get('SALARY_DATA_CACHE', '0') == '1'
+
+# Pipeline tăng dần (python -m src.data.data_transformer): lưu các dòng đã làm sạch/mã hóa của jobs.csv,
+# mỗi lần chạy chỉ xử lý các dòng mới hoặc đã thay đổi
+INCREMENTAL_STATE_DIR = PROCESSED_DATA_DIR / 'incremental'
+
+# Sinh dữ liệu gốc tổng hợp để kiểm tra pipeline với dữ liệu lớn (python -m src.data.data_generator)
+SYNTHETIC_DATA_FILE = RAW_DATA_DIR / 'jobs_synthetic.csv'
+SYNTHETIC_CHUNK_SIZE = 100000  # Số dòng sinh và ghi mỗi lần (bộ nhớ chỉ phụ thuộc giá trị này)
+SYNTHETIC_DIRTY_RATE = 0.05  # Tỷ lệ giá trị văn bản bị làm "bẩn" (chữ hoa, khoảng trắng thừa)
+SYNTHETIC_DUPLICATE_RATE = 0.45  # Tỷ lệ dòng trùng lặp (dữ liệu thật ~47%)
 
 # Data processing parameters
 EXCHANGE_RATE = 25  # USD to VND
 TEST_SIZE = 0.2
+VALIDATION_SIZE = 0.1  # Phần tập train tách riêng để hiệu chỉnh khoảng dự đoán và thu gọn forest
 RANDOM_STATE = 42
 
 # Feature Engineering parameters
@@ -103,6 +159,635 @@ EXPERIENCE_MAPPING = {
 
 POSITION_ORDER = ['Chưa cập nhật','Cộng tác viên','Thực tập sinh', 'Nhân viên','Chuyên gia', 'Trưởng nhóm','Trưởng phòng', 'Quản lý', 'Phó giám đốc', 'Giám đốc']
 
+# Data cleaning parameters (notebook 02)
+CLEANING_TEXT_COLUMNS = ['job_title', 'job_type', 'position_level', 'city', 'experience', 'skills', 'job_fields', 'salary', 'unit']
+CLEANING_FILL_VALUES = {'job_fields': 'Chưa phân loại', 'skills': 'Không yêu cầu'}  # Giá trị điền cho ô trống
+ESSENTIAL_COLUMNS = ['job_title', 'city', 'position_level']  # Thiếu thì xóa dòng
+VALID_SALARY_UNITS = ['VND', 'USD']
+
+# Chuẩn hóa experience (so khớp sau khi chuyển chữ thường) về các mức trong EXPERIENCE_MAPPING
+EXPERIENCE_CLEANING_MAPPING = {
+    'không yêu cầu': 'Không yêu cầu',
+    'khong yeu cau': 'Không yêu cầu',
+    'chưa có kinh nghiệm': 'Không yêu cầu',
+    'chua co kinh nghiem': 'Không yêu cầu',
+    'lên đến 1 năm': '1-2 năm',
+    'dưới 1 năm': 'Dưới 1 năm',
+    'duoi 1 nam': 'Dưới 1 năm',
+    'dưới 5 năm': '1-5 năm',
+    'trên 0.5 năm': 'Dưới 1 năm',
+    '0.5 - 1 năm': 'Dưới 1 năm',
+    'trên 1 năm': '1-2 năm',
+    'tren 1 nam': '1-2 năm',
+    'trên 2 năm': '2-3 năm',
+    'tren 2 nam': '2-3 năm',
+    'trên 02 năm': '2-3 năm',
+    'trên 3 năm': '3-4 năm',
+    'trên 5 năm': '5-6 năm',
+    '1 năm': '1-2 năm',
+    '2 năm': '2-5 năm',
+    '3 năm': '2-5 năm',
+    '4 năm': '2-5 năm',
+    '5 năm': '2-5 năm',
+    '1 - 2 năm': '1-2 năm',
+    '1 - 3 năm': '1-3 năm',
+    '2 - 5 năm': '2-5 năm',
+    '2 - 3 năm': '2-3 năm',
+    '3 - 4 năm': '3-4 năm',
+    '3 - 5 năm': '3-5 năm',
+    '1 - 5 năm': '1-5 năm',
+    '5 - 10 năm': '5-10 năm',
+    'trên 10 năm': 'Trên 10 năm',
+    'tren 10 nam': 'Trên 10 năm',
+    'dưới 2 năm': '1-2 năm',
+    '2 - 4 năm': '2-4 năm',
+    '1 - 1 năm': '1-2 năm',
+    'không yêu cầu kinh nghiệm': 'Không yêu cầu',
+    '5 - 7 năm': '5-7 năm',
+    '3 - 10 năm': '3-10 năm',
+    '2 - 10 năm': '2-10 năm',
+    '4 - 5 năm': '4-5 năm',
+    'trên 4 năm': '4-5 năm',
+    'dưới 3 năm': '1-3 năm',
+    '1 - 10 năm': '1-10 năm',
+    '3 - 7 năm': '3-7 năm',
+    'dưới 0.5 năm': 'Dưới 1 năm',
+    '5 - 8 năm': '5-8 năm',
+    'lên đến 2 năm': '1-2 năm',
+    '1 - 4 năm': '1-4 năm',
+    '5 - 6 năm': '5-6 năm',
+    'lên đến 3 năm': '1-3 năm',
+    '5 - 15 năm': '5-15 năm',
+    'trên 6 năm': '6-7 năm',
+    '2 - 7 năm': '2-7 năm',
+    'lên đến 5 năm': '1-5 năm',
+    '0.5 - 5 năm': 'Dưới 1 năm',
+    '4 - 6 năm': '4-6 năm',
+    '2 - 2 năm': '2-5 năm',
+    '2 - 8 năm': '2-8 năm',
+    '0.5 - 2 năm': 'Dưới 1 năm',
+    '3 - 15 năm': '3-15 năm',
+    '3 - 8 năm': '3-8 năm',
+    '3 - 6 năm': '3-6 năm',
+    '2 - 15 năm': '2-15 năm',
+    'trên 7 năm': '7-8 năm',
+    '5 - 5 năm': '2-5 năm',
+    '4 - 10 năm': '4-10 năm',
+    'trên 01 năm': '1-2 năm',
+    '1 - 7 năm': '1-7 năm',
+    '2 - 6 năm': '2-6 năm',
+    '5 - 20 năm': '5-20 năm',
+    '0.5 - 3 năm': 'Dưới 1 năm',
+    '8 - 10 năm': '8-10 năm',
+    '7 - 10 năm': '7-10 năm',
+    'trên 03 năm': '3-4 năm',
+    '10 - 15 năm': 'Trên 10 năm',
+    '1 - 8 năm': '1-8 năm',
+    '6 - 1 năm': '1-2 năm',
+    'trên 2 năm - nhanh nhẹn, chịu khó học hỏi và tiếp thu. - độ tuổi: 25-35 tuổi.': '2-3 năm',
+    '10 - 20 năm': 'Trên 10 năm',
+    '1 - 15 năm': '1-15 năm',
+    '3 - 9 năm': '3-9 năm',
+    '4 - 7 năm': '4-7 năm',
+    '3 - 20 năm': '3-20 năm',
+    '12 - 1 năm': '1-2 năm',
+    '3 - 3 năm': '3-5 năm',
+    '8 - 15 năm': '8-15 năm',
+    '2 - 1 năm': '1-2 năm',
+    'lên đến 15 năm': '1-15 năm',
+    '4 - 8 năm': '4-8 năm',
+    'lên đến 4 năm': '1-4 năm',
+    '2 - 20 năm': '2-20 năm',
+    '4 - 15 năm': '4-15 năm',
+    'dưới 4 năm': '1-4',
+    '01 - 3 năm': '1-3 năm',
+    'lên đến 10 năm': '1-10 năm',
+    '7 - 15 năm': '7-15 năm',
+    '1 - 9 năm': '1-9 năm',
+    '03 - 5 năm': '3-5 năm',
+    '0 - 0 năm': 'Không yêu cầu',
+    '1 - 6 năm': '1-6 năm',
+    'dưới 10 năm': '1-10 năm',
+    'trên 8 năm': '8-9 năm',
+    '02 - 02 năm': '2-5 năm',
+    '15 - 5 năm': '4-5 năm',
+    '1 - 02 năm': '1-2 năm',
+    '1 - 4 năm - có kinh nghiệm về ngành thẩm mỹ là một lợi thế - có khả năng xây dựng, quản trị cộng đồng cộng tác viên, affiliate. kỹ năng chuyên môn: - kỹ năng giao tiếp, thuyết trình tốt với các cấp độ trong công ty. - kỹ năng tự nghiên cứu, tìm hiểu kiến thức mới nhanh. - kỹ năng làm proposal, canva. - giao tiếp tiếng anh - có tư duy logic, khả năng phân tích và giải quyết vấn đề. độ tuổi: 26-30 giới tính: nữ, nam, lgbt - có ngoại hình': '1-4 năm',
+    '10 - 3 năm': '1-3 năm',
+    '1 - 12 năm': '1-12 năm',
+    '4 - 20 năm': '4-20 năm',
+    '1 - 2 năm · tốt nghiệp trung cấp, cao đẳng trở lên chuyên ngành thủy sản hoặc các ngành liên quan · ưu tiên kinh nghiệm làm phòng lab, rd': '1-2 năm',
+    '22 - 1 năm': '1-2 năm',
+    '30 - 3 năm': '1-3 năm',
+    '02 - 6 năm': '2-6 năm',
+    '2 - 25 năm': '2-25 năm',
+    '6 - 8 năm': '6-8 năm',
+    '13 - 1 năm': '1-2 năm',
+    'dưới 8 năm': '1-8 năm',
+    '5 - 2 năm': '2-5 năm',
+    '3 - 1 năm': '1-2 năm',
+    '06 - 01 năm': '1-2 năm',
+    '35 - 01 năm': '1-2 năm',
+    '6 - 10 năm': '6-10 năm',
+    '5 - 25 năm': '5-25 năm',
+    'dưới 5 năm 3.ưu tiên có khả năng giao tiếp cơ bản bằng tiếng trung .': '1-5 năm',
+    '01 - 02 năm': '1-2 năm',
+    '27 - 03 năm': '1-3 năm',
+    '1 - 11 năm': '1-11 năm',
+    '25 - 1 năm': '1-2 năm',
+    '600 - 1 năm': '1-2 năm',
+    '3 - 02 năm': '2-5 năm',
+    '02 - 03 năm': '2-3 năm',
+    '03 - 05 năm': '3-5 năm',
+    '2 - 14 năm': '2-14 năm',
+    '02 - 5 năm': '2-5 năm',
+    'dưới 1 năm • ưu tiên ứng viên có kinh nghiệm trong ngành f&b. • kỹ năng giao tiếp, thuyết phục, phân tích và dự đoán tình hình tốt. • nhạy bén với thông tin mạng xã hội, bắt trend kịp thời. • không ngại ống kính, có thể host video,livestream. • chịu được áp lực công việc và sẵn sàng di chuyển,công tác. • năng động, chủ động học hỏi cái mới và có tinh thần trách nhiệm cao, cẩn thận trong công việc. • có máy tính cá nhân phục vụ công việc.': 'Dưới 1 năm',
+    '0.5 - 0.5 năm': 'Dưới 1 năm',
+    '9 - 10 năm': '9-10 năm',
+    '365 - 2 năm': '1-2 năm',
+    '40 - 2 năm': '1-2 năm',
+    '20 - 35 năm': 'Trên 10 năm',
+    '27 - 35 năm': 'Trên 10 năm',
+    '45 - 2 năm': '1-2 năm',
+    '37 - 2 năm': '1-2 năm',
+    '01 - 03 năm': '1-3 năm',
+    '3 - 4 năm - kỹ năng thực hành lâm sàng tốt, phản ứng nhanh trong các tình huống cấp cứu - khả năng làm việc độc lập và làm việc nhóm hiệu quả - tinh thần trách nhiệm cao, cẩn thận, tỉ mỉ trong công việc - khả năng giao tiếp tốt với đồng nghiệp và bệnh nhân - sẵn sàng trực đêm và làm việc ngoài giờ khi cần thiết': '3-4 năm',
+    '25 - 3 năm': '1-3 năm',
+    '01 - 5 năm': '1-5 năm',
+    '7 - 20 năm': '7-20 năm',
+    '7 - 12 năm': '7-12 năm',
+    '1 - 3 năm yêu cầu học vấn, kỹ năng': '1-3 năm',
+    '2 - 5 năm - quản lý đội nhóm, mạnh về tuyển dụng và đào tạo nhân sự - có tinh thần cầu tiến, chủ động trong công việc': '2-5 năm',
+    '3 - 12 năm': '3-12 năm',
+    'lên đến 7 năm': '1-7 năm',
+    '25 - 35 năm': 'Trên 10 năm',
+    '06 - 1 năm': '1-2 năm',
+    '8 - 1 năm': '1-2 năm',
+    '6 - 23 năm': '6-23 năm',
+    '5 - 18 năm': '5-18 năm',
+    '9 - 11 năm': '9-11 năm',
+    '3 - 30 năm': '3-30 năm',
+    '30 - 45 năm': 'Trên 10 năm',
+    '15 - 25 năm': 'Trên 10 năm',
+    'trên 15 năm': 'Trên 10 năm',
+    '7 - 9 năm': '7-9 năm',
+    '-1 - 0 năm': 'Không yêu cầu',
+    '8 - 12 năm': '8-12 năm',
+    '8 - 20 năm': '8-20 năm',
+    '10 - 30 năm': 'Trên 10 năm',
+    'trên 20 năm': 'Trên 10 năm',
+    'lên đến 6 năm': '1-6 năm',
+    '6 - 11 năm': '6-11 năm',
+    '5 - 12 năm': '5-12 năm',
+    '3 - 17 năm': '3-17 năm',
+    'error': 'Không yêu cầu',
+    '7 - 25 năm': '7-25 năm',
+    '40 - 50 năm': 'Trên 10 năm',
+    '1 - 20 năm': '1-20 năm',
+    '7 - 13 năm': '7-13 năm',
+    '4 - 9 năm': '4-9 năm',
+    'lên đến 8 năm': '1-8 năm',
+    '6 - 15 năm': '6-15 năm',
+    '4 - 12 năm': '4-12 năm',
+    '6 - 3 năm': '1-3 năm',
+    '30 - 2 năm': '1-2 năm',
+    '23 - 02 năm': '1-2 năm',
+    'trên 1 năm - đã từng làm ở công ty diễn họa có khách hàng là các chủ đầu tư lớn là một điểm cộng.': '1-2 năm',
+    '7 - 1 năm': '1-2 năm'
+}
+
+# Chuẩn hóa position_level (so khớp sau khi chuyển chữ thường)
+POSITION_CLEANING_MAPPING = {
+    'nhan vien': 'Nhân viên',
+    'nhân viên': 'Nhân viên',
+    'truong nhom': 'Trưởng nhóm',
+    'trưởng nhóm': 'Trưởng nhóm',
+    'team leader': 'Trưởng nhóm',
+    'quan ly': 'Quản lý',
+    'quản lý': 'Quản lý',
+    'giam doc': 'Giám đốc',
+    'giám đốc': 'Giám đốc',
+    'thuc tap sinh': 'Thực tập sinh',
+    'thực tập sinh': 'Thực tập sinh',
+    'intern': 'Thực tập sinh',
+    'trưởng nhóm , giám sát': 'Trưởng nhóm',
+    'phó giám đốc': 'Phó giám đốc',
+    'mới tốt nghiệp': 'Thực tập sinh',
+    'sinh viên, thực tập sinh': 'Thực tập sinh',
+    'error': 'Chưa cập nhật',
+    'tổng giám đốc': 'Tổng giám đốc',
+    'chuyên viên, nhân viên': 'Nhân viên',
+    'quản lý cấp trung': 'Quản lý',
+    'quản lý nhóm, giám sát': 'Quản lý',
+    'cộng tác viên': 'Cộng tác viên',
+    'chuyên gia': 'Chuyên gia',
+    'quản lý cấp cao': 'Quản lý',
+    '': 'Chưa cập nhật',
+    'chưa cập nhật': 'Chưa cập nhật',
+    'nhân viên, chuyên viên': 'Nhân viên',
+    'trưởng nhóm, trưởng phòng': 'Trưởng phòng',
+    'mới tốt nghiệp, thực tập sinh': 'Thực tập sinh',
+    'giám đốc và cấp cao hơn': 'Giám đốc',
+    'quản lý , giám sát': 'Quản lý',
+    'trưởng, phó phòng': 'Trưởng phòng'
+}
+
+# Chuẩn hóa city (so khớp sau khi viết hoa chữ cái đầu) về tên tỉnh/thành phố
+CITY_CLEANING_MAPPING = {
+    'Hà Hội': 'Hà Nội',
+    'Đắk Lawsk': 'Đắk lắk',
+    '20': 'Thái Nguyên',
+    'Biên Hòa': 'Đồng Nai',
+    'Thủ Dầu Một': 'Bình Dương',
+    'Quận 1': 'Hồ Chí Minh',
+    'Nha Trang': 'Khánh Hòa',
+    'Ho Chi Minh City': 'Hồ Chí Minh',
+    'Cầu Giấy': 'Hà Nội',
+    'Thủ Đức': 'Hồ Chí Minh',
+    'Quận 12': 'Hồ Chí Minh',
+    'Quận Tân Bình': 'Hồ Chí Minh',
+    'Việt Nam': 'Toàn Quốc',
+    'Tp Thủ Đức': 'Hồ Chí Minh',
+    'Hải An': 'Hải Phòng',
+    'Thanh Xuân': 'Hà Nội',
+    'Tp Huế': 'Thừa Thiên Huế',
+    'Phan Thiết': 'Bình Thuận',
+    'Quận 9': 'Hồ Chí Minh',
+    'Long Biên': 'Hà Nội',
+    'Quận 7': 'Hồ Chí Minh',
+    'Vietnam': 'Toàn Quốc',
+    'Bắc Từ Liêm': 'Hà Nội',
+    'Số 74 Phạm Văn Đồng': 'Hồ Chí Minh',
+    'Nam Từ Liêm': 'Hà Nội',
+    'Hoàng Mai': 'Hà Nội',
+    'Quận 3': 'Hồ Chí Minh',
+    'Quận Bình Tân': 'Hồ Chí Minh',
+    'Quận Phú Nhuận': 'Hồ Chí Minh',
+    'Hanoi': 'Hà Nội',
+    'Huế': 'Thừa Thiên Huế',
+    'Bình Tân': 'Hồ Chí Minh',
+    'Dak Lak': 'Đắk Lắk',
+    'Đống Đa': 'Hà Nội',
+    'Toà Nhà Golden King Nguyễn Lương Bằng Quận 7': 'Hồ Chí Minh',
+    'Hà Đông': 'Hà Nội',
+    'Ba Đình': 'Hà Nội',
+    'Quận 10': 'Hồ Chí Minh',
+    'Quận Gò Vấp': 'Hồ Chí Minh',
+    'Quận Hải Châu': 'Đà Nẵng',
+    'Toàn Tỉnh': 'Toàn Quốc',
+    'Mỹ Tho': 'Tiền Giang',
+    'Phú Nhuận': 'Hồ Chí Minh',
+    'Tòa Nhà Mb 21 Cát Linh': 'Hồ Chí Minh',
+    'Quận 2': 'Hồ Chí Minh',
+    'Bình Thạnh': 'Hồ Chí Minh',
+    'Hiệp Bình Phước': 'Hồ Chí Minh',
+    'Hai Bà Trưng': 'Hà Nội',
+    'Nhật Bản': 'Nước Ngoài',
+    'Ho Chi Minh': 'Hồ Chí Minh',
+    'Toà Nhà Tng 54A Nguyễn Chí Thanh': 'Hồ Chí Minh',
+    'Thanh Hoá': 'Thanh Hóa',
+    'Số 107 Phố Xuân QuỳNh Trung HòA': 'Hà Nội',
+    'Bd': 'Toàn quốc',
+    'Quốc Tế': 'Toàn quốc',
+    'Bến Cát': 'Bình Dương',
+    'Q Bình Thạnh': 'Hồ Chí Minh',
+    'Dĩ An': 'Bình Dương',
+    'Quận Hà Đông': 'Hà Nội',
+    'Quận 5': 'Hồ Chí Minh',
+    'Duy Tiên': 'Hà Nam',
+    'Tân Bình': 'Hồ Chí Minh',
+    'Hóc Môn': 'Hồ Chí Minh',
+    'Cần Giuộc': 'Long An',
+    'Huyện Bình Chánh': 'Hồ Chí Minh',
+    'Quận 11': 'Hồ Chí Minh',
+    'Nhơn Trạch': 'Đồng Nai',
+    'Phường Cổ Nhuế 2': 'Hà Nội',
+    'Qtân Bình': 'Hồ Chí Minh',
+    'Quận Bình Thạnh': 'Hồ Chí Minh',
+    'Nguyễn Xiển': 'Hà Nội',
+    'Dak Nông': 'Đắk Nông',
+    '2604 Quốc Lộ 1A Xã Bình Chánh': 'Hồ Chí Minh',
+    'Thanh Trì': 'Hà Nội',
+    'Quận Đống Đa': 'Hà Nội',
+    'Kcx Linh Trung 2': 'Hồ Chí Minh',
+    'Tan Binh Dist': 'Hồ Chí Minh',
+    'Huyện Củ Chi': 'Hồ Chí Minh',
+    'Thành Phố Thủ Đức': 'Hồ Chí Minh',
+    'Quận Hoàng Mai': 'Hà Nội',
+    'Dist 1': 'Hồ Chí Minh',
+    'Q2': 'Hồ Chí Minh',
+    'Q10': 'Hồ Chí Minh',
+    'Hoàn Kiếm': 'Hà Nội',
+    'Qbình Tân': 'Hồ Chí Minh',
+    'Quận 8': 'Hồ Chí Minh',
+    'Q12': 'Hồ Chí Minh',
+    'Hải Châu': 'Hải Phòng',
+    'Số 5 Ngõ 70 Nguyễn Hoàng': 'Hà Nội',
+    'Các Văn Phòng Đại Diện Tại Các Quận': 'Hồ Chí Minh',
+    'Số 04 Lê Liễu': 'Hà Nội',
+    'Đức Hòa': 'Long An',
+    'Quận Bắc Từ Liêm': 'Hà Nội',
+    'California Fitness Yoga': 'Hồ Chí Minh',
+    'Thủ ĐứC': 'Hồ Chí Minh',
+    'Huyện Phú Xuyên': 'Hà Nội',
+    'Dist 3': 'Hồ Chí Minh',
+    'Q Cầu Giấy': 'Hà Nội',
+    'Online': 'Toàn Quốc',
+    'Tân Phú': 'Hồ Chí Minh',
+    'Quận Tây Hồ': 'Hà Nội',
+    'Phường Bình Thuận': 'Hồ Chí Minh',
+    'Lotte Mall Tây Hồ': 'Hà Nội',
+    'Thuận Thành': 'Bắc Ninh',
+    'Toàn Khu Vực': 'Toàn Quốc',
+    'Huyện Yên Mỹ': 'Hưng Yên',
+    'Hội An': 'Quảng Nam',
+    'BắC Ninh': 'Bắc Ninh',
+    'Cai Lậy': 'Tiền Giang',
+    'Quận Thanh Xuân': 'Hà Nội',
+    'Quận Tân Phú': 'Hồ Chí Minh',
+    '252 Hạ Hội Tân Lậpmiền Bắc': 'Hà Nội',
+    'Q3': 'Hồ Chí Minh',
+    'Toà Nhà Tng 54A Nguyễn Chí Than': 'Hồ Chí Minh',
+    'Pphú Lợi': 'Bình Dương',
+    'Kcn Amata': 'Toàn Quốc',
+    'Hà Huy Giáp': 'Hồ Chí Minh',
+    '69B Thụy Khuê': 'Hà Nội',
+    'Tp Thủ Đức Bên Cạnh Trường Mầm Non Kcnc Quận 9': 'Hồ Chí Minh',
+    'Thuận An': 'Bình Dương',
+    'Thành Phố Quy Nhơn': 'Bình Định',
+    'Khu Đô Thị An Phú An Khánh': 'Hồ Chí Minh',
+    'Quận 4': 'Hồ Chí Minh',
+    'Tp Bến Cát': 'Bình Dương',
+    'Văn Lâm': 'Hưng Yên',
+    'Tại Nhà': 'Toàn Quốc',
+    'Cổ Nhuế Gần Mega Market Phạm Văn Đồng': 'Hồ Chí Minh',
+    'Gò Vấp': 'Hồ Chí Minh',
+    'Cờ Đỏ': 'Cần Thơ',
+    'Hòa Thành': 'Tây Ninh',
+    'Tân Uyên': 'Bình Dương',
+    'Tỉnh Đaklak': 'Đắk lắk',
+    'Long Thành': 'Đồng Nai',
+    'Trảng Bàng': 'Tây Ninh',
+    'Fpt Shop Thành Phố Vĩnh Long': 'Vĩnh Long',
+    'Kim Động': 'Hưng Yên',
+    'Đường Số 4': 'Hồ Chí Minh',
+    'Tpthủ Đức': 'Hồ Chí Minh',
+    'Lotte Tây Hồvincom Bà Triệutttm The Gardensavico Long Biên': 'Hà Nội',
+    'Tỉnh Lào Cai': 'Lào Cai',
+    'Tòa Chung Cư Ban Cơ Yếu Chính Phủ': 'Hồ Chí Minh',
+    'Phú Lương': 'Thái Nguyên',
+    'Hậu Lộc': 'Thanh Hóa',
+    'Phú Vang': 'Thừa Thiên Huế',
+    'Thành Phố Phú Quốc': 'Phú Quốc',
+    'Tất Cả Các Quậnhuyện': 'Hồ Chí Minh',
+    'Quận Hai Bà Trưng': 'Hà Nội',
+    'Hoài Đức': 'Hà Nội',
+    'Tp Buôn Ma Thuột': 'Đắk Lắk',
+    'P Hiệp Bình Phước': 'Hồ Chí Minh',
+    'Q4': 'Hồ Chí Minh',
+    'Kcn Long Đức': 'Hồ Chí Minh',
+    'Tất Cả Các Huyện': 'Toàn Quốc',
+    'Phú Xuyên': 'Hà Nội',
+    'Phường Dịch Vọng Hậu': 'Hà Nội',
+    'Các Công Trình Xây Dựng Miền Bắc': 'Miền Bắc',
+    'Viet Nam': 'Toàn Quốc',
+    'Tp Hai Phong': 'Hải Phòng',
+    'Huyện Thống Nhất': 'Hà Nội',
+    'Qtân Phú': 'Hồ Chí Minh',
+    'Phường Tân Chánh Hiệp': 'Hồ Chí Minh',
+    'Tp Long Khánh': 'Đồng Nai',
+    'Hòa Cường': 'Đà Nẵng',
+    'Q1': 'Hồ Chí Minh',
+    'Dự Án Quận Tây Hồ': 'Hà Nội',
+    'Kiến An': 'Bình Dương',
+    'Phường Hiệp Bình Phước': 'Hồ Chí Minh',
+    'Bình Xuyên': 'Vĩnh Phúc',
+    'Tp Dĩ An': 'Bình Dương',
+    'Tp Bmt': 'Đắk Lắk',
+    '161 Võ Nguyễn Giáp': 'Hồ Chí Minh',
+    'Lào Cai 3 Nơi Khác': 'Lào Cai',
+    'Kcn Nhơn Trạch 3': 'Đồng Nai',
+    'Ưu Tiên Khu Vực Ứng Viên Sinh Sống': 'Toàn Quốc',
+    '169 Nguyễn Ngọc Vũ': 'Hồ Chí Minh',
+    'Cổ Nhuế 2': 'Hà Nội',
+    'Bn': 'Toàn Quốc',
+    'Dong Nai Province': 'Đồng Nai',
+    'Vpbank Ứng Hòa': 'Hà Nội',
+    'Đức Hoà': 'Long An',
+    'Kcn Quang Minh Mê Linh': 'Hồ Chí Minh',
+    'Liên Chiểu': 'Đà Nẵng',
+    'Thành Phố Long Khánh': 'Đồng Nai',
+    'Tây Hồ': 'Hà Nội',
+    '91 Nguyễn Chí Thanh': 'Hồ Chí Minh',
+    'Tất Cả Các Quận Huyện': 'Toàn Quốc',
+    'Hải Hà': 'Quảng Ninh',
+    'Tp Phủ Lý': 'Hải Nam',
+    '41 Thép Mới': 'Hồ Chí Minh',
+    'Bình Tân Khu Tên Lửa': 'Hồ Chí Minh',
+    'Da Nang': 'Đà Nẵng',
+    'Kv Đông Nam Bộ': 'Miền Nam',
+    'Hớn Quản': 'Bình Phước',
+    'Ha Noi': 'Hà Nội',
+    'Lai Vung': 'Đồng Tháp',
+    'Thu Duc City': 'Hồ Chí Minh',
+    'Không Phải Đến Công Ty': 'Toàn quốc',
+    'Hung Yen Province': 'Hưng Yên',
+    'Thành Phố Dĩ An': 'Bình Dương',
+    'Từ Liêm': 'Hà Nội',
+    'Fpt Shop Tp Rạch Giá': 'Kiên Giang',
+    'Phường Cổ Nhuế 1': 'Hà Nội',
+    'Q7': 'Hồ Chí Minh',
+    'Quận Cầu Giấy': 'Hà Nội',
+    'Gò Công Tây': 'Tiền Giang',
+    '8C Vũ Thạnh': 'Hà Nội',
+    'Q Bình Tân Đối Diện Cn1 Trong Kcn Tân Bình': 'Hồ Chí Minh',
+    '505 Minh Khai': 'Hồ Chí Minh',
+    'Tp Gò Công': 'Tiền Giang',
+    'Q 12': 'Hồ Chí Minh',
+    'Kiến Tường': 'Long An',
+    'Kcn Vsip Ii': 'Toàn Quốc',
+    'Gò Dầu': 'Tây Ninh',
+    'Đại Lộ Thăng Long': 'Hà Nội',
+    'Trung Hòa': 'Hà Nội',
+    'Phường Khuê Trung': 'Đà Nẵng',
+    'Buôn Ma Thuột': 'Đắk Lắk',
+    'Thành Phố Hoà Bình': 'Hòa Bình',
+    'Huyện Văn Lâm': 'Hưng Yên',
+    'Minh Đức Cách Cầu Vượt Quán Giỏi 100 M': 'Hồ Chí Minh',
+    'Quận Ba Đình': 'Hà Nội',
+    '235 Nguyễn Trãi': 'Hồ Chí Minh',
+    'Từ Sơn': 'Bắc Ninh',
+    'Tx Dĩ An': 'Bình Dương',
+    'Q Hải Châu': 'Hải Phòng',
+    'Châu Thành': 'An Giang',
+    'Tòa Nhà Hòa Bình Green City': 'Hồ Chí Minh',
+    'Đông Hải 2': 'Bạc Liêu',
+    'Quận 6': 'Hồ Chí Minh',
+    'Tỉnh Hòa Bình': 'Hòa Bình',
+    'Khu Đt Hc': 'Hồ Chí Minh',
+    'Huyện Gia Lâm': 'Hà Nội',
+    'Kiên Thành': 'Bắc Giang',
+    'Q Tân Phú': 'Hồ Chí Minh',
+    'Quận Hoàn Kiếm': 'Hà Nội',
+    'Tràng Bảng': 'Tây Ninh',
+    'Nam Sơn': 'Bắc Ninh',
+    'Hà Đông': 'Hà Nội',
+    'Phường Hiệp Ninh': 'Tây Ninh',
+    'Kcn Vsip 2': 'Toàn Quốc',
+    'Công Viên Phần Mềm Quang Trung': 'Hồ Chí Minh',
+    'Tân Châu': 'An Giang',
+    'Tp Sông Công': 'Thái Nguyên',
+    'Hokkaido': 'Nước Ngoài',
+    'Bình Thuận Bình Thuận': 'Bình Thuận',
+    'Rạch Sỏi Rạch Giá': 'Kiên Giang',
+    'Tỉnh Tt Huế': 'Thừa Thiên Huế',
+    'Dầu Tiếng': 'Bình Dương',
+    'Đak Lak': 'Đắk Lawsk',
+    'Phường Minh Đức': 'Đồng Nai',
+    'Phường Cầu Kho': 'Hồ Chí Minh',
+    '68 Nguyễn Huệ': 'Hồ Chí Minh',
+    'Văn Phòng Công Ty Cổ Phần Tập Đoàn Xd Hoà Bình': 'Hồ Chí Minh',
+    'An Dương': 'Hải Phòng',
+    'Khu Vực Miền Bắc': 'Miền Bắc',
+    'Tòa Nhà Trung Yên 1 Số 1A Vũ Phạm Hàm Cầu Giấy': 'Hà Nội',
+    'Phiệp Bình Phước': 'Hồ Chí Minh',
+    'Tp Quy Nhơn': 'Bình Định',
+    'Miền Nam 3 Nơi Khác': 'Miền Nam',
+    'Kcn Thăng Long': 'Hà Nội',
+    'Q Phú Nhuận': 'Hồ Chí Minh',
+    'Đà Lạt': 'Lâm Đồng',
+    'Quận Hải An': 'Hải Phòng',
+    '31 Võ Văn Vân': 'Hồ Chí Minh',
+    'Qbình Thạnh': 'Hồ Chí Minh',
+    'Số 35 Lê Văn Lương': 'Hồ Chí Minh',
+    'Kcn Ninh Hiệp': 'Hà Nội',
+    'Tỉnh Tiền Giang': 'Tiền Giang',
+    'Hà Nộ': 'Hà Nội',
+    'Tp Lào Cai': 'Lào Cai',
+    'Đông Hưng Thuận': 'Hồ Chí Minh',
+    'Vĩnh Thạnh': 'Bình Định',
+    'Tỉnh Lộ 43 Thủ Đức Hướng Cầu Gò Dưa': 'Hồ Chí Minh',
+    'Fpt Shop Tháp Mười': 'Hồ Chí Minh',
+    'Đường Thủ Khoa Huân – P Thành Nhất – Tp Buôn Ma Thuột': 'Đắk Lắk',
+    'Phú Tân': 'Hồ Chí Minh',
+    'Cổ Nhuế': 'Hà Nội',
+    'Quận Thủ Đức': 'Hồ Chí Minh',
+    'Thanh Oai': 'Hà Nội',
+    'Thanh Hoá Tp Thanh Hoá': 'Thanh Hóa',
+    'Ba Gps': 'Hồ Chí Minh',
+    'Huyện Đức Hòa': 'Long An',
+    'Yokohama': 'Nước Ngoài',
+    'Tpquy Nhơn': 'Bình Định',
+    'Hải Tân': 'Hải Dương',
+    'Bàu Bàng': 'Bình Dương',
+    'Hòa Vang': 'Đà Nẵng',
+    'Cẩm Phả': 'Quảng Ninh',
+    'Fpt Shop Vĩnh Thuận': 'Kiên Giang',
+    'Hoàng Kiếm': 'Hà Nội',
+    'Ngô Quyền': 'Hồ Chí Minh',
+    'Phường Võ Thị Sáu': 'Hồ Chí Minh',
+    '44 Hoàng Sĩ Khải Phường 14 Quận 8': 'Hồ Chí Minh',
+    'Phú Giáo': 'Bình Dương',
+    'Tỉnh Quảng Trị': 'Quảng Trị',
+    'Cổ Nhuế 1': 'Hà Nội',
+    'Bắc Từ Liêm Đối Diện Công Viên Hòa Bình': 'Hà Nội',
+    'Huyện Bình Giang': 'Hải Dương',
+    'Tân Phước': 'Tiền Giang',
+    'Phường An Thới': 'Kiên Giang',
+    'Kcx Linh Trung 1': 'Hồ Chí Minh',
+    'Kcn Phú Mỹ 3': 'Vũng Tàu',
+    'Khác': 'Toàn Quốc',
+    'Kv Nam Trung Bộ': 'Miền Nam',
+    'Khu Ngoại Giao Đoàn': 'Toàn Quốc',
+    'Bình Thọ': 'Hồ Chí Minh',
+    'Phúc Yên': 'Vĩnh Phúc',
+    'Fpt Shop Tp Cao Lãnh': 'Đồng Tháp',
+    'Đại Kim': 'Hà Tĩnh',
+    'Đồng Xoài': 'Bình Phước',
+    'Kcn Quế': 'Bắc Ninh',
+    'Huyện Mê Linh': 'Hà Nội',
+    'Thị Xã Bến Cát': 'Bình Dương',
+    'Lệ Thủy': 'Quản Bình',
+    'Thành Phố Đài Bắc': 'Nước Ngoài',
+    'Fpt Shop Thị Xã Giá Rai': 'Bạc Liêu',
+    'P Cổ Nhuế 2': 'Hà Nội',
+    'Phương Liệt': 'Hà Nội',
+    'Phường Tân Đông Hiệp': 'Bình Dương',
+    'Quận Ninh Kiều': 'Cân Thơ',
+    '159 Quốc Lộ 1K': 'Hồ Chí Minh',
+    'The Golden Palm 21 Lê Văn Lương': 'Hồ Chí Minh',
+    'Tây Nam Linh Đàm': 'Hà Nội',
+    'Phường 4': 'Hà Nội',
+    'P Thạnh Mỹ Lợi': 'Hồ Chí Minh',
+    'Vị Thanh': 'Hậu Giang',
+    'P Hòa Thạnh': 'Tây Ninh',
+    'Phường Trung Liệt': 'Hà Nội',
+    'Việt Trì': 'Phú Thọ',
+    'Tp Vinh': 'Nghệ An',
+    'Thái Lan': 'Nước Ngoài',
+    'Quận Bình Tân Khu Tên Lửa': 'Hồ Chí Minh',
+    'Bình Long': 'Bình Phước',
+    'Phường 17': 'Hồ Chí Minh',
+    'Phường 26': 'Hồ Chí Minh',
+    'Cửa Hàng Keira Tống 97 Phố Huế': 'Thừa Thiên Huế',
+    'Công Ty Cổ Phần Xnk Tập Đoàn Nông Sản Việt Nam': 'Hồ Chí Minh',
+    '830000': 'Bình Phước',
+    'Bình Phước Bình Phước Bình Phước Bình Phước Bình Phước': 'Bình Phước',
+    'Online Tại Nhà': 'Toàn Quốc',
+    'Fpt Shop Huyện Châu Thành': 'An Giang',
+    'Chơn Thành': 'Bình Phước',
+    'P 22': 'Hồ Chí Minh',
+    'District 9': 'Hồ Chí Minh',
+    'Tp Việt Trì': 'Phú Thọ',
+    'Dak Lak Dak Nông': 'Đắk Lắk',
+    'Kcx Sai Gon Linh Trung 1': 'Hồ Chí Minh',
+    'Kim Mã': 'Hà Nội',
+    'Malaysia': 'Nước Ngoài',
+    'Lộc Ninh': 'Bình Phước',
+    'Tiền Giang Tiền Giang Tiền Giang Tiền Giang Tiền Giang': 'Tiền Giang',
+    'Tokyo': 'Nước Ngoài',
+    'Qphú Nhuận': 'Hồ Chí Minh',
+    'Miền Nam 2 Nơi Khác': 'Miền Nam',
+    '879 Quốc Lộ 13 Hiệp Bình Phước Thủ Đức': 'Hồ Chí Minh',
+    'Phường An Lạc': 'Hồ Chí Minh',
+    'Công Ty Thành Thành Công 158 Hồ Bá Kiện Phường 15 Quận 10': 'Hồ Chí Minh',
+    'QuậN 1': 'Hồ Chí Minh',
+    'Times City': 'Hồ Chí Minh',
+    'Tp Hồ Chí Minh': 'Hồ Chí Minh',
+    'Fpt Shop Trần Văn Thời': 'Hồ Chí Minh',
+    'Bình Phước Bình Phước': 'Bình Phước',
+    '52 Dien Bien Phu Street': 'Hồ Chí Minh',
+    '54A Nguyễn Chí Thanh': 'Hồ Chí Minh',
+    'Attapeu': 'Hồ Chí Minh',
+    'Bình Phước B': 'Bình Phước',
+    'Củ Chi': 'Hồ Chí Minh',
+    'Kratie': 'Nước Ngoài',
+    'Hòa Bình Bắc Cạn': 'Bắc Cạn',
+    'Champasak': 'Nước Ngoài',
+    'Công Ty Tnhh Iljin Display Vina': 'Hồ Chí Minh',
+    'Lào Cai 6 Nơi Khác': 'Lào Cai',
+    '647 Quang Trung Phường 11 Quận Gò Vấp': 'Hồ Chí Minh',
+    'Miền Nam 4 Nơi Khác': 'Miền Nam',
+    'Đồng Bằng Sông Cửu Long': 'Hà Nội',
+    'Kampong Speu': 'Nước Ngoài',
+    'Bangkok': 'Nước Ngoài',
+    'Kv Bắc Trung Bộ Kv Nam Trung Bộ Đồng Bằng Sông Cửu Long': 'Hà Nội',
+    'Lào Cai Hòa Bình': 'Lào Cai',
+    'Gò VấP': 'Hồ Chí Minh',
+    'Phường 13 Quận 10': 'Hồ Chí Minh',
+    'Trung Văn': 'Hà Nội',
+    'Phước Long': 'Bình Phước',
+    'Lô Cn5A Cụm Công Nghiệp Gia Lập Xã Gia Lập Huyện Gia Viễn': 'Ninh Bình',
+    'Kcn Sóng Thần 1': 'Bình Dương',
+    'Kv Tây Nguyên': 'Tây Nguyên',
+    'Đồng Bằng Sông Hồng': 'Hà Nội',
+    'Thanh Hoá 2 Nơi Khác': 'Thanh Hóa',
+    'Tuân Nguyễnnguyn': 'Hà Nội',
+    'Phường 19': 'Hồ Chí Minh',
+    'Japan': 'Nước Ngoài',
+    'Vpbank Cn Ba Đình': 'Hà Nội'
+}
+
 # Salary categories (based on quantiles)
 SALARY_CATEGORIES = {
     'Thấp': (0, 0.25),
@@ -114,17 +799,114 @@ SALARY_CATEGORIES = {
 # Outlier detection parameters
 IQR_FACTOR = 3.0  # Cho phép outliers nhẹ hơn
 
+# Các features số của mô hình (thứ tự cột đầu tiên trong features_list)
+NUMERICAL_FEATURES = [
+    'experience_years', 'skills_count', 'fields_count',
+    'position_level_encoded', 'exp_position_interaction',
+    'skills_exp_interaction', 'salary_range', 'salary_range_ratio'
+]
+
 # Model parameters
 CV_FOLDS = 5
 N_TOP_SKILLS = 10
 N_TOP_FIELDS = 10
 N_TOP_CITIES = 10
 
+# Tìm tham số khi huấn luyện (python scripts/train_model.py), lưới giống GridSearchCV trong notebook 05
+RF_PARAM_GRID = {
+    'n_estimators': [100, 200],
+    'max_depth': [10, 15, 20],
+    'min_samples_split': [2, 5],
+    'min_samples_leaf': [1, 2]
+}
+SEARCH_CV_FOLDS = 3
+HALVING_FACTOR = 3  # Mỗi vòng successive halving giữ lại 1/HALVING_FACTOR số ứng viên
+TRAIN_N_JOBS = int(os.environ.get('SALARY_TRAIN_N_JOBS', '-1'))  # Số core dùng khi huấn luyện (-1: tất cả)
+TRAIN_CACHE_DIR = PROCESSED_DATA_DIR / 'train_cache'  # Tập train/test và các fold CV đã chia (.npy)
+
+# Thu gọn forest sau khi train (python -m src.model.regression): chọn cây, giới hạn độ sâu và chưng cất
+# thành forest nhỏ hơn, miễn MAE trên tập validation không tăng quá COMPACTION_MAE_BUDGET (tương đối)
+COMPACTION_MAE_BUDGET = 0.01
+COMPACTION_MIN_TREES = 10  # Giữ ít nhất số cây này để khoảng dự đoán theo phân vị các cây còn ý nghĩa
+COMPACTION_DEPTHS = [16, 12, 10, 8]  # Các độ sâu tối đa thử cắt (chỉ những giá trị nhỏ hơn độ sâu hiện tại)
+COMPACTION_DISTILL_GRID = [(20, 10), (30, 12), (50, 12), (50, 16)]  # (n_estimators, max_depth) của forest chưng cất
+
+# Phân khúc thị trường (python -m src.model.clustering): MiniBatchKMeans trên features thưa theo từng batch,
+# lúc phục vụ mỗi dự đoán được gán phân khúc của centroid gần nhất (lương dự đoán thay cho lương thật)
+MARKET_SEGMENTS_DIR = MODELS_DIR / 'market_segments'
+MARKET_SEGMENTS_ENABLED = os.environ.get('SALARY_MARKET_SEGMENTS', '1') == '1'  # Gắn phân khúc vào kết quả nếu có
+CLUSTER_N_CLUSTERS = 4  # Như KMeans của notebook 06
+CLUSTER_BATCH_SIZE = 4096
+CLUSTER_N_EPOCHS = 3  # Số lượt duyệt dữ liệu của partial_fit
+CLUSTER_NUMERIC_FEATURES = ['salary_avg_vnd', 'experience_years', 'skills_count', 'position_level_encoded']
+CLUSTER_SPARSE_WEIGHT = 0.5  # Trọng số các cột 0/1 (skills, fields, cities) so với các cột số đã chuẩn hóa
+CLUSTER_TOP_TOKENS = 3  # Số skills/fields/cities phổ biến nhất trong mô tả mỗi phân khúc
+
+# Tin tuyển dụng tương tự (python -m src.model.similar_jobs, endpoint /api/similar-jobs)
+SIMILAR_JOBS_DIR = MODELS_DIR / 'similar_jobs'
+SIMILAR_JOBS_K = 5  # Số tin trả về mặc định
+SIMILAR_JOBS_MAX_K = 50
+# Trọng số điểm tương đồng: Jaccard skills/fields, Jaccard thành phố, độ gần cấp bậc và kinh nghiệm
+SIMILAR_JOBS_WEIGHTS = {'tokens': 0.5, 'city': 0.2, 'position': 0.15, 'experience': 0.15}
+SIMILAR_JOBS_EXPERIENCE_SCALE = 10  # Chênh lệch kinh nghiệm (năm) ứng với độ gần bằng 0
+SIMILAR_JOBS_COLUMNS = ['job_title', 'city', 'position_level', 'experience', 'salary_min', 'salary_max',
+                        'salary_avg_vnd']  # Thông tin của mỗi tin trả về (các cột có trong featured_data)
+
+# Đánh giá mô hình (python scripts/evaluate_model.py), các phân tích giống notebook 06
+EVALUATION_CV_FOLDS = CV_FOLDS
+EVALUATION_LEARNING_CURVE_POINTS = 10  # Số kích thước tập train của learning curve (0: bỏ qua)
+EVALUATION_LEARNING_CURVE_FOLDS = 3
+EVALUATION_SALARY_BINS = [0, 10, 20, 30, 50, float('inf')]  # Triệu VND, cùng đơn vị với salary_avg_vnd
+EVALUATION_SALARY_LABELS = ['Dưới 10M', '10M-20M', '20M-30M', '30M-50M', 'Trên 50M']
+EVALUATION_TOP_CITIES = 10
+EVALUATION_ERROR_THRESHOLDS = [10, 20, 30]  # Ngưỡng sai số phần trăm
+EVALUATION_CACHE_DIR = PROCESSED_DATA_DIR / 'evaluation_cache'  # Dự đoán của các lần fit CV (.npy)
+EVALUATION_RESULTS_PATH = MODELS_DIR / 'evaluation_results.json'
+TEST_PREDICTIONS_FILE = PROCESSED_DATA_DIR / 'test_predictions.csv'
+
 # Flask app configuration
 FLASK_SECRET_KEY = 'your-secret-key-change-this-in-production'
 FLASK_DEBUG = True
 FLASK_HOST = '0.0.0.0'
 FLASK_PORT = 5000
+ADMIN_TOKEN = os.environ.get('SALARY_ADMIN_TOKEN')  # Token cho các endpoint /admin (không đặt thì tắt)
+
+# API configuration
+API_BATCH_MAX_SIZE = 5000  # Số công việc tối đa mỗi lần gọi /api/predict/batch
+VECTORIZED_ENCODE_MIN_BATCH = 256  # Batch từ kích thước này được mã hóa bằng FeatureBuilder.transform
+
+# So khớp gần đúng skills/fields/city người dùng nhập với các cột features (sai chính tả, có/không dấu).
+# Tắt mặc định: lúc train FeatureBuilder chỉ khớp chính xác, bật lên thì vector của các token lạ sẽ khác lúc train
+FUZZY_TOKEN_MATCHING = os.environ.get('SALARY_FUZZY_MATCH', '0') == '1'
+FUZZY_MATCH_THRESHOLD = 0.6  # Hệ số Dice tối thiểu trên trigram
+FUZZY_MATCH_CACHE_SIZE = 65536  # Số token đã chuẩn hóa/đã tra cứu được nhớ lại
+
+# Micro-batching: gom các request /api/predict đồng thời thành một lần gọi mô hình
+MICRO_BATCH_ENABLED = os.environ.get('SALARY_MICRO_BATCH', '0') == '1'
+MICRO_BATCH_MAX_WAIT_MS = 2  # Thời gian chờ tối đa để gom thêm request (ms)
+MICRO_BATCH_MAX_SIZE = 64  # Số request tối đa trong một batch
+
+# Pool dự đoán có giới hạn (tắt mặc định): quá tải thì trả về 429/503 kèm Retry-After thay vì xếp hàng vô hạn
+INFERENCE_POOL_ENABLED = os.environ.get('SALARY_INFERENCE_POOL', '0') == '1'
+INFERENCE_POOL_WORKERS = int(os.environ.get('SALARY_INFERENCE_WORKERS', '0'))  # Số luồng dự đoán (0: số core)
+INFERENCE_QUEUE_LIMIT = int(os.environ.get('SALARY_INFERENCE_QUEUE_LIMIT', '32'))  # Số request được chờ tối đa
+INFERENCE_QUEUE_TIMEOUT_S = 10  # Thời gian chờ kết quả tối đa trước khi trả về 503 (giây)
+INFERENCE_RETRY_AFTER_S = 1  # Giá trị nhỏ nhất của header Retry-After (giây)
+SERVER_THREADS = int(os.environ.get('SALARY_SERVER_THREADS', '16'))  # Số luồng nhận request của waitress
+
+# HTTP cache và nén: ETag/Last-Modified cho các trang tĩnh và /api/model-info, gzip cho HTML/JSON
+GZIP_ENABLED = os.environ.get('SALARY_GZIP', '1') == '1'
+GZIP_MIN_SIZE = 500  # Chỉ nén response từ kích thước này (bytes)
+GZIP_LEVEL = 6
+PAGE_CACHE_MAX_AGE = 300  # Cache-Control max-age của các trang tĩnh (giây)
+MODEL_INFO_CACHE_MAX_AGE = 60  # Cache-Control max-age của /api/model-info (giây)
+
+# Benchmark hiệu năng (python scripts/benchmark.py)
+BENCHMARK_DIR = BASE_DIR / 'benchmarks'
+BENCHMARK_BASELINE_FILE = BENCHMARK_DIR / 'baseline.json'  # Kết quả chuẩn để so sánh
+BENCHMARK_RESULTS_FILE = BENCHMARK_DIR / 'results.json'  # Kết quả lần chạy gần nhất
+BENCHMARK_REGRESSION_THRESHOLD = float(os.environ.get('SALARY_BENCHMARK_THRESHOLD', '0.25'))  # Chậm hơn 25% là lỗi
+BENCHMARK_DATA_SIZES = [1000, 10000, 50000]  # Số dòng dữ liệu khi đo DataLoader
 
 # Logging
 LOG_LEVEL = 'INFO'
@@ -150,7 +932,8 @@ def get_config():
             'cleaned_data': str(CLEANED_DATA_FILE),
             'featured_data': str(FEATURED_DATA_FILE),
             'model': str(BEST_MODEL_PATH),
-            'scaler': str(SCALER_PATH)
+            'scaler': str(SCALER_PATH),
+            'model_bundle': str(MODEL_BUNDLE_DIR)
         },
         'parameters': {
             'exchange_rate': EXCHANGE_RATE,
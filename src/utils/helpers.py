@@ -0,0 +1,64 @@
+import os
+import sys
+from pathlib import Path
+
+
+# Đọc các trường bộ nhớ (kB) từ một file trong /proc
+def _read_proc_fields(path, fields):
+    values = {}
+    with open(path, 'r') as f:
+        for line in f:
+            name, _, rest = line.partition(':')
+            if name in fields:
+                values[name] = int(rest.split()[0])
+    return values
+
+
+# Báo cáo bộ nhớ của process hiện tại (MB), kèm phần bộ nhớ của các file được map
+# trong mapped_dir (ví dụ thư mục model bundle dùng chung giữa các worker)
+def memory_report(mapped_dir=None):
+    report = {'pid': os.getpid()}
+    fields = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+
+    try:
+        values = _read_proc_fields('/proc/self/smaps_rollup', fields)
+        for name in fields:
+            report[f'{name.lower()}_mb'] = values.get(name, 0) / 1024
+    except OSError:
+        # Không có /proc: macOS chỉ có peak RSS (module resource), Windows không có cả resource
+        try:
+            import resource
+        except ImportError:
+            return report
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        report['peak_rss_mb'] = peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+        return report
+
+    if mapped_dir is not None:
+        report['mapped'] = _mapped_files_report(Path(mapped_dir).resolve())
+
+    return report
+
+
+# Tổng Rss/Pss của các vùng nhớ map từ file nằm trong thư mục mapped_dir
+def _mapped_files_report(mapped_dir):
+    totals = {'files': 0, 'rss_mb': 0.0, 'pss_mb': 0.0}
+    current = None
+    seen = set()
+
+    try:
+        with open('/proc/self/smaps', 'r') as f:
+            for line in f:
+                parts = line.split()
+                if '-' in parts[0] and len(parts) >= 5 and ':' not in parts[0]:
+                    path = parts[5] if len(parts) >= 6 else ''
+                    current = path if path.startswith(str(mapped_dir)) else None
+                    if current is not None and current not in seen:
+                        seen.add(current)
+                        totals['files'] += 1
+                elif current is not None and parts[0] in ('Rss:', 'Pss:'):
+                    totals[f'{parts[0][:-1].lower()}_mb'] += int(parts[1]) / 1024
+    except OSError:
+        pass
+
+    return totals
@@ -0,0 +1,206 @@
+import threading
+from bisect import bisect_left
+
+# Ngưỡng bucket (giây) cho histogram độ trễ: từ 50µs đến 10s
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+# Định dạng giá trị số theo chuẩn text của Prometheus
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Escape giá trị label (\\, " và xuống dòng)
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Định dạng labels {a="x",b="y"}
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+# Một chuỗi giá trị của counter/gauge ứng với một bộ labels
+class _Value:
+
+    def __init__(self, lock):
+        self._lock = lock
+        self.value = 0.0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def set(self, value):
+        self.value = value
+
+
+# Một chuỗi giá trị của histogram ứng với một bộ labels
+class _HistogramValue:
+
+    def __init__(self, lock, buckets):
+        self._lock = lock
+        self._buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    # Ghi nhận một giá trị (bucket cuối là +Inf)
+    def observe(self, value):
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+# Metric có labels: giữ một chuỗi giá trị cho mỗi bộ labels, labels() nên được gọi một lần rồi dùng lại
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}
+
+    def _new_child(self):
+        return _Value(self._lock)
+
+    # Lấy chuỗi giá trị theo labels (tạo mới nếu chưa có)
+    def labels(self, *values):
+        values = tuple(str(value) for value in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for values, child in sorted(self._children.items()):
+            lines.append(f'{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}')
+        return lines
+
+
+# Counter: chỉ tăng
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+
+# Gauge: giá trị tại thời điểm hiện tại
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value):
+        self.labels().set(value)
+
+
+# Histogram với các bucket cố định
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self._lock, self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for values, child in sorted(self._children.items()):
+            with self._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, values, ('le', _format_value(bound)))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+# Tập hợp các metrics của process; collector là hàm trả về các Metric được tạo lúc scrape
+# (dùng cho số liệu đã có sẵn ở nơi khác như thống kê cache)
+class MetricsRegistry:
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    # Đăng ký metric (trả về metric đã có nếu trùng tên)
+    def _register(self, cls, name, documentation, labelnames=(), **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def register_collector(self, collector):
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    # Xuất toàn bộ metrics theo định dạng text của Prometheus
+    def render(self):
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                for metric in collector():
+                    lines.extend(metric.render())
+            except Exception as e:
+                print(f"Error collecting metrics: {str(e)}")
+        return '\n'.join(lines) + '\n'
+
+
+# Registry dùng chung của process
+METRICS = MetricsRegistry()
+
+# Độ trễ của từng bước xử lý một request dự đoán
+STAGE_LATENCY = METRICS.histogram(
+    'salary_stage_duration_seconds', 'Thời gian của từng bước xử lý request dự đoán', ['stage']
+)
+
+# Thời gian load mô hình gần nhất của mỗi backend
+MODEL_LOAD_SECONDS = METRICS.gauge(
+    'salary_model_load_seconds', 'Thời gian load mô hình gần nhất (giây)', ['backend']
+)
+
+# Thời gian khởi động: từng bước (import, load artifact) và tổng thời gian tới khi sẵn sàng phục vụ
+STARTUP_STAGE_SECONDS = METRICS.gauge(
+    'salary_startup_stage_seconds', 'Thời gian của từng bước khởi động (giây)', ['stage']
+)
+TIME_TO_READY_SECONDS = METRICS.gauge(
+    'salary_time_to_ready_seconds', 'Thời gian từ lúc process khởi động tới khi predictor sẵn sàng (giây)'
+)
@@ -0,0 +1,84 @@
+import importlib
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from src.utils.metrics import STARTUP_STAGE_SECONDS, TIME_TO_READY_SECONDS
+
+
+# Thời điểm process khởi động (epoch, đọc từ /proc), nếu không đọc được thì lấy thời điểm import module này
+def _process_start_time():
+    try:
+        with open('/proc/self/stat', 'r') as f:
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime', 'r') as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - uptime + start_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return time.time()
+
+
+# Ghi lại thời gian của từng bước khởi động (import module nặng, load từng artifact) và thời gian
+# từ lúc process khởi động tới khi sẵn sàng phục vụ
+class StartupReport:
+
+    def __init__(self):
+        self.process_started = _process_start_time()
+        self.ready_at = None
+        self.stages = []
+        self._lock = threading.Lock()
+
+    # Ghi thời gian một bước
+    def add(self, name, seconds):
+        with self._lock:
+            self.stages.append((name, seconds))
+        STARTUP_STAGE_SECONDS.labels(name).set(seconds)
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    # Import các module và đo thời gian từng module (bỏ qua module đã được import)
+    def import_modules(self, modules):
+        for module in modules:
+            if module in sys.modules:
+                continue
+            with self.stage(f'import {module}'):
+                importlib.import_module(module)
+
+    # Đánh dấu đã sẵn sàng (chỉ lần đầu tiên, các lần reload mô hình sau không tính)
+    def mark_ready(self):
+        if self.ready_at is None:
+            self.ready_at = time.time()
+            TIME_TO_READY_SECONDS.set(self.time_to_ready())
+
+    def time_to_ready(self):
+        if self.ready_at is None:
+            return None
+        return self.ready_at - self.process_started
+
+    def to_dict(self):
+        with self._lock:
+            stages = [{'stage': name, 'seconds': round(seconds, 4)} for name, seconds in self.stages]
+        time_to_ready = self.time_to_ready()
+        return {
+            'time_to_ready_s': None if time_to_ready is None else round(time_to_ready, 3),
+            'uptime_s': round(time.time() - self.process_started, 3),
+            'stages': stages
+        }
+
+    def print_report(self):
+        report = self.to_dict()
+        print(f"Startup report (time to ready: {report['time_to_ready_s']}s)")
+        for stage in report['stages']:
+            print(f"   {stage['stage']:40s} {stage['seconds'] * 1000:9.1f} ms")
+
+
+# Báo cáo khởi động dùng chung của process
+STARTUP = StartupReport()
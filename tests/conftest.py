@@ -0,0 +1,131 @@
+import json
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from src.utils.config import EXPERIENCE_MAPPING, POSITION_ORDER
+
+SKILLS = ['python', 'sql', 'excel', 'java', 'giao tiếp', 'tiếng anh',
+          'kế toán', 'bán hàng', 'marketing', 'photoshop']
+FIELDS = ['it', 'data analysis', 'kinh doanh', 'kế toán/kiểm toán', 'marketing',
+          'nhân sự', 'xây dựng', 'giáo dục', 'ngân hàng', 'bán lẻ']
+CITIES = ['Hồ Chí Minh', 'Hà Nội', 'Đà Nẵng', 'Bình Dương', 'Đồng Nai',
+          'Hải Phòng', 'Long An', 'Bắc Ninh', 'Hưng Yên', 'Tây Ninh']
+
+NUMERICAL_FEATURES = [
+    'experience_years', 'skills_count', 'fields_count',
+    'position_level_encoded', 'exp_position_interaction',
+    'skills_exp_interaction', 'salary_range', 'salary_range_ratio'
+]
+FEATURES_LIST = (
+    NUMERICAL_FEATURES
+    + [f'has_skill_{s.replace(" ", "_")}' for s in SKILLS]
+    + [f'field_{f.replace(" ", "_").replace("/", "_")}' for f in FIELDS]
+    + [f'city_{c.lower().replace(" ", "_")}' for c in CITIES]
+)
+
+
+def pytest_addoption(parser):
+    parser.addoption('--run-benchmarks', action='store_true', default=False,
+                     help='Chạy benchmark hiệu năng (so sánh với benchmarks/baseline.json)')
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'benchmark: benchmark hiệu năng, chỉ chạy với --run-benchmarks')
+
+
+# Bỏ qua các benchmark nếu không có --run-benchmarks
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--run-benchmarks'):
+        return
+    skip = pytest.mark.skip(reason='cần --run-benchmarks')
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip)
+
+
+# Sinh input ngẫu nhiên giống dữ liệu người dùng gửi lên API
+def make_inputs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    experiences = list(EXPERIENCE_MAPPING)
+    inputs = []
+    for _ in range(n):
+        skills = rng.choice(SKILLS + ['docker', 'Go'], size=rng.integers(0, 5), replace=False)
+        fields = rng.choice(FIELDS + ['logistics'], size=rng.integers(0, 3), replace=False)
+        inputs.append({
+            'job_title': 'Data Analyst',
+            'city': str(rng.choice(CITIES + ['Cần Thơ'])),
+            'experience': str(rng.choice(experiences)),
+            'position_level': str(rng.choice(POSITION_ORDER)),
+            'skills': ', '.join(s.title() for s in skills),
+            'job_fields': ', '.join(fields),
+        })
+    return inputs
+
+
+# Sinh bảng features + target tổng hợp để train mô hình nhỏ thay thế
+def make_featured_frame(n=2000, seed=42):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(0.0, index=range(n), columns=FEATURES_LIST)
+    df['experience_years'] = rng.choice(list(EXPERIENCE_MAPPING.values()), size=n)
+    df['position_level_encoded'] = rng.integers(0, len(POSITION_ORDER), size=n)
+    for col in FEATURES_LIST[len(NUMERICAL_FEATURES):]:
+        df[col] = (rng.random(n) < 0.2).astype(int)
+    df['skills_count'] = df[[c for c in FEATURES_LIST if c.startswith('has_skill_')]].sum(axis=1)
+    df['fields_count'] = df[[c for c in FEATURES_LIST if c.startswith('field_')]].sum(axis=1)
+    df['exp_position_interaction'] = df['experience_years'] * df['position_level_encoded']
+    df['skills_exp_interaction'] = df['skills_count'] * df['experience_years']
+    target = (
+        6 + 1.5 * df['experience_years'] + 2.0 * df['position_level_encoded']
+        + 0.8 * df['skills_count'] + 4 * df['city_hồ_chí_minh'] + rng.normal(0, 1.5, size=n)
+    )
+    return df, target
+
+
+@pytest.fixture(scope='session')
+def model_dir(tmp_path_factory):
+    path = tmp_path_factory.mktemp('models')
+    X, y = make_featured_frame()
+    model = RandomForestRegressor(n_estimators=20, max_depth=8, random_state=42)
+    model.fit(X, y)
+
+    joblib.dump(model, path / 'best_model.pkl')
+    with open(path / 'features_list.json', 'w') as f:
+        json.dump(FEATURES_LIST, f)
+    with open(path / 'model_info.json', 'w') as f:
+        json.dump({'model_type': 'RandomForestRegressor', 'test_mae': 1.2, 'test_r2': 0.9}, f)
+    return path
+
+
+# Tham số SalaryPredictor với mọi artifact trong thư mục mô hình test (không rơi về models/ của repo)
+def predictor_paths(model_dir, **overrides):
+    return {
+        'model_path': model_dir / 'best_model.pkl',
+        'scaler_path': model_dir / 'scaler.pkl',
+        'features_path': model_dir / 'features_list.json',
+        'model_info_path': model_dir / 'model_info.json',
+        'bundle_dir': model_dir / 'best_model_bundle',
+        'encoder_path': model_dir / 'feature_encoder.pkl',
+        'segments_dir': model_dir / 'market_segments',
+        **overrides
+    }
+
+
+@pytest.fixture
+def predictor(model_dir):
+    from src.model.predictor import SalaryPredictor
+    return SalaryPredictor(**predictor_paths(model_dir))
+
+
+@pytest.fixture
+def client(predictor, monkeypatch):
+    from app import create_app
+    import app.routes as routes
+    from src.model.registry import ModelManager
+    monkeypatch.setattr(routes, 'model_manager', ModelManager(predictor=predictor, version='test'))
+    flask_app = create_app()
+    flask_app.config['TESTING'] = True
+    return flask_app.test_client()
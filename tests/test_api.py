@@ -0,0 +1,302 @@
+import gzip
+import json
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from tests.conftest import make_inputs, predictor_paths
+
+
+def test_api_predict(client):
+    response = client.post('/api/predict', json=make_inputs(1)[0])
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['success'] is True
+    assert body['data']['predicted_salary'] > 0
+
+
+def test_api_predict_missing_fields(client):
+    response = client.post('/api/predict', json={'job_title': 'Kế toán'})
+    assert response.status_code == 400
+    assert 'city' in response.get_json()['error']
+
+
+def test_predict_batch_matches_single_predictions(predictor):
+    inputs = make_inputs(40, seed=3)
+    batch = predictor.predict_batch(inputs)
+    assert batch == pytest.approx([predictor.predict(x) for x in inputs], rel=1e-12)
+    assert predictor.predict_batch([]) == []
+
+
+def test_api_predict_batch_reports_per_item_errors(client):
+    items = make_inputs(3, seed=4)
+    items.insert(1, {'job_title': 'Kế toán'})
+    items.append({**items[0], 'salary_min': 'abc', 'salary_max': 10})
+
+    response = client.post('/api/predict/batch', json={'items': items})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['summary'] == {'total': 5, 'succeeded': 3, 'failed': 2}
+    assert [r['success'] for r in body['data']] == [True, False, True, True, False]
+    assert 'city' in body['data'][1]['error']
+    assert body['data'][0]['data']['predicted_salary'] == pytest.approx(
+        client.post('/api/predict', json=items[0]).get_json()['data']['predicted_salary']
+    )
+
+
+def test_api_predict_batch_rejects_empty(client):
+    assert client.post('/api/predict/batch', json=[]).status_code == 400
+
+
+def test_health_reports_model_version(client):
+    body = client.get('/health').get_json()
+    assert body['status'] == 'healthy'
+    assert body['model_version'] == 'test'
+    info = client.get('/api/model-info').get_json()['data']
+    assert info['active_version'] == 'test'
+
+
+def test_admin_reload_requires_token(client, monkeypatch):
+    import app.routes as routes
+    monkeypatch.setattr(routes, 'ADMIN_TOKEN', None)
+    assert client.post('/admin/reload-model').status_code == 403
+    monkeypatch.setattr(routes, 'ADMIN_TOKEN', 'secret')
+    assert client.post('/admin/reload-model', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+
+
+def test_admin_reload_activates_only_after_successful_load(client, monkeypatch, model_dir, tmp_path):
+    import shutil
+    import app.routes as routes
+    from src.model.registry import ModelManager, ModelRegistry
+
+    registry = ModelRegistry(tmp_path / 'registry')
+    registry.publish(model_dir, version='v1')
+    broken_dir = tmp_path / 'broken'
+    shutil.copytree(model_dir, broken_dir)
+    features = json.loads((model_dir / 'features_list.json').read_text())
+    (broken_dir / 'features_list.json').write_text(json.dumps(features[::-1]))
+    registry.publish(broken_dir, version='v2', activate=False, export_bundle=False)
+    registry.publish(model_dir, version='v3', activate=False)
+
+    manager = ModelManager(registry)
+    manager.reload()
+    monkeypatch.setattr(routes, 'model_manager', manager)
+    monkeypatch.setattr(routes, 'ADMIN_TOKEN', 'secret')
+    headers = {'X-Admin-Token': 'secret'}
+
+    assert client.post('/admin/reload-model', json={'version': 'v9'}, headers=headers).status_code == 404
+    assert client.post('/admin/reload-model', json={'version': 'v2'}, headers=headers).status_code == 500
+    assert registry.active_version() == 'v1' and manager.version == 'v1'
+
+    response = client.post('/admin/reload-model', json={'version': 'v3'}, headers=headers)
+    assert response.status_code == 200
+    assert registry.active_version() == 'v3' and manager.version == 'v3'
+    assert response.get_json()['data']['active_version'] == 'v3' and 'note' in response.get_json()['data']
+
+
+def test_inference_pool_rejects_when_queue_full():
+    import threading
+    from src.model.inference_pool import InferencePool, PoolBusyError
+
+    pool = InferencePool(max_workers=1, queue_limit=1, timeout=5, retry_after=2)
+    release = threading.Event()
+    running = pool.submit(release.wait)
+    queued = pool.submit(lambda: 'done')
+    assert pool.stats()['queue_depth'] == 1
+
+    with pytest.raises(PoolBusyError) as busy:
+        pool.submit(lambda: None)
+    assert busy.value.status_code == 429 and busy.value.retry_after == 2
+
+    release.set()
+    assert running.result(5) is True and queued.result(5) == 'done'
+    assert pool.run(lambda x: x + 1, 1) == 2
+    stats = pool.stats()
+    assert stats['rejected'] == 1 and stats['completed'] == 3 and stats['in_flight'] == 0
+    pool.shutdown()
+
+
+def test_api_predict_returns_429_with_retry_after(client, monkeypatch):
+    import app.routes as routes
+    from src.model.inference_pool import InferencePool
+
+    pool = InferencePool(max_workers=1, queue_limit=0, retry_after=3)
+    monkeypatch.setattr(routes, 'inference_pool', pool)
+    assert client.post('/api/predict', json=make_inputs(1)[0]).status_code == 200
+    assert client.get('/health').get_json()['queue_depth'] == 0
+
+    monkeypatch.setattr(pool, '_pending', pool.capacity)
+    response = client.post('/api/predict', json=make_inputs(1)[0])
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '3'
+    assert response.get_json()['retry_after'] == 3
+    assert client.post('/api/predict/batch', json=make_inputs(2)).status_code == 429
+    assert client.post('/predict', data=make_inputs(1)[0]).status_code == 429
+
+
+def test_metrics_endpoint_reports_routes_and_stages(client):
+    client.post('/api/predict', json=make_inputs(1, seed=5)[0])
+    client.post('/api/predict', json={'job_title': 'Kế toán'})
+    client.get('/predict')
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    assert 'salary_http_requests_total{route="/api/predict",status="400"}' in text
+    assert 'salary_http_request_errors_total{route="/api/predict"}' in text
+    assert 'salary_http_request_duration_seconds_bucket{route="/api/predict",le="+Inf"}' in text
+    for stage in ['validation', 'preprocess', 'model_predict', 'build_result', 'render']:
+        assert f'salary_stage_duration_seconds_count{{stage="{stage}"}}' in text
+    assert 'salary_model_load_seconds{backend=' in text
+    assert 'salary_prediction_cache_hits' in text
+
+
+def test_histogram_renders_cumulative_buckets():
+    from src.utils.metrics import MetricsRegistry
+
+    registry = MetricsRegistry()
+    histogram = registry.histogram('latency_seconds', 'Latency', ['stage'], buckets=[0.1, 1])
+    child = histogram.labels('a')
+    for value in [0.05, 0.1, 0.5, 3]:
+        child.observe(value)
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{stage="a",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{stage="a",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{stage="a",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{stage="a"} 3.65' in lines
+    assert 'latency_seconds_count{stage="a"} 4' in lines
+
+
+def test_static_page_conditional_get_and_gzip(client):
+    first = client.get('/about', headers={'Accept-Encoding': 'gzip'})
+    assert first.status_code == 200
+    assert first.headers['Content-Encoding'] == 'gzip'
+    assert 'max-age' in first.headers['Cache-Control']
+    etag = first.headers['ETag']
+    assert 'test' in etag
+
+    plain = client.get('/about')
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.headers['ETag'] == etag
+    assert gzip.decompress(first.data) == plain.data
+
+    assert client.get('/about', headers={'If-None-Match': etag}).status_code == 304
+    since = first.headers['Last-Modified']
+    assert client.get('/about', headers={'If-Modified-Since': since}).status_code == 304
+
+
+def test_model_info_etag_follows_model_version(client, monkeypatch, predictor, model_dir):
+    import app.routes as routes
+    from app.http_cache import ResponseCache
+    from src.model.predictor import SalaryPredictor
+    from src.model.registry import ModelManager
+    response = client.get('/api/model-info')
+    etag = response.headers['ETag']
+    assert 'cache' not in response.get_json()['data']
+    assert client.get('/api/model-info', headers={'If-None-Match': etag}).status_code == 304
+    assert 'memory' in client.get('/api/model-info?stats=1').get_json()['data']
+
+    # Predictor khác load từ cùng artifacts (như ở worker khác) cho cùng ETag
+    other = SalaryPredictor(**predictor_paths(model_dir))
+    monkeypatch.setattr(routes, 'model_manager', ModelManager(predictor=other, version='test'))
+    monkeypatch.setattr(routes, 'response_cache', ResponseCache())
+    assert client.get('/api/model-info', headers={'If-None-Match': etag}).status_code == 304
+
+    monkeypatch.setattr(routes, 'model_manager', ModelManager(predictor=predictor, version='v2'))
+    response = client.get('/api/model-info', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['data']['active_version'] == 'v2'
+    assert response.headers['ETag'] != etag
+
+
+def test_json_responses_gzip_when_large(client):
+    items = make_inputs(20, seed=5)
+    response = client.post('/api/predict/batch', json={'items': items}, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert len(json.loads(gzip.decompress(response.data))['data']) == 20
+    small = client.post('/api/predict/batch', json=[], headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+
+
+def test_app_starts_without_heavy_imports():
+    code = ("import sys; from app import create_app; create_app('lazy'); "
+            "print('heavy:', [m for m in ('pandas', 'joblib', 'sklearn', 'numpy') if m in sys.modules])")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            cwd=Path(__file__).parent.parent, check=True)
+    assert result.stdout.strip().splitlines()[-1] == 'heavy: []'
+
+
+def test_readiness_is_separate_from_liveness(predictor, monkeypatch):
+    import app.routes as routes
+    from app import create_app
+    from src.model.registry import ModelManager
+
+    release = threading.Event()
+    manager = ModelManager()
+    monkeypatch.setattr(manager, '_build_predictor', lambda version: release.wait(5) and predictor)
+    monkeypatch.setattr(routes, 'model_manager', manager)
+    client = create_app('background').test_client()
+
+    assert client.get('/health/live').status_code == 200
+    response = client.get('/health/ready')
+    assert response.status_code == 503 and response.get_json()['state'] == 'loading'
+    assert client.get('/health').status_code == 503
+    for url, payload in [('/api/predict', make_inputs(1)[0]), ('/api/predict/batch', make_inputs(2))]:
+        response = client.post(url, json=payload)
+        assert response.status_code == 503 and response.headers['Retry-After']
+    assert client.get('/api/model-info').status_code == 503
+
+    release.set()
+    manager.ensure_loaded(timeout=5)
+    body = client.get('/health/ready').get_json()
+    assert body['ready'] and body['state'] == 'ready'
+    assert 'load model' in [stage['stage'] for stage in body['startup']['stages']]
+
+
+def test_lazy_startup_loads_on_first_prediction(predictor, monkeypatch):
+    import app.routes as routes
+    from app import create_app
+    from src.model.registry import ModelManager
+
+    manager = ModelManager()
+    monkeypatch.setattr(manager, '_build_predictor', lambda version: predictor)
+    monkeypatch.setattr(routes, 'model_manager', manager)
+    client = create_app('lazy').test_client()
+
+    assert client.get('/health/ready').status_code == 200
+    assert client.get('/about').status_code == 200
+    assert manager.state == 'idle'
+    assert client.post('/api/predict', json=make_inputs(1)[0]).status_code == 200
+    assert manager.state == 'ready'
+
+
+def test_api_similar_jobs(client, predictor, monkeypatch, tmp_path):
+    import numpy as np
+    import app.routes as routes
+    from src.model.similar_jobs import build_similar_jobs_index
+    from tests.conftest import make_featured_frame
+
+    monkeypatch.setattr(routes, 'similar_jobs_index', None)
+    monkeypatch.setattr('src.model.similar_jobs.SIMILAR_JOBS_DIR', tmp_path / 'missing')
+    payload = dict(make_inputs(1, seed=13)[0], k=3)
+    assert client.post('/api/similar-jobs', json=payload).status_code == 503
+
+    X, y = make_featured_frame(n=500, seed=13)
+    X.assign(salary_avg_vnd=y, city='Hà Nội').to_csv(tmp_path / 'featured_data.csv', index=False)
+    index, _ = build_similar_jobs_index(tmp_path / 'featured_data.csv')
+    monkeypatch.setattr(routes, 'similar_jobs_index', index)
+
+    response = client.post('/api/similar-jobs', json=payload)
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    expected = index.query(predictor.encode_input(payload), predictor.features_list, k=3)
+    assert [(job['row'], job['similarity']) for job in data['jobs']] == [(r, round(s, 4)) for r, s in expected]
+    assert data['jobs'][0]['city'] == 'Hà Nội' and np.isclose(data['jobs'][0]['salary_avg_vnd'], y[expected[0][0]])
+
+    for k in [0, 'x', True, 1000]:
+        assert client.post('/api/similar-jobs', json=dict(payload, k=k)).status_code == 400
+    assert client.post('/api/similar-jobs', data='[]', content_type='application/json').status_code == 400
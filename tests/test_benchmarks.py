@@ -0,0 +1,39 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+from src.utils.config import BENCHMARK_BASELINE_FILE, BENCHMARK_REGRESSION_THRESHOLD
+
+
+def load_benchmark_script():
+    spec = importlib.util.spec_from_file_location(
+        'benchmark', Path(__file__).parent.parent / 'scripts' / 'benchmark.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_find_regressions_uses_threshold():
+    benchmark = load_benchmark_script()
+    baseline = {'results': {'a': {'median_us': 100.0}, 'b': {'median_us': 100.0}, 'c': {'median_us': 100.0}}}
+    report = {'results': {'a': {'median_us': 120.0}, 'b': {'median_us': 130.0}, 'new': {'median_us': 1.0}}}
+
+    regressions = benchmark.find_regressions(report, baseline, threshold=0.25)
+    assert [r['name'] for r in regressions] == ['b']
+    assert regressions[0]['ratio'] == 1.3
+    assert benchmark.measure(lambda: None, repeat=2, min_time=0.001)['number'] > 1
+
+
+@pytest.mark.benchmark
+def test_benchmarks_within_baseline(tmp_path):
+    benchmark = load_benchmark_script()
+    report = benchmark.run_benchmarks(quick=True)
+    benchmark.save_report(report, tmp_path / 'results.json')
+    benchmark.print_report(report)
+
+    assert all(result['median_us'] > 0 for result in report['results'].values())
+    baseline = benchmark.load_baseline(BENCHMARK_BASELINE_FILE)
+    if baseline is None:
+        pytest.skip(f'Chưa có baseline {BENCHMARK_BASELINE_FILE}')
+    assert benchmark.find_regressions(report, baseline, BENCHMARK_REGRESSION_THRESHOLD) == []
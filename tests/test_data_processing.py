@@ -0,0 +1,299 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.data_loader import DataLoader, load_csv, iter_csv
+from tests.conftest import CITIES, make_featured_frame
+
+
+# Ghi file featured_data.csv tổng hợp (cột văn bản + các cột features)
+@pytest.fixture
+def featured_csv(tmp_path):
+    df, target = make_featured_frame(n=500, seed=3)
+    rng = np.random.default_rng(3)
+    df.insert(0, 'city', rng.choice(CITIES, size=len(df)))
+    df.insert(1, 'position_level', rng.choice(['Nhân viên', 'Trưởng nhóm', 'Giám đốc'], size=len(df)))
+    df['salary_avg_vnd'] = target
+    path = tmp_path / 'featured_data.csv'
+    df.to_csv(path, index=False, encoding='utf-8-sig')
+    return path
+
+
+def test_load_csv_applies_schema(featured_csv):
+    df = load_csv(featured_csv)
+    default = pd.read_csv(featured_csv)
+
+    assert isinstance(df['city'].dtype, pd.CategoricalDtype)
+    assert df['has_skill_python'].dtype == np.uint8
+    assert df['city_hà_nội'].dtype == np.uint8
+    assert df['experience_years'].dtype == np.float32
+    assert df['salary_avg_vnd'].dtype == np.float64
+    assert list(df.columns) == list(default.columns)
+    pd.testing.assert_frame_equal(df.astype(default.dtypes.to_dict()), default, check_exact=False, rtol=1e-6)
+    assert df.memory_usage(deep=True).sum() < default.memory_usage(deep=True).sum() / 3
+
+
+def test_chunked_load_matches_full_load(featured_csv):
+    full = load_csv(featured_csv)
+    chunks = list(iter_csv(featured_csv, chunksize=128))
+
+    assert [len(chunk) for chunk in chunks] == [128, 128, 128, 116]
+    pd.testing.assert_frame_equal(load_csv(featured_csv, chunksize=128), full)
+
+
+def test_loader_defaults_match_read_csv(featured_csv):
+    df = DataLoader().load_featured_data(featured_csv)
+
+    pd.testing.assert_frame_equal(df, pd.read_csv(featured_csv))
+    assert not (featured_csv.parent / f'{featured_csv.name}.cache').exists()
+
+
+def test_loader_column_pruning(featured_csv):
+    loader = DataLoader(optimize_dtypes=True)
+    df = loader.load_featured_data(featured_csv, columns=['salary_avg_vnd', 'city', 'skills_count'])
+
+    assert list(df.columns) == ['salary_avg_vnd', 'city', 'skills_count']
+    assert isinstance(df['city'].dtype, pd.CategoricalDtype)
+    with pytest.raises(ValueError):
+        load_csv(featured_csv, columns=['khong_ton_tai'])
+
+
+def test_data_cache_roundtrip_and_invalidation(featured_csv, monkeypatch):
+    import src.data.data_loader as data_loader
+    builds = []
+    original_write = data_loader.write_cache
+    monkeypatch.setattr(data_loader, 'write_cache', lambda *args: builds.append(1) or original_write(*args))
+
+    loader = DataLoader(use_cache=True)
+    first = loader.load_featured_data(featured_csv)
+    cached = loader.load_featured_data(featured_csv)
+    pd.testing.assert_frame_equal(cached, first)
+    pd.testing.assert_frame_equal(cached, load_csv(featured_csv))
+
+    # Đổi mtime nhưng nội dung giữ nguyên: so sánh hash, không build lại
+    os.utime(featured_csv, ns=(0, 10**18))
+    loader.load_featured_data(featured_csv)
+    assert len(builds) == 1
+
+    # Nội dung thay đổi: cache được build lại
+    df = pd.read_csv(featured_csv)
+    df.loc[0, 'salary_avg_vnd'] = -1.0
+    df.to_csv(featured_csv, index=False, encoding='utf-8-sig')
+    reloaded = loader.load_featured_data(featured_csv)
+    assert len(builds) == 2
+    assert reloaded.loc[0, 'salary_avg_vnd'] == -1.0
+
+
+def test_load_feature_matrix_is_memory_mapped(featured_csv):
+    from src.data.data_loader import load_feature_matrix
+    features = ['experience_years', 'has_skill_python', 'city_hà_nội']
+    X, y = load_feature_matrix(features, featured_csv, target='salary_avg_vnd')
+
+    expected = pd.read_csv(featured_csv)
+    assert isinstance(X, np.memmap) and X.dtype == np.float32 and X.shape == (500, 3)
+    np.testing.assert_allclose(X, expected[features].to_numpy(), rtol=1e-6)
+    np.testing.assert_array_equal(y, expected['salary_avg_vnd'].to_numpy())
+
+
+# Các bước làm sạch của notebook 02, dùng làm chuẩn để so sánh
+def legacy_clean(df):
+    from src.utils.config import (EXPERIENCE_CLEANING_MAPPING, POSITION_CLEANING_MAPPING,
+                                  CITY_CLEANING_MAPPING)
+    df['job_fields'] = df['job_fields'].fillna('Chưa phân loại')
+    df['skills'] = df['skills'].fillna('Không yêu cầu')
+    df = df.dropna(subset=['job_title', 'city', 'position_level'])
+    for col in ['job_title', 'job_type', 'position_level', 'city', 'experience', 'skills', 'job_fields', 'salary', 'unit']:
+        df[col] = df[col].astype(str).str.strip()
+        df[col] = df[col].str.replace(r'\s+', ' ', regex=True)
+    df['city'] = df['city'].str.title()
+    df['unit'] = df['unit'].str.upper()
+    df['skills'] = df['skills'].astype(str).str.lstrip(', ').str.strip()
+    df['job_fields'] = df['job_fields'].astype(str).str.lstrip(', ').str.strip()
+    df['experience'] = df['experience'].str.lower().replace(EXPERIENCE_CLEANING_MAPPING)
+    df['position_level'] = df['position_level'].str.lower().replace(POSITION_CLEANING_MAPPING)
+    df = df[df['unit'].isin(['VND', 'USD'])]
+    df['city'] = df['city'].replace(CITY_CLEANING_MAPPING)
+    for column in ['salary_min', 'salary_max']:
+        q1, q3 = df[column].quantile(0.25), df[column].quantile(0.75)
+        iqr = q3 - q1
+        df = df[(df[column] >= q1 - 3.0 * iqr) & (df[column] <= q3 + 3.0 * iqr)]
+    df.loc[df['salary_min'] > df['salary_max'], ['salary_min', 'salary_max']] = \
+        df.loc[df['salary_min'] > df['salary_max'], ['salary_max', 'salary_min']].values
+    df = df[(df['salary_min'] > 0) & (df['salary_max'] > 0)]
+    return df.reset_index(drop=True)
+
+
+# Sinh dữ liệu gốc "bẩn": khoảng trắng thừa, chữ hoa/thường lẫn lộn, giá trị thiếu, lương bất thường
+@pytest.fixture
+def raw_csv(tmp_path):
+    from src.utils.config import EXPERIENCE_CLEANING_MAPPING, POSITION_CLEANING_MAPPING, CITY_CLEANING_MAPPING
+    rng = np.random.default_rng(7)
+    n = 3000
+
+    def messy(values, missing=0.0):
+        out = []
+        for value in rng.choice(values, size=n):
+            value = str(value)
+            if rng.random() < 0.3:
+                value = value.upper() if rng.random() < 0.5 else f'  {value}   '
+            if rng.random() < 0.1:
+                value = value.replace(' ', '  \t')
+            out.append(None if rng.random() < missing else value)
+        return out
+
+    salary_min = rng.lognormal(2.5, 0.5, size=n) * 1e6
+    salary_max = salary_min * rng.uniform(0.8, 1.8, size=n)
+    salary_min[rng.random(n) < 0.02] = 0
+    salary_min[rng.random(n) < 0.01] *= 100
+    salary_max[rng.random(n) < 0.02] = np.nan
+    df = pd.DataFrame({
+        'job_title': messy(['Data Analyst', 'Kế toán tổng hợp', 'Nhân viên bán hàng'], missing=0.01),
+        'job_type': messy(['Toàn thời gian', 'Bán thời gian']),
+        'position_level': messy(list(POSITION_CLEANING_MAPPING) + ['Nhân viên', 'Giám đốc'], missing=0.01),
+        'city': messy(list(CITY_CLEANING_MAPPING)[:80] + ['hà nội', 'Hồ Chí Minh', 'Cần Thơ'], missing=0.01),
+        'experience': messy(list(EXPERIENCE_CLEANING_MAPPING)[:60] + ['1-2 năm', 'Không yêu cầu']),
+        'skills': messy([', Python, SQL', 'Excel,  Giao tiếp', 'Bán hàng'], missing=0.15),
+        'job_fields': messy(['IT', ', Kế toán', 'Bán hàng - Kinh doanh'], missing=0.1),
+        'salary': messy(['10 - 15 triệu', 'Thỏa thuận', '1,000 - 2,000 USD']),
+        'salary_min': salary_min,
+        'salary_max': salary_max,
+        'unit': messy(['VND', 'vnd', 'USD', 'EUR'])
+    })
+    path = tmp_path / 'jobs.csv'
+    df.to_csv(path, index=False)
+    return path
+
+
+def test_data_cleaner_matches_notebook(raw_csv, tmp_path):
+    from src.data.data_clearner import DataCleaner
+    expected = legacy_clean(pd.read_csv(raw_csv))
+
+    cleaner = DataCleaner(verbose=False)
+    cleaned = cleaner.clean(load_csv(raw_csv))
+
+    assert cleaned.to_csv(index=False) == expected.to_csv(index=False)
+    assert isinstance(cleaned['city'].dtype, pd.CategoricalDtype)
+
+    report = cleaner.get_report()
+    assert list(report['stage']) == ['missing_essential', 'invalid_unit', 'salary_min_outliers',
+                                     'salary_max_outliers', 'non_positive_salary']
+    assert report['rows_dropped'].sum() == 3000 - len(expected)
+    assert (report['rows_dropped'] > 0).all()
+
+
+def test_feature_builder_training_matches_serving():
+    from scipy import sparse
+    from src.features.feature_builder import FeatureBuilder
+    from tests.conftest import make_inputs
+
+    inputs = make_inputs(300, seed=11)
+    inputs[0]['skills'] = None
+    df = pd.DataFrame(inputs)
+    builder = FeatureBuilder().fit(df, n_skills=8, n_fields=5, n_cities=4)
+    X = builder.transform(df)
+
+    assert sparse.isspmatrix_csr(X) and X.shape == (300, 8 + 8 + 5 + 4)
+    assert len(builder.feature_names) == X.shape[1]
+    for i in (0, 1, 57, 299):
+        indices, values = builder.encode_one(inputs[i])
+        row = np.zeros(X.shape[1])
+        row[np.array(indices, dtype=int)] = values
+        np.testing.assert_array_equal(X[i].toarray().ravel(), row)
+
+
+def test_predictor_uses_saved_feature_encoder(tmp_path):
+    import json
+    from sklearn.ensemble import RandomForestRegressor
+    from src.features.feature_builder import FeatureBuilder
+    from src.model.predictor import SalaryPredictor
+    from tests.conftest import make_inputs
+
+    inputs = make_inputs(400, seed=5)
+    df = pd.DataFrame(inputs)
+    builder = FeatureBuilder().fit(df, n_skills=12, n_fields=11, n_cities=11)
+    X = builder.transform(df)
+    y = X[:, 0].toarray().ravel() * 2 + X[:, 1].toarray().ravel()
+    model = RandomForestRegressor(n_estimators=5, max_depth=4, random_state=0).fit(X, y)
+
+    import joblib
+    joblib.dump(model, tmp_path / 'best_model.pkl')
+    builder.save(tmp_path / 'feature_encoder.pkl')
+    with open(tmp_path / 'features_list.json', 'w') as f:
+        json.dump(builder.feature_names, f)
+
+    predictor = SalaryPredictor.from_directory(tmp_path, cache_size=0)
+    assert isinstance(predictor.feature_builder, FeatureBuilder)
+    assert predictor.feature_builder.skills.vocabulary == builder.skills.vocabulary
+    np.testing.assert_allclose(predictor.predict_batch(inputs[:50]), model.predict(X[:50]))
+
+
+def test_incremental_pipeline_matches_full_run(raw_csv, tmp_path):
+    from src.data.data_clearner import DataCleaner
+    from src.data.data_transformer import IncrementalPipeline, build_featured_frame
+    from src.features.feature_builder import FeatureBuilder
+
+    # Làm sạch + fit FeatureBuilder trên toàn bộ file, dùng làm chuẩn để so sánh
+    def full_run(path):
+        cleaned = DataCleaner(verbose=False).clean(load_csv(path))
+        return cleaned, build_featured_frame(cleaned, FeatureBuilder().fit(cleaned, 8, 6, 5))
+
+    def check(mode, rows_new, rows_removed=0):
+        cleaned, featured = pipeline.run(raw_csv, tmp_path / 'cleaned.csv', tmp_path / 'featured.csv')
+        expected_cleaned, expected_featured = full_run(raw_csv)
+        pd.testing.assert_frame_equal(cleaned, expected_cleaned)
+        pd.testing.assert_frame_equal(featured, expected_featured)
+        assert (tmp_path / 'featured.csv').read_text(encoding='utf-8-sig') == expected_featured.to_csv(index=False)
+        assert (pipeline.report['mode'], pipeline.report['rows_new'], pipeline.report['rows_removed']) == \
+            (mode, rows_new, rows_removed)
+
+    state_dir = tmp_path / 'state'
+    pipeline = IncrementalPipeline(state_dir, n_skills=8, n_fields=6, n_cities=5, verbose=False)
+    check('full', 3000 - pd.read_csv(raw_csv).duplicated().sum())
+
+    # Thêm dòng vào cuối file: chỉ đọc và xử lý 300 dòng mới
+    raw = pd.read_csv(raw_csv)
+    appended = raw.sample(300, random_state=1).assign(job_title='Kỹ sư dữ liệu', skills='Spark, Python')
+    appended.to_csv(raw_csv, mode='a', header=False, index=False)
+    pipeline = IncrementalPipeline(state_dir, n_skills=8, n_fields=6, n_cities=5, verbose=False)
+    check('append', 300 - appended.duplicated().sum())
+
+    # Sửa một dòng và xóa một dòng: đọc lại cả file, chỉ xử lý dòng bị sửa
+    raw = pd.read_csv(raw_csv, float_precision='round_trip')
+    raw.loc[10, 'salary_max'] = raw.loc[10, 'salary_max'] + 1
+    raw.drop(index=20).to_csv(raw_csv, index=False)
+    check('rescan', 1, 2)
+    check('unchanged', 0)
+
+
+def test_vocabulary_index_matches_typos_and_diacritics():
+    from src.features.vocabulary_index import VocabularyIndex, normalize_text
+    index = VocabularyIndex(['python', 'excel', 'tiếng anh', 'kế toán kiểm toán', 'java', 'đà nẵng'])
+
+    assert normalize_text(' Tiếng  ANH ') == 'tieng anh'
+    assert [index.lookup(token) for token in ['Python3', 'ms excel', 'tieng anh', 'Kế toán / Kiểm toán',
+                                              'Da Nang', 'pyhton']] == [0, 1, 2, 3, 5, 0]
+    assert [index.lookup(token) for token in ['javascript', 'go', '', '!!!']] == [None] * 4
+
+
+def test_synthetic_generator_streams_cleanable_jobs(tmp_path):
+    from src.data.data_clearner import DataCleaner
+    from src.data.data_generator import JobsGenerator, RAW_COLUMNS
+    from src.utils.config import POSITION_ORDER
+
+    path = tmp_path / 'jobs.csv'
+    assert JobsGenerator(seed=3).write_csv(path, 2500, chunk_size=1000, verbose=False) == 2500
+    JobsGenerator(seed=3).write_csv(tmp_path / 'again.csv', 2500, chunk_size=1000, verbose=False)
+    assert path.read_bytes() == (tmp_path / 'again.csv').read_bytes()
+
+    raw = pd.read_csv(path)
+    assert raw.columns.tolist() == RAW_COLUMNS and len(raw) == 2500
+    assert raw['skills'].isna().mean() == pytest.approx(0.13, abs=0.04)
+    assert raw['position_level'].str.isupper().any() and raw['city'].str.startswith(' ').any()
+
+    cleaned = DataCleaner(verbose=False).clean(load_csv(path))
+    assert len(cleaned) > 0.85 * len(raw)
+    assert set(cleaned['unit']) == {'VND', 'USD'}
+    assert cleaned['position_level'].isin(POSITION_ORDER + ['Tổng giám đốc']).mean() > 0.99
+    assert 5 < cleaned['salary_min'].median() < 15
@@ -0,0 +1,621 @@
+import json
+import os
+import shutil
+
+import joblib
+import numpy as np
+import pytest
+import pandas as pd
+
+from src.model.tree_engine import ENGINE_ARRAYS
+from src.utils.config import EXPERIENCE_MAPPING, POSITION_ORDER, VECTORIZED_ENCODE_MIN_BATCH
+from tests.conftest import make_inputs, predictor_paths
+
+
+# Cách tạo features cũ bằng DataFrame, dùng làm chuẩn để so sánh
+def legacy_preprocess_input(input_data, features_list):
+    features_df = pd.DataFrame(0, index=[0], columns=features_list)
+    if 'experience' in input_data:
+        exp = input_data['experience']
+        if isinstance(exp, str):
+            features_df['experience_years'] = EXPERIENCE_MAPPING.get(exp, 0)
+        else:
+            features_df['experience_years'] = float(exp)
+    if 'position_level' in input_data:
+        pos = input_data['position_level']
+        if pos in POSITION_ORDER:
+            features_df['position_level_encoded'] = POSITION_ORDER.index(pos)
+    if 'skills' in input_data:
+        skills = [s.strip().lower() for s in str(input_data['skills']).split(',') if s.strip()]
+        features_df['skills_count'] = len(skills)
+        for skill in skills:
+            skill_col = f'has_skill_{skill.replace(" ", "_")}'
+            if skill_col in features_list:
+                features_df[skill_col] = 1
+    if 'job_fields' in input_data:
+        fields = [f.strip().lower() for f in str(input_data['job_fields']).split(',') if f.strip()]
+        features_df['fields_count'] = len(fields)
+        for field in fields:
+            field_col = f'field_{field.replace(" ", "_").replace("/", "_")}'
+            if field_col in features_list:
+                features_df[field_col] = 1
+    if 'city' in input_data:
+        city_col = f'city_{input_data["city"].lower().replace(" ", "_")}'
+        if city_col in features_list:
+            features_df[city_col] = 1
+    features_df['exp_position_interaction'] = (
+        features_df['experience_years'] * features_df['position_level_encoded']
+    )
+    features_df['skills_exp_interaction'] = (
+        features_df['skills_count'] * features_df['experience_years']
+    )
+    if 'salary_min' in input_data and 'salary_max' in input_data:
+        salary_min = float(input_data['salary_min'])
+        salary_max = float(input_data['salary_max'])
+        features_df['salary_range'] = salary_max - salary_min
+        features_df['salary_range_ratio'] = (salary_max - salary_min) / (salary_min + 1)
+    return features_df
+
+
+def test_encode_input_matches_legacy_dataframe(predictor):
+    inputs = make_inputs(300)
+    inputs.append({'experience': 3, 'skills': 'Python, , SQL,', 'salary_min': 10, 'salary_max': 15})
+    inputs.append({'city': 'Cần Thơ'})
+
+    for input_data in inputs:
+        expected = legacy_preprocess_input(input_data, predictor.features_list)
+        row = predictor.encode_input(input_data)
+        np.testing.assert_array_equal(row, expected.to_numpy(dtype=np.float64)[0])
+        pd.testing.assert_frame_equal(
+            predictor.preprocess_input(input_data), expected.astype(np.float64)
+        )
+
+
+def test_predict_matches_legacy_dataframe(predictor):
+    for input_data in make_inputs(50, seed=1):
+        expected = predictor.model.predict(legacy_preprocess_input(input_data, predictor.features_list))[0]
+        assert predictor.predict(input_data) == expected
+
+
+def test_predict_silences_feature_name_warning_only_locally(model_dir):
+    import warnings
+    from src.model.predictor import SalaryPredictor
+
+    predictor = SalaryPredictor(**predictor_paths(model_dir, backend='sklearn'))
+    assert predictor.model_backend == 'sklearn'
+    assert not any(f[1] is not None and 'feature names' in f[1].pattern for f in warnings.filters)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        predictor.predict(make_inputs(1)[0])
+        predictor.predict_batch(make_inputs(3, seed=2))
+
+
+def test_vectorized_encode_batch_matches_rows(predictor):
+    inputs = make_inputs(VECTORIZED_ENCODE_MIN_BATCH, seed=4)
+    inputs[0] = {'experience': 3, 'skills': 'Python, , SQL,', 'salary_min': 10, 'salary_max': 15}
+    inputs[1] = {'city': 'Cần Thơ'}
+
+    expected = np.vstack([predictor.encode_input(input_data) for input_data in inputs])
+    np.testing.assert_array_equal(predictor.encode_batch(inputs), expected)
+
+
+def test_encode_input_does_not_mutate_template(predictor):
+    predictor.encode_input({'skills': 'python', 'city': 'Hà Nội', 'experience': '2-5 năm'})
+    assert not predictor._template_row.any()
+
+
+def test_prediction_cache_hits_on_normalized_input(predictor):
+    input_data = make_inputs(1, seed=5)[0]
+    input_data['skills'] = 'Python, SQL'
+    first = predictor.predict_with_details(input_data)
+
+    reordered = dict(input_data, skills=' sql,PYTHON ', job_title='Khác')
+    second = predictor.predict_with_details(reordered)
+
+    assert second['predicted_salary'] == first['predicted_salary']
+    assert second['input_summary'] == predictor._input_summary(reordered)
+    stats = predictor.get_cache_stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+
+
+def test_prediction_cache_entries_are_not_shared_with_callers(predictor):
+    input_data = make_inputs(1, seed=8)[0]
+    first = predictor.predict_with_details(input_data)
+    expected = first['confidence_interval']['lower']
+    first['confidence_interval']['lower'] = -1
+    first['model_info']['mae'] = -1
+
+    second = predictor.predict_with_details(input_data)
+    assert second['confidence_interval']['lower'] == expected
+    second['confidence_interval']['upper'] = -1
+    third = predictor.predict_with_details(input_data)
+    assert third['confidence_interval']['upper'] != -1 and third['model_info']['mae'] != -1
+    assert predictor.get_cache_stats()['hits'] == 2
+
+
+def test_prediction_cache_evicts_and_batches(model_dir, predictor):
+    from src.model.predictor import SalaryPredictor
+    cached = SalaryPredictor(**predictor_paths(model_dir, cache_size=5))
+    inputs = make_inputs(20, seed=6)
+    expected = [predictor.predict_with_details(x) for x in inputs]
+
+    assert cached.predict_with_details_batch(inputs) == expected
+    assert cached.predict_with_details_batch(inputs[-5:]) == expected[-5:]
+    stats = cached.get_cache_stats()
+    assert stats['size'] == 5
+    assert stats['hits'] == 5
+    assert stats['evictions'] >= 10
+
+
+def test_model_reload_is_atomic_and_starts_with_empty_cache(model_dir, tmp_path):
+    from src.model.registry import ModelManager, ModelRegistry
+
+    registry = ModelRegistry(tmp_path / 'registry')
+    registry.publish(model_dir, version='v1')
+    manager = ModelManager(registry)
+    manager.reload()
+    serving = manager.get()
+    input_data = make_inputs(1, seed=7)[0]
+    serving.predict_with_details(input_data)
+
+    # Phiên bản có features_list sai thứ tự: reload lỗi, predictor cũ vẫn phục vụ nguyên vẹn
+    broken_dir = tmp_path / 'broken'
+    shutil.copytree(model_dir, broken_dir)
+    features = json.loads((model_dir / 'features_list.json').read_text())
+    (broken_dir / 'features_list.json').write_text(json.dumps(features[::-1]))
+    registry.publish(broken_dir, version='v2', export_bundle=False)
+    with pytest.raises(ValueError, match='features_list'):
+        manager.reload()
+    assert manager.get() is serving and manager.version == 'v1'
+    assert serving.features_list == features
+    serving.predict_with_details(input_data)
+    assert serving.get_cache_stats()['hits'] == 1
+
+    registry.publish(model_dir, version='v3')
+    manager.reload()
+    assert manager.version == 'v3' and manager.get() is not serving
+    manager.get().predict_with_details(input_data)
+    assert manager.get().get_cache_stats()['hits'] == 0
+
+
+def test_prediction_cache_can_be_disabled(model_dir):
+    from src.model.predictor import SalaryPredictor
+    predictor = SalaryPredictor(**predictor_paths(model_dir, cache_size=0))
+    assert predictor.get_cache_stats() == {'enabled': False}
+    assert predictor.predict_with_details(make_inputs(1)[0])['predicted_salary'] > 0
+
+
+def test_micro_batcher_coalesces_concurrent_requests(model_dir):
+    from concurrent.futures import ThreadPoolExecutor
+    from src.model.batcher import MicroBatcher
+    from src.model.predictor import SalaryPredictor
+
+    predictor = SalaryPredictor(**predictor_paths(model_dir, cache_size=0))
+    inputs = make_inputs(64, seed=8)
+    inputs[10] = dict(inputs[10], salary_min='abc', salary_max=1)
+    batcher = MicroBatcher(max_wait_ms=20, max_batch_size=16)
+    try:
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            futures = [pool.submit(batcher.predict_with_details, predictor, x) for x in inputs]
+            outcomes = []
+            for future in futures:
+                try:
+                    outcomes.append(future.result()['predicted_salary'])
+                except ValueError:
+                    outcomes.append(None)
+    finally:
+        batcher.stop()
+
+    expected = [None if i == 10 else predictor.predict(x) for i, x in enumerate(inputs)]
+    assert outcomes == pytest.approx(expected)
+    stats = batcher.stats()
+    assert stats['items'] == 64
+    assert stats['batches'] < 64
+    assert stats['largest_batch'] <= 16
+
+
+def test_model_bundle_matches_sklearn_predictions(model_dir, tmp_path):
+    from src.model.model_bundle import export_model_bundle, load_model_bundle
+    from src.model.predictor import SalaryPredictor
+
+    model_path = tmp_path / 'best_model.pkl'
+    shutil.copy(model_dir / 'best_model.pkl', model_path)
+    bundle_dir = tmp_path / 'best_model_bundle'
+    export_model_bundle(model_path, bundle_dir)
+
+    bundle = load_model_bundle(bundle_dir)
+    assert isinstance(bundle.value, np.memmap)
+
+    kwargs = predictor_paths(model_dir, model_path=model_path, bundle_dir=bundle_dir, cache_size=0)
+    bundled = SalaryPredictor(**kwargs)
+    plain = SalaryPredictor(use_bundle=False, interval_mode='mae', **kwargs)
+    assert (bundled.model_backend, plain.model_backend) == ('bundle', 'sklearn')
+
+    inputs = make_inputs(200, seed=9)
+    np.testing.assert_allclose(bundled.predict_batch(inputs), plain.predict_batch(inputs), rtol=1e-12)
+    report = bundled.get_memory_report()
+    assert report['mapped']['files'] == len(ENGINE_ARRAYS)
+
+    # Bundle cũ hơn file mô hình thì load lại file mô hình
+    stat = model_path.stat()
+    os.utime(model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert SalaryPredictor(interval_mode='mae', **kwargs).model_backend == 'sklearn'
+
+
+def test_memory_report_without_proc_or_resource(monkeypatch):
+    import builtins
+    import src.utils.helpers as helpers
+
+    def no_proc(path, fields):
+        raise OSError(path)
+
+    monkeypatch.setattr(helpers, '_read_proc_fields', no_proc)
+    assert helpers.memory_report()['peak_rss_mb'] > 0
+
+    # Windows: không có /proc và module resource
+    real_import = builtins.__import__
+
+    def import_without_resource(name, *args, **kwargs):
+        if name == 'resource':
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, '__import__', import_without_resource)
+    assert helpers.memory_report() == {'pid': os.getpid()}
+
+
+def test_model_registry_hot_swap(model_dir, tmp_path):
+    from src.model.registry import ModelManager, ModelRegistry
+
+    registry = ModelRegistry(tmp_path / 'registry')
+    assert registry.active_version() is None
+    registry.publish(model_dir, version='v1')
+    registry.publish(model_dir, version='v2', activate=False)
+    assert registry.list_versions() == ['v1', 'v2']
+    assert registry.active_version() == 'v1'
+    assert (registry.version_dir('v1') / 'best_model_bundle' / 'meta.json').exists()
+
+    manager = ModelManager(registry)
+    assert manager.reload()['active_version'] == 'v1'
+    in_flight = manager.get()
+    assert in_flight.model_backend == 'bundle'
+
+    registry.activate('v2')
+    manager.reload()
+    assert manager.version == 'v2'
+    assert manager.get() is not in_flight
+
+    # Request đang chạy vẫn dùng được predictor cũ
+    input_data = make_inputs(1)[0]
+    assert in_flight.predict(input_data) == pytest.approx(manager.get().predict(input_data))
+
+    with pytest.raises(ValueError):
+        registry.activate('v3')
+
+
+@pytest.mark.parametrize('estimator', ['random_forest', 'decision_tree', 'gradient_boosting', 'gb_zero_init'])
+def test_flat_tree_engine_matches_sklearn(estimator):
+    from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+    from sklearn.tree import DecisionTreeRegressor
+    from src.model.tree_engine import FlatTreeEnsemble
+    from tests.conftest import make_featured_frame
+
+    models = {
+        'random_forest': RandomForestRegressor(n_estimators=15, max_depth=12, random_state=0),
+        'decision_tree': DecisionTreeRegressor(max_depth=10, random_state=0),
+        'gradient_boosting': GradientBoostingRegressor(n_estimators=30, max_depth=4, random_state=0),
+        'gb_zero_init': GradientBoostingRegressor(n_estimators=10, init='zero', random_state=0),
+    }
+    X, y = make_featured_frame(n=1500, seed=3)
+    model = models[estimator].fit(X, y)
+    engine = FlatTreeEnsemble.from_model(model)
+
+    X_test = X.to_numpy()[:700]
+    np.testing.assert_array_equal(engine.predict(X_test), model.predict(X.iloc[:700]))
+    np.testing.assert_array_equal(engine.predict(X_test[:1]), model.predict(X.iloc[:1]))
+
+
+def test_predictor_flat_backend(model_dir):
+    from src.model.predictor import SalaryPredictor
+    kwargs = predictor_paths(model_dir, cache_size=0, use_bundle=False)
+    flat = SalaryPredictor(backend='flat', **kwargs)
+    plain = SalaryPredictor(interval_mode='mae', **kwargs)
+    assert flat.model_backend == 'flat'
+
+    inputs = make_inputs(100, seed=10)
+    assert flat.predict_batch(inputs) == plain.predict_batch(inputs)
+    assert flat.predict(inputs[0]) == plain.predict(inputs[0])
+
+
+def test_train_model_script_writes_artifacts(tmp_path):
+    import importlib.util
+    import json
+    from pathlib import Path
+    from src.model.predictor import SalaryPredictor
+    from tests.conftest import make_featured_frame
+
+    spec = importlib.util.spec_from_file_location(
+        'train_model', Path(__file__).parent.parent / 'scripts' / 'train_model.py')
+    train_model = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(train_model)
+
+    X, y = make_featured_frame(n=900, seed=12)
+    X.assign(salary_avg_vnd=y).to_csv(tmp_path / 'featured_data.csv', index=False)
+    kwargs = dict(data_path=tmp_path / 'featured_data.csv', output_dir=tmp_path / 'models',
+                  param_grid={'n_estimators': [5, 10], 'max_depth': [3, 6, None]},
+                  cache_dir=tmp_path / 'cache', n_jobs=2)
+
+    info = train_model.train_model(search='halving', **kwargs)
+    assert info['search']['class'] == 'HalvingGridSearchCV'
+    assert info['search']['n_iterations'] > 1 and not info['search']['split_cached']
+    assert set(info['timings']) == {'load_data', 'search', 'refit', 'evaluate', 'save'}
+    assert json.loads((tmp_path / 'models' / 'features_list.json').read_text()) == list(X.columns)
+    assert info['prediction_interval']['method'] == 'tree_quantile_conformal'
+    assert info['prediction_interval']['holdout']['coverage'] > 0.75
+    # Hiệu chỉnh trên tập validation tách từ tập train, tập test chỉ để báo cáo
+    assert info['prediction_interval']['n_calibration'] == info['n_validation_samples'] == 72
+    assert (info['n_train_samples'], info['n_test_samples']) == (648, 180)
+
+    # Lần chạy sau dùng lại tập train/test và các fold đã chia
+    info = train_model.train_model(search='random', budget=3, compact=True, **kwargs)
+    assert info['search']['split_cached'] and info['search']['n_candidates'] == 3
+    assert info['compaction']['chosen']['mae'] <= info['compaction']['original']['mae'] * 1.01
+    assert info['compaction']['test_mae'] > 0
+    assert (tmp_path / 'models' / 'compact_model_bundle' / 'meta.json').exists()
+
+    predictor = SalaryPredictor.from_directory(tmp_path / 'models', cache_size=0)
+    assert predictor.model_backend == 'bundle'
+    inputs = make_inputs(20, seed=13)
+    expected = predictor.model.predict(np.vstack([predictor.encode_input(x) for x in inputs]).astype(np.float32))
+    np.testing.assert_allclose(predictor.predict_batch(inputs), expected)
+
+
+def test_quantile_intervals_are_input_specific_and_calibrated(model_dir, predictor, tmp_path):
+    from src.model.intervals import TreeQuantileInterval
+    from src.model.predictor import SalaryPredictor
+    from src.model.tree_engine import FlatTreeEnsemble
+    from tests.conftest import make_featured_frame
+
+    # Mô hình chưa hiệu chỉnh dùng khoảng MAE và giữ backend sklearn đã cấu hình
+    inputs = make_inputs(30, seed=14)
+    assert predictor.predict_with_details(inputs[0])['confidence_interval']['method'] == 'mae'
+    assert predictor.model_backend == 'sklearn' and predictor.interval is None
+
+    # Khoảng từ phân vị đã sắp xếp khớp np.quantile; hiệu chỉnh conformal đạt tỉ lệ phủ trên dữ liệu mới
+    engine = FlatTreeEnsemble.from_model(joblib.load(model_dir / 'best_model.pkl'))
+    X, y = make_featured_frame(n=3000, seed=15)
+    tree_values = engine.tree_predictions(X.to_numpy())
+    interval = TreeQuantileInterval.calibrate(tree_values[:1500], y[:1500], alpha=0.1)
+    np.testing.assert_allclose(np.column_stack(TreeQuantileInterval(0.1).tree_quantiles(tree_values)),
+                               np.quantile(tree_values, (0.05, 0.95), axis=1).T)
+    assert abs(interval.evaluate(tree_values[1500:], y[1500:])['coverage'] - 0.9) < 0.03
+
+    # Hiệu chỉnh lưu trong model_info.json được predictor dùng lại
+    info = {'test_mae': 1.2, 'prediction_interval': interval.to_dict()}
+    info_path = tmp_path / 'model_info.json'
+    info_path.write_text(json.dumps(info))
+    calibrated = SalaryPredictor(**predictor_paths(model_dir, model_info_path=info_path, cache_size=0))
+    assert calibrated.model_backend == 'sklearn'
+    results = calibrated.predict_with_details_batch(inputs)
+    widths = [r['confidence_interval']['upper'] - r['confidence_interval']['lower'] for r in results]
+    assert results[0]['confidence_interval']['method'] == 'tree_quantile_conformal'
+    assert all(r['confidence_interval']['lower'] <= r['predicted_salary'] <= r['confidence_interval']['upper']
+               for r in results)
+    assert np.std(widths) > 0
+    flat = SalaryPredictor(**predictor_paths(model_dir, model_info_path=info_path, cache_size=0, backend='flat'))
+    assert flat.predict_with_details_batch(inputs) == results
+    plain = SalaryPredictor(**predictor_paths(model_dir, model_info_path=info_path, cache_size=0, interval_mode='mae'))
+    assert plain.predict_with_details(inputs[0])['confidence_interval']['method'] == 'mae'
+    assert plain.predict(inputs[0]) == pytest.approx(calibrated.predict(inputs[0]), rel=1e-12)
+
+
+def test_compact_engine_truncates_trees_like_sklearn(model_dir):
+    from src.model.regression import compact_engine
+    from src.model.tree_engine import FlatTreeEnsemble
+    from tests.conftest import make_featured_frame
+
+    model = joblib.load(model_dir / 'best_model.pkl')
+    engine = FlatTreeEnsemble.from_model(model)
+    X = make_featured_frame(n=300, seed=16)[0].to_numpy(np.float32)
+    np.testing.assert_array_equal(compact_engine(engine).predict(X), engine.predict(X))
+
+    # Cắt ở độ sâu 3 = giá trị của node sâu nhất (<= 3) trên đường đi của mẫu trong từng cây đã chọn
+    trees = [4, 0, 7]
+    compacted = compact_engine(engine, trees=trees, max_depth=3)
+    expected = []
+    for t in trees:
+        tree = model.estimators_[t].tree_
+        depth = np.zeros(tree.node_count, dtype=int)
+        for node in range(tree.node_count):
+            for child in (tree.children_left[node], tree.children_right[node]):
+                if child != -1:
+                    depth[child] = depth[node] + 1
+        path = model.estimators_[t].decision_path(X).toarray().astype(bool) & (depth <= 3)
+        expected.append(tree.value[:, 0, 0][path.shape[1] - 1 - np.argmax(path[:, ::-1], axis=1)])
+    np.testing.assert_allclose(compacted.tree_predictions(X), np.column_stack(expected))
+    assert compacted.max_depth == 3 and len(compacted.value) < len(engine.value)
+
+
+def test_compact_forest_stays_within_mae_budget(model_dir, tmp_path):
+    from src.model.predictor import SalaryPredictor
+    from src.model.regression import compact_forest, save_compact_model
+    from tests.conftest import make_featured_frame
+
+    X, y = make_featured_frame(n=2000, seed=17)
+    engine, report = compact_forest(joblib.load(model_dir / 'best_model.pkl'), X, y, X_train=X.to_numpy()[:500],
+                                    mae_budget=0.02, depths=[6, 4], min_trees=5)
+    assert report['chosen']['mae'] <= report['mae_limit'] == pytest.approx(report['reference_mae'] * 1.02)
+    assert report['chosen']['n_trees'] * report['chosen']['max_depth'] < 20 * 8
+    assert report['chosen']['n_trees'] >= 5
+
+    bundle_dir = tmp_path / 'compact_model_bundle'
+    save_compact_model(engine, report, model_dir / 'best_model.pkl', bundle_dir)
+    compact = SalaryPredictor(**predictor_paths(model_dir, bundle_dir=bundle_dir, cache_size=0))
+    assert compact.model_backend == 'bundle' and compact.model.meta['compaction']['chosen'] == report['chosen']
+    assert compact.interval.correction == report['prediction_interval']['correction']
+
+
+def test_predictor_fuzzy_matches_free_text(predictor, model_dir):
+    from src.model.predictor import SalaryPredictor
+    free_text = {'experience': '2-5 năm', 'skills': 'Python3, ms excel, tieng anh, figma',
+                 'job_fields': 'Ke toan / Kiem toan', 'city': 'ha noi'}
+    canonical = {'experience': '2-5 năm', 'skills': 'python, excel, tiếng anh, figma',
+                 'job_fields': 'kế toán/kiểm toán', 'city': 'Hà Nội'}
+
+    fuzzy = SalaryPredictor(**predictor_paths(model_dir, cache_size=0, fuzzy_matching=True))
+    np.testing.assert_array_equal(fuzzy.encode_input(free_text), fuzzy.encode_input(canonical))
+    np.testing.assert_array_equal(fuzzy.encode_batch([free_text] * VECTORIZED_ENCODE_MIN_BATCH)[0],
+                                  fuzzy.encode_input(canonical))
+    summary = fuzzy.predict_with_details(free_text)['input_summary']
+    assert summary['unmatched_tokens'] == {'skills': ['figma']}
+
+    # Mặc định chỉ khớp chính xác như lúc train; input khớp chính xác được mã hóa giống nhau ở cả hai chế độ
+    assert not predictor.fuzzy_matching
+    assert predictor.feature_builder.unmatched_tokens(free_text) == {
+        'skills': ['python3', 'ms excel', 'tieng anh', 'figma'], 'job_fields': ['ke toan / kiem toan'],
+        'city': ['ha noi']
+    }
+    for data in [canonical] + make_inputs(20, seed=14):
+        np.testing.assert_array_equal(fuzzy.encode_input(data), predictor.encode_input(data))
+
+
+def test_evaluate_model_script_matches_sklearn_and_reuses_fits(tmp_path):
+    import importlib.util
+    from pathlib import Path
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.model_selection import cross_val_score, train_test_split
+    from tests.conftest import make_featured_frame
+
+    spec = importlib.util.spec_from_file_location(
+        'evaluate_model', Path(__file__).parent.parent / 'scripts' / 'evaluate_model.py')
+    evaluate_model = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(evaluate_model)
+
+    X, y = make_featured_frame(n=600, seed=21)
+    rng = np.random.default_rng(0)
+    positions = rng.choice(POSITION_ORDER[:3], size=len(y))
+    X.assign(salary_avg_vnd=y, position_level=positions).to_csv(tmp_path / 'featured_data.csv', index=False)
+    y = pd.read_csv(tmp_path / 'featured_data.csv')['salary_avg_vnd']  # Giá trị sau khi ghi/đọc CSV
+    model = RandomForestRegressor(n_estimators=10, max_depth=6, random_state=42).fit(X.to_numpy(), y)
+    joblib.dump(model, tmp_path / 'best_model.pkl')
+    with open(tmp_path / 'features_list.json', 'w') as f:
+        json.dump(list(X.columns), f)
+    kwargs = dict(model_path=tmp_path / 'best_model.pkl', features_path=tmp_path / 'features_list.json',
+                  data_path=tmp_path / 'featured_data.csv', output_path=tmp_path / 'evaluation_results.json',
+                  predictions_path=tmp_path / 'test_predictions.csv', cv=3, curve_points=2, n_jobs=2,
+                  cache_dir=tmp_path / 'cache')
+
+    results = evaluate_model.evaluate_model(**kwargs)
+    assert results['fits'] == {'total': 3 + 2 * 3, 'cached': 0, 'n_jobs': 2, 'forest_n_jobs': 1}
+    assert len(results['learning_curve']) == 2
+
+    # Cùng các fold với cross_val_score (KFold không xáo trộn trên tập train)
+    train_rows, test_rows = train_test_split(np.arange(len(y)), test_size=0.2, random_state=42)
+    X_train, y_train = X.to_numpy(np.float32)[train_rows], y.to_numpy()[train_rows]
+    cv = results['cross_validation']
+    np.testing.assert_allclose(cv['mean_mae'], -cross_val_score(
+        model, X_train, y_train, cv=3, scoring='neg_mean_absolute_error').mean())
+    np.testing.assert_allclose(cv['mean_r2'], cross_val_score(model, X_train, y_train, cv=3, scoring='r2').mean())
+
+    # Metrics theo cấp bậc trong một lần groupby khớp với vòng lặp từng nhóm như notebook
+    y_test = y.to_numpy()[test_rows]
+    errors = np.abs(model.predict(X.to_numpy(np.float32)[test_rows]) - y_test)
+    for segment in results['segments']['position_level']:
+        mask = positions[test_rows] == segment['segment']
+        assert segment['count'] == mask.sum()
+        np.testing.assert_allclose(segment['mae'], errors[mask].mean())
+    ranges = {s['segment']: s['count'] for s in results['segments']['salary_range']}
+    assert sum(ranges.values()) == len(test_rows) and len(ranges) > 1
+    assert json.loads((tmp_path / 'evaluation_results.json').read_text())['test_metrics'] == results['test_metrics']
+
+    # Lần chạy sau dùng lại dự đoán đã cache, không fit lại
+    again = evaluate_model.evaluate_model(**kwargs)
+    assert again['fits']['cached'] == again['fits']['total']
+    assert again['cross_validation'] == cv
+
+
+def test_market_segments_streaming_fit_and_serving_lookup(model_dir, tmp_path):
+    from scipy import sparse
+    from src.model.clustering import cluster_columns, fit_market_segments, load_assignments, save_market_segments
+    from src.model.predictor import SalaryPredictor
+    from tests.conftest import make_featured_frame
+
+    X, y = make_featured_frame(n=3000, seed=8)
+    features = list(X.columns)
+    segments, labels = fit_market_segments(X.to_numpy(np.float32), y.to_numpy(), features, n_clusters=4,
+                                           batch_size=500, n_epochs=2)
+    assert labels.min() == 0 and sum(p['size'] for p in segments.profiles) == len(y)
+    salary_means = [p['salary_mean'] for p in segments.profiles]
+    assert salary_means == sorted(salary_means)
+
+    # Tra centroid gần nhất lúc phục vụ khớp với khoảng cách đầy đủ trên ma trận thưa
+    numeric, binary = cluster_columns(features)
+    Z = segments.transform(np.column_stack([y] + [X[name] for name in numeric[1:]]),
+                           sparse.csr_matrix(X[binary].to_numpy()))
+    distances = ((Z.toarray()[:, None, :] - segments.centroids[None]) ** 2).sum(axis=2)
+    np.testing.assert_array_equal(segments.assign(X.to_numpy(), y.to_numpy(), features), distances.argmin(axis=1))
+    np.testing.assert_array_equal(labels, distances.argmin(axis=1))
+
+    version_dir = tmp_path / 'version'
+    shutil.copytree(model_dir, version_dir)
+    save_market_segments(segments, labels, version_dir / 'market_segments')
+    np.testing.assert_array_equal(load_assignments(version_dir / 'market_segments'), labels)
+
+    predictor = SalaryPredictor.from_directory(version_dir, cache_size=0)
+    inputs = make_inputs(10, seed=9)
+    results = predictor.predict_with_details_batch(inputs)
+    features_matrix = predictor.encode_batch(inputs)
+    expected = segments.assign(features_matrix, [r['predicted_salary'] for r in results], predictor.features_list)
+    assert [r['market_segment']['id'] for r in results] == expected.tolist()
+    assert predictor.predict_with_details(inputs[0])['market_segment'] == results[0]['market_segment']
+    assert 'market_segment' not in SalaryPredictor.from_directory(model_dir, cache_size=0).predict_with_details(inputs[0])
+
+
+
+def test_market_segments_skip_rows_with_missing_values(tmp_path):
+    from src.model.clustering import fit_market_segments
+    from tests.conftest import make_featured_frame
+
+    X, y = make_featured_frame(n=500, seed=16)
+    features = list(X.columns)
+    np.save(tmp_path / 'X.npy', X.to_numpy(np.float32))
+    X = np.load(tmp_path / 'X.npy', mmap_mode='r+')
+    X[3, features.index('position_level_encoded')] = np.nan
+    X[250, features.index('experience_years')] = np.nan
+    y = y.to_numpy().copy()
+    y[7] = np.nan
+
+    segments, labels = fit_market_segments(X, y, features, n_clusters=3, batch_size=100, n_epochs=2)
+    assert (labels[[3, 7, 250]] == -1).all() and (np.delete(labels, [3, 7, 250]) >= 0).all()
+    assert segments.meta['n_rows'] == 497
+    assert all(np.isfinite(p['salary_mean']) and np.isfinite(p['experience_mean']) for p in segments.profiles)
+
+
+def test_similar_jobs_index_matches_brute_force(predictor, tmp_path):
+    from src.model.similar_jobs import (brute_force_query, build_similar_jobs_index, load_similar_jobs_index,
+                                        _bitwise_count_swar, pack_bits, popcount,
+                                        save_similar_jobs_index)
+    from tests.conftest import make_featured_frame
+
+    bits = np.random.default_rng(10).random((50, 130)) < 0.3
+    np.testing.assert_array_equal(popcount(pack_bits(bits)), bits.sum(axis=1))
+    np.testing.assert_array_equal(_bitwise_count_swar(pack_bits(bits)).sum(axis=1), bits.sum(axis=1))
+
+    X, y = make_featured_frame(n=1500, seed=11)
+    df = X.assign(salary_avg_vnd=y, job_title=[f'Job {i}' for i in range(len(y))])
+    df.loc[3, 'salary_avg_vnd'] = np.nan
+    df.to_csv(tmp_path / 'featured_data.csv', index=False, encoding='utf-8-sig')
+
+    index, data_path = build_similar_jobs_index(tmp_path / 'featured_data.csv')
+    assert index.n_jobs == len(df) - 1 and index.n_groups <= index.n_jobs
+    save_similar_jobs_index(index, tmp_path / 'similar_jobs', data_path)
+    index = load_similar_jobs_index(tmp_path / 'similar_jobs')
+    assert load_similar_jobs_index(tmp_path / 'missing') is None
+
+    for row in [X.iloc[0].to_numpy(), X.iloc[42].to_numpy()] + list(predictor.encode_batch(make_inputs(5, seed=12))):
+        assert index.query(row, predictor.features_list, k=7) == brute_force_query(index, row, predictor.features_list, k=7)
+
+    # Một tin có sẵn giống chính nó hoàn toàn
+    jobs = index.similar_jobs(X.iloc[42].to_numpy(), predictor.features_list, k=3)
+    assert len(jobs) == 3 and jobs[0]['similarity'] == 1.0
+    assert any(job['job_title'] == 'Job 42' for job in jobs if job['similarity'] == 1.0)